@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of the compiled web.assets_* bundles for tour runs.
+
+Every tour run used to start from a fresh clone, and the first browser page of
+the run compiled the asset bundles (SCSS, JS transpilation and minification).
+That can take minutes, and each parallel tour shard paid it again. Odoo keeps
+a compiled bundle as a public ir.attachment ('/web/assets/<version>/<bundle>...',
+created by the superuser). The <version> is derived from the bundle's files and
+their modification times, so one build stays valid for every database running
+the same sources.
+
+Before the tour phase, the runner pipes this file into the script-runner
+container (`docker exec -i <container> python3 - ...`, see run_asset_cache):
+
+- `seed`: computes the source key (the manifests and static/ files of every
+  addon on the addons path: path, size and mtime, like Odoo's bundle version).
+  On a hit it links the cached bundle files into the test database's filestore
+  and prints their attachment rows, which the runner inserts (see
+  insert_bundles_sql). On a miss the runner pregenerates the bundles in that
+  test database with Odoo itself, exports the rows (EXPORT_BUNDLES_SQL) and
+  calls `store`.
+- `store`: links the exported bundle files into the cache, writes the build
+  manifest for the key, and drops all but the newest MAX_BUILDS builds and the
+  files no remaining build references.
+
+Files are stored under their sha1, like the filestore itself (blobs/ab/abcd...),
+so identical bundles of different builds are stored once. The cache lives on the
+data volume next to the filestores, where hard links are free. It prints one JSON
+report; the container side uses the standard library only.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+CACHE_ROOT = "/volumes/data/asset-cache"
+FILESTORE_ROOT = "/volumes/data/filestore"  # filestore.FILESTORE_ROOT; this script must stay self-contained
+MAX_BUILDS = 5
+DEFAULT_TIMEOUT_SECONDS = 120
+BUNDLE_COLUMNS = ("name", "url", "mimetype", "store_fname", "file_size", "checksum")
+# The newest attachment per bundle file, as AssetsBundle.get_attachments picks it
+EXPORT_BUNDLES_SQL = (
+    f"SELECT DISTINCT ON (name) {', '.join(BUNDLE_COLUMNS)} FROM ir_attachment "
+    "WHERE res_model = 'ir.ui.view' AND res_id = 0 AND public AND create_uid = 1 AND store_fname IS NOT NULL "
+    "AND url LIKE '/web/assets/%' AND name LIKE 'web.assets\\_%' ORDER BY name, id DESC"
+)
+# Run in `odoo-bin shell`: what Odoo does itself before post_install HttpCase tests
+PREGENERATE_SCRIPT = "env['ir.qweb']._pregenerate_assets_bundles()\nenv.cr.commit()\n"
+
+
+# Container side
+
+
+def source_key(addons_path: str) -> str:
+    """Hash of the manifest and static/ files (path, size, mtime) of every addon on the addons path."""
+    digest = hashlib.sha256()
+
+    def add_tree(directory: str) -> None:
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                add_tree(entry.path)
+            elif entry.is_file():
+                stat = entry.stat()
+                digest.update(f"{entry.path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+
+    for addons_dir in addons_path.split(","):
+        try:
+            modules = sorted(entry.path for entry in os.scandir(addons_dir) if entry.is_dir())
+        except OSError:
+            continue
+        for module in modules:
+            manifest = f"{module}/__manifest__.py"
+            if not os.path.isfile(manifest):
+                continue
+            stat = os.stat(manifest)
+            digest.update(f"{manifest}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+            add_tree(f"{module}/static")
+    return digest.hexdigest()[:16]
+
+
+def _link(source: str, target: str) -> bool:
+    """Hard-link (or copy) `source` to `target`, keeping the owner of the source file."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        if os.path.exists(target):
+            return True
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+            stat = os.stat(source)
+            os.chown(target, stat.st_uid, stat.st_gid)
+        return True
+    except OSError:
+        return False
+
+
+def seed(database: str, addons_path: str) -> dict:
+    key = source_key(addons_path)
+    try:
+        with open(f"{CACHE_ROOT}/builds/{key}.json") as manifest:
+            rows = json.load(manifest)["rows"]
+    except (OSError, ValueError, KeyError):
+        return {"key": key, "hit": False, "rows": []}
+    filestore = f"{FILESTORE_ROOT}/{database}"
+    owner = os.stat(filestore if os.path.isdir(filestore) else FILESTORE_ROOT)
+    seeded = []
+    for row in rows:
+        target = f"{filestore}/{row['store_fname']}"
+        if _link(f"{CACHE_ROOT}/blobs/{row['store_fname']}", target):
+            os.chown(os.path.dirname(target), owner.st_uid, owner.st_gid)
+            seeded.append(row)
+    return {"key": key, "hit": True, "rows": seeded, "missing": len(rows) - len(seeded)}
+
+
+def store(database: str, key: str, rows: list[dict]) -> dict:
+    filestore = f"{FILESTORE_ROOT}/{database}"
+    stored = [row for row in rows if _link(f"{filestore}/{row['store_fname']}", f"{CACHE_ROOT}/blobs/{row['store_fname']}")]
+    os.makedirs(f"{CACHE_ROOT}/builds", exist_ok=True)
+    temporary = f"{CACHE_ROOT}/builds/.{key}.json.tmp"
+    with open(temporary, "w") as manifest:
+        json.dump({"key": key, "created": time.time(), "database": database, "rows": stored}, manifest)
+    os.replace(temporary, f"{CACHE_ROOT}/builds/{key}.json")
+    return {"key": key, "stored": len(stored), "missing": len(rows) - len(stored), **evict()}
+
+
+def evict(max_builds: int = MAX_BUILDS) -> dict:
+    """Keep the newest `max_builds` builds and only the bundle files they reference."""
+    builds_dir = f"{CACHE_ROOT}/builds"
+    builds = sorted(
+        (entry.path for entry in os.scandir(builds_dir) if entry.name.endswith(".json") and not entry.name.startswith(".")),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for stale in builds[max_builds:]:
+        os.unlink(stale)
+    referenced = set()
+    for build in builds[:max_builds]:
+        try:
+            with open(build) as manifest:
+                referenced.update(row["store_fname"] for row in json.load(manifest)["rows"])
+        except (OSError, ValueError, KeyError):
+            continue
+    removed = 0
+    blobs_dir = f"{CACHE_ROOT}/blobs"
+    for directory, _dirnames, filenames in os.walk(blobs_dir):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if os.path.relpath(path, blobs_dir) not in referenced:
+                os.unlink(path)
+                removed += 1
+    return {"builds": min(len(builds), max_builds), "evicted_files": removed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cache of compiled web.assets_* bundles for test databases")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    seed_parser = subparsers.add_parser("seed")
+    seed_parser.add_argument("--db", required=True)
+    seed_parser.add_argument("--addons-path", required=True)
+    store_parser = subparsers.add_parser("store")
+    store_parser.add_argument("--db", required=True)
+    store_parser.add_argument("--key", required=True)
+    store_parser.add_argument("--rows", required=True, help="Attachment rows (JSON) exported with EXPORT_BUNDLES_SQL")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    if args.command == "seed":
+        report = seed(args.db, args.addons_path)
+    else:
+        report = store(args.db, args.key, json.loads(args.rows))
+    report["elapsed"] = round(time.monotonic() - started, 3)
+    json.dump(report, sys.stdout)
+
+
+# Host side
+
+
+def run_asset_cache(container_name: str, args: list[str], timeout: float = DEFAULT_TIMEOUT_SECONDS) -> dict:
+    """Run this script in `container_name` (as root, to link into any filestore) and return its report.
+
+    Failures (container down, timeout) are reported under "error" instead of raised.
+    """
+    cmd = ["docker", "exec", "-i", "-u", "root", container_name, "python3", "-", *args]
+    with open(__file__, encoding="utf-8") as source:
+        script = source.read()
+    try:
+        result = subprocess.run(cmd, input=script, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        return {"error": str(e)}
+    if result.returncode != 0:
+        return {
+            "error": result.stderr.strip().splitlines()[-1]
+            if result.stderr.strip()
+            else f"asset cache exited with {result.returncode}"
+        }
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return {"error": f"unreadable asset cache report: {result.stdout[:200]}"}
+
+
+def bundle_rows(records: list[tuple]) -> list[dict]:
+    return [dict(zip(BUNDLE_COLUMNS, record)) for record in records]
+
+
+def insert_bundles_sql(rows: list[dict]) -> str:
+    """Register cached bundle files as the superuser's public asset attachments, unless already present."""
+
+    def literal(value: object) -> str:
+        return "'" + str(value).replace("'", "''") + "'"
+
+    values = ", ".join(
+        f"({literal(row['name'])}, {literal(row['url'])}, {literal(row['mimetype'])}, {literal(row['store_fname'])}, "
+        f"{int(row['file_size'])}, {literal(row['checksum'])})"
+        for row in rows
+    )
+    return (
+        "INSERT INTO ir_attachment (name, url, mimetype, store_fname, file_size, checksum, res_model, res_id, type, public, "
+        "create_uid, write_uid, create_date, write_date) "
+        "SELECT v.name, v.url, v.mimetype, v.store_fname, v.file_size, v.checksum, 'ir.ui.view', 0, 'binary', true, "
+        "1, 1, now() at time zone 'UTC', now() at time zone 'UTC' "
+        f"FROM (VALUES {values}) AS v (name, url, mimetype, store_fname, file_size, checksum) "
+        "WHERE NOT EXISTS (SELECT 1 FROM ir_attachment existing WHERE existing.url = v.url)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Compare the sequential per-pattern loop with the single-pass log classifier.
+
+Usage:
+    uv run python tools/benchmark_log_classifier.py tmp/tests/<run>/full.log
+    uv run python tools/benchmark_log_classifier.py --lines 500000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from tools.log_classifier import CRITICAL_ERROR_PATTERNS, PROGRESS_PATTERNS, LogClassifier, LogPattern
+
+TIMESTAMP_PREFIX = re.compile(r"^\[\d{4}-\d{2}-\d{2}T[\d:.]+] ")
+
+SAMPLE_LINES = [
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.modules.loading: loading 142 modules...",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.modules.registry: module product_connect: creating or updating database tables",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.addons.base.models.ir_attachment: filestore gc 0 checked, 0 removed",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.addons.product_connect.tests.test_product: Starting TestProductTemplate.test_sku_validation ...",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.addons.product_connect.tests.test_product: test_sku_validation (TestProductTemplate) ... ok",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.modules.loading: Loading module product_connect (142/142)",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.modules.loading: 142 modules loaded in 3.21s, 0 queries (+0 extra)",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.modules.registry: registry loaded in 4.812s",
+    "2025-01-01 12:00:00,000 1 WARNING opw_test odoo.models: product.template.read() with unknown field 'foo'",
+    "2025-01-01 12:00:00,000 1 ERROR opw_test odoo.sql_db: bad query: INSERT INTO product_template ...",
+    "2025-01-01 12:00:00,000 1 INFO opw_test odoo.tests.stats: product_connect: 42 tests 1.23s 1024 queries",
+    '2025-01-01 12:00:00,000 1 INFO opw_test werkzeug: 127.0.0.1 - - [01/Jan/2025 12:00:00] "POST /web/dataset/call_kw HTTP/1.1" 200 -',
+    "    self.assertEqual(record.default_code, '12345678')",
+]
+
+
+def load_lines(log_path: Path) -> list[str]:
+    with open(log_path, errors="replace") as f:
+        return [TIMESTAMP_PREFIX.sub("", line.rstrip("\n")) for line in f]
+
+
+def synthesize_lines(count: int, seed: int) -> list[str]:
+    # Weighted towards plain INFO/werkzeug noise, which dominates real runs
+    rng = random.Random(seed)
+    weights = [6, 4, 4, 2, 2, 1, 1, 1, 1, 1, 1, 12, 3]
+    return rng.choices(SAMPLE_LINES, weights=weights, k=count)
+
+
+def compile_table(patterns: tuple[LogPattern, ...]) -> list[tuple[str, re.Pattern[str]]]:
+    return [(pattern.name, re.compile(pattern.regex)) for pattern in patterns]
+
+
+def classify_with_loop(table: list[tuple[str, re.Pattern[str]]], line: str) -> tuple[str, str | None] | None:
+    # The per-pattern loop OutputManager used before the single-pass classifier
+    for pattern_name, pattern in table:
+        match = pattern.search(line)
+        if match:
+            return pattern_name, match.group(1) if pattern.groups else None
+    return None
+
+
+def benchmark(lines: list[str]) -> float:
+    progress_table = compile_table(PROGRESS_PATTERNS)
+    critical_table = compile_table(CRITICAL_ERROR_PATTERNS)
+    started = time.perf_counter()
+    sequential = [(classify_with_loop(progress_table, line), classify_with_loop(critical_table, line)) for line in lines]
+    sequential_seconds = time.perf_counter() - started
+
+    classifier = LogClassifier()
+    started = time.perf_counter()
+    combined = [classifier.classify(line) for line in lines]
+    combined_seconds = time.perf_counter() - started
+
+    for line, expected, actual in zip(lines, sequential, combined):
+        actual = tuple(tuple(classification) if classification else None for classification in actual)
+        if expected != actual:
+            print(f"❌ Classification mismatch for {line!r}: expected {expected}, got {actual}")
+            sys.exit(1)
+
+    speedup = sequential_seconds / combined_seconds if combined_seconds else float("inf")
+    print(f"  per-pattern loop: {sequential_seconds:6.3f}s ({len(lines) / sequential_seconds:>10,.0f} lines/s)")
+    print(f"  single-pass:      {combined_seconds:6.3f}s ({len(lines) / combined_seconds:>10,.0f} lines/s)")
+    print(f"  speedup:          {speedup:6.1f}x")
+    return speedup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass log classifier against the per-pattern loop")
+    parser.add_argument("log_file", nargs="?", type=Path, help="full.log from a previous run (synthesized when omitted)")
+    parser.add_argument("--lines", type=int, default=500_000, help="Number of synthetic lines (default: 500000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for synthetic lines")
+    args = parser.parse_args()
+
+    if args.log_file:
+        lines = load_lines(args.log_file)
+        print(f"📄 {len(lines):,} lines from {args.log_file}")
+    else:
+        lines = synthesize_lines(args.lines, args.seed)
+        print(f"🧪 {len(lines):,} synthetic lines")
+
+    benchmark(lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,794 @@
+#!/usr/bin/env python3
+"""Warm headless Chromium pool for tour and JS tests in the script-runner container.
+
+Odoo's ChromeBrowser starts a fresh Chromium for every HttpCase class and
+kills it afterwards. Then the runner pkills whatever is left and wipes the
+/tmp/chrome* profiles. With the pool enabled
+([tool.odoo-test.browser_pool]), the runner installs this file under
+/var/tmp/odoo-browser-pool in the container and puts a `chromium` shim first
+on odoo-bin's PATH. Nothing in Odoo is patched:
+
+- `serve`: the pool daemon. It keeps `size` Chromium instances running with
+  their DevTools endpoint open and leases them over a unix socket. An instance
+  is recycled after `max_uses` leases, when it crashes, or when the process
+  that leased it dies without releasing it.
+- `shim`: what Odoo runs as Chromium. It leases an instance, creates an
+  isolated browser context (own cookies, storage and cache) with one page
+  sized like --window-size, and serves a DevTools proxy on the port Odoo
+  expects. The proxy writes DevToolsActivePort into Odoo's --user-data-dir,
+  shows only the context's targets on /json, and relays websockets to the real
+  browser. When Odoo terminates the "browser", the context is disposed and the
+  instance goes back to the pool. Without a pool, or with none free in time,
+  the shim execs the real Chromium (a cold start, as before). With
+  ODOO_TOUR_TRACE_DIR set, the shim also runs a tools/tour_trace.py tracer on
+  the context, and serves a one-off browser of its own when there is no lease.
+- `ensure`: installs the shims and (re)starts the daemon unless one with the
+  same code and settings is already serving. It prints the pool status as JSON.
+- `install`: installs the shims only (tour tracing without a pool).
+
+The container side uses the standard library only. The pool lives outside /tmp
+and every command line in it contains POOL_MARKER, so container_cleanup
+passes never touch it.
+"""
+
+import argparse
+import base64
+import hashlib
+import http.client
+import json
+import os
+import select
+import shutil
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+POOL_MARKER = "odoo-browser-pool"
+POOL_DIR = f"/var/tmp/{POOL_MARKER}"
+SCRIPT_PATH = f"{POOL_DIR}/browser_pool.py"
+SOCKET_PATH = f"{POOL_DIR}/pool.socket"
+BIN_DIR = f"{POOL_DIR}/bin"
+PROFILES_DIR = f"{POOL_DIR}/profiles"
+LOG_PATH = f"{POOL_DIR}/pool.log"
+SHIM_NAMES = ("chromium", "chromium-browser", "google-chrome", "google-chrome-stable")
+CHROMIUM_CANDIDATES = ("/usr/bin/chromium", "chromium", "chromium-browser", "google-chrome-stable", "google-chrome")
+REQUIRED_FLAGS = ("--headless=new", "--no-sandbox", "--no-first-run", "--no-default-browser-check", "--remote-debugging-port=0")
+DEFAULT_SIZE = 2
+DEFAULT_MAX_USES = 25
+LEASE_TIMEOUT_SECONDS = 30
+LAUNCH_TIMEOUT_SECONDS = 20
+MAINTENANCE_INTERVAL_SECONDS = 1.0
+DEFAULT_TIMEOUT_SECONDS = 60
+CONTAINER_SCRIPTS = ("browser_pool.py", "tour_trace.py")
+# Writes the JSON {name: source} on stdin into the directory given as argument, each file atomically
+INSTALL_SCRIPTS = (
+    "import json, os, sys\n"
+    "os.makedirs(sys.argv[1], exist_ok=True)\n"
+    "for name, source in json.load(sys.stdin).items():\n"
+    "    path = os.path.join(sys.argv[1], name)\n"
+    "    open(path + '.new', 'w').write(source)\n"
+    "    os.replace(path + '.new', path)\n"
+)
+
+
+# DevTools protocol
+
+
+class DevToolsError(RuntimeError):
+    pass
+
+
+class DevToolsSocket:
+    """Minimal client side of a DevTools websocket: request/response calls (events ignored), or
+    raw send/receive for clients that follow events (tour_trace)."""
+
+    def __init__(self, url: str, timeout: float = 10.0) -> None:
+        parsed = urllib.parse.urlparse(url)
+        self.sock = socket.create_connection((parsed.hostname, parsed.port), timeout=timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall(
+            f"GET {parsed.path} HTTP/1.1\r\nHost: {parsed.hostname}:{parsed.port}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise DevToolsError(f"DevTools handshake with {url} failed")
+            response += chunk
+        status_line = response.split(b"\r\n", 1)[0]
+        if b" 101 " not in status_line:
+            raise DevToolsError(f"DevTools handshake with {url} failed: {status_line.decode(errors='replace')}")
+        self._buffer = response.split(b"\r\n\r\n", 1)[1]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise DevToolsError("DevTools connection closed")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([0x80 | len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack(">H", len(payload))
+        else:
+            header += bytes([0x80 | 127]) + struct.pack(">Q", len(payload))
+        mask = os.urandom(4)
+        self.sock.sendall(header + mask + bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload)))
+
+    def _receive_message(self) -> bytes:
+        message = b""
+        while True:
+            first, second = self._read(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", self._read(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", self._read(8))[0]
+            payload = self._read(length)
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                raise DevToolsError("DevTools connection closed")
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return message
+
+    def send(self, method: str, params: dict | None = None, session_id: str | None = None) -> int:
+        """Send a command (to a flattened target session with `session_id`); returns its id."""
+        self._next_id += 1
+        message = {"id": self._next_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        self._send_frame(0x1, json.dumps(message).encode())
+        return self._next_id
+
+    def receive(self, timeout: float | None = None) -> dict | None:
+        """The next message (response or event); None when nothing arrived within `timeout`."""
+        if timeout is not None and not self._buffer and not select.select([self.sock], [], [], timeout)[0]:
+            return None
+        return json.loads(self._receive_message())
+
+    def call(self, method: str, params: dict | None = None) -> dict:
+        with self._lock:
+            request_id = self.send(method, params)
+            while True:
+                message = self.receive()
+                if message.get("id") != request_id:
+                    continue
+                if "error" in message:
+                    raise DevToolsError(f"{method}: {message['error'].get('message', message['error'])}")
+                return message.get("result", {})
+
+    def close(self) -> None:
+        try:
+            self._send_frame(0x8, b"")
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def _devtools_json(port: int, path: str) -> dict | list:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request("GET", path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def find_chromium() -> str:
+    """The real Chromium binary, never one of the shims."""
+    shim_dir = os.path.realpath(BIN_DIR)
+    for candidate in (os.environ.get("CHROMIUM_BIN"), os.environ.get("CHROME_BIN"), *CHROMIUM_CANDIDATES):
+        if not candidate:
+            continue
+        search_path = os.pathsep.join(
+            entry for entry in os.environ.get("PATH", os.defpath).split(os.pathsep) if os.path.realpath(entry) != shim_dir
+        )
+        path = shutil.which(candidate, path=search_path)
+        if path and os.path.dirname(os.path.realpath(path)) != shim_dir:
+            return path
+    raise FileNotFoundError("No Chromium binary found")
+
+
+# Pool daemon
+
+
+class PooledBrowser:
+    def __init__(self, index: int, chromium: str, flags: list[str]) -> None:
+        self.index = index
+        self.chromium = chromium
+        self.flags = flags
+        self.profile = f"{PROFILES_DIR}/{index}"
+        self.process: subprocess.Popen | None = None
+        self.port = 0
+        self.browser_path = ""
+        self.uses = 0
+        self.lessee: int | None = None
+        self.launching = False
+
+    def launch(self) -> None:
+        self.stop()
+        os.makedirs(self.profile, exist_ok=True)
+        self.process = subprocess.Popen(
+            [self.chromium, f"--user-data-dir={self.profile}", *self.flags, "about:blank"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        active_port_file = f"{self.profile}/DevToolsActivePort"
+        deadline = time.monotonic() + LAUNCH_TIMEOUT_SECONDS
+        while time.monotonic() < deadline and self.process.poll() is None:
+            try:
+                with open(active_port_file) as active_port:
+                    port, browser_path = active_port.read().split("\n")[:2]
+                self.port, self.browser_path = int(port), browser_path
+                self.uses = 0
+                return
+            except (OSError, ValueError):
+                time.sleep(0.05)
+        raise RuntimeError(f"Chromium {self.index} did not open its DevTools port")
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return False
+
+
+class BrowserPool:
+    def __init__(self, size: int, max_uses: int, flags: list[str], version: str) -> None:
+        chromium = find_chromium()
+        self.settings = {"size": size, "max_uses": max_uses, "flags": flags, "version": version}
+        self.max_uses = max_uses
+        self.browsers = [PooledBrowser(index, chromium, flags) for index in range(size)]
+        self.condition = threading.Condition()
+        self.stopping = threading.Event()
+        self.stats = {"leases": 0, "recycled": 0, "crashed": 0, "cold_fallbacks": 0}
+
+    def _ready(self, browser: PooledBrowser) -> bool:
+        return browser.lessee is None and not browser.launching and browser.alive()
+
+    def _relaunch(self, browser: PooledBrowser) -> None:
+        with self.condition:
+            if browser.launching:
+                return
+            browser.launching = True
+            browser.lessee = None
+        try:
+            browser.launch()
+        except (OSError, RuntimeError) as e:
+            print(f"browser {browser.index}: {e}", flush=True)
+            browser.stop()
+        with self.condition:
+            browser.launching = False
+            self.condition.notify_all()
+
+    def lease(self, lessee: int, timeout: float) -> dict:
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                browser = next((browser for browser in self.browsers if self._ready(browser)), None)
+                if browser:
+                    browser.lessee = lessee
+                    browser.uses += 1
+                    self.stats["leases"] += 1
+                    return {"index": browser.index, "port": browser.port, "browser_path": browser.browser_path, "uses": browser.uses}
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["cold_fallbacks"] += 1
+                    return {"error": "no browser available"}
+                self.condition.wait(remaining)
+
+    def release(self, index: int, crashed: bool = False) -> None:
+        browser = self.browsers[index]
+        with self.condition:
+            browser.lessee = None
+            recycle = crashed or browser.uses >= self.max_uses
+            if recycle:
+                self.stats["crashed" if crashed else "recycled"] += 1
+            self.condition.notify_all()
+        if recycle:
+            threading.Thread(target=self._relaunch, args=(browser,), daemon=True).start()
+
+    def maintain(self) -> None:
+        while not self.stopping.wait(MAINTENANCE_INTERVAL_SECONDS):
+            for browser in self.browsers:
+                with self.condition:
+                    if browser.launching:
+                        continue
+                    abandoned = browser.lessee is not None and not _pid_alive(browser.lessee)
+                    crashed = not browser.alive()
+                if crashed or abandoned:
+                    self.stats["crashed"] += 1
+                    self._relaunch(browser)
+
+    def status(self) -> dict:
+        with self.condition:
+            return {
+                **self.settings,
+                **self.stats,
+                "browsers": [
+                    {
+                        "index": browser.index,
+                        "pid": browser.process.pid if browser.alive() else None,
+                        "port": browser.port,
+                        "uses": browser.uses,
+                        "leased_by": browser.lessee,
+                        "launching": browser.launching,
+                    }
+                    for browser in self.browsers
+                ],
+            }
+
+    def shutdown(self) -> None:
+        self.stopping.set()
+        for browser in self.browsers:
+            browser.stop()
+
+
+class _PoolRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        pool: BrowserPool = self.server.pool
+        try:
+            request = json.loads(self.rfile.readline())
+            operation = request.get("op")
+            if operation == "lease":
+                reply = pool.lease(int(request["pid"]), float(request.get("timeout", LEASE_TIMEOUT_SECONDS)))
+            elif operation == "release":
+                pool.release(int(request["index"]), bool(request.get("crashed")))
+                reply = {"ok": True}
+            elif operation == "status":
+                reply = pool.status()
+            elif operation == "shutdown":
+                reply = {"ok": True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                reply = {"error": f"unknown op {operation!r}"}
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            reply = {"error": str(e)}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class _PoolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(size: int, max_uses: int, flags: list[str]) -> None:
+    pool = BrowserPool(size, max_uses, flags, source_version())
+    for browser in pool.browsers:
+        pool._relaunch(browser)
+    threading.Thread(target=pool.maintain, daemon=True).start()
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+    server = _PoolServer(SOCKET_PATH, _PoolRequestHandler)
+    server.pool = pool
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"serving {size} browsers on {SOCKET_PATH}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        pool.shutdown()
+        server.server_close()
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+
+
+def pool_request(payload: dict, timeout: float = 5.0) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(SOCKET_PATH)
+        connection.sendall(json.dumps(payload).encode() + b"\n")
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return json.loads(reply)
+
+
+# Shim: what odoo-bin starts as "chromium"
+
+
+class BrowserContextSession:
+    """One isolated browser context (with its first page) in a leased pool browser."""
+
+    def __init__(self, port: int, browser_path: str, window_size: str | None) -> None:
+        self.port = port
+        self.browser = DevToolsSocket(f"ws://127.0.0.1:{port}{browser_path}")
+        self.context_id = self.browser.call("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+        self.window_size = window_size
+        self.new_target("about:blank")
+
+    def new_target(self, url: str) -> dict:
+        params = {"url": url or "about:blank", "browserContextId": self.context_id}
+        if self.window_size and "," in self.window_size:
+            width, height = self.window_size.split(",", 1)
+            params.update(width=int(width), height=int(height))
+        target_id = self.browser.call("Target.createTarget", params)["targetId"]
+        return next((target for target in self.targets(0) if target["id"] == target_id), {"id": target_id})
+
+    def targets(self, proxy_port: int) -> list[dict]:
+        infos = self.browser.call("Target.getTargets")["targetInfos"]
+        return [
+            {
+                "id": info["targetId"],
+                "type": info["type"],
+                "title": info.get("title", ""),
+                "url": info.get("url", ""),
+                "description": "",
+                "devtoolsFrontendUrl": "",
+                "webSocketDebuggerUrl": f"ws://127.0.0.1:{proxy_port}/devtools/page/{info['targetId']}",
+            }
+            for info in infos
+            if info.get("browserContextId") == self.context_id
+        ]
+
+    def dispose(self) -> bool:
+        """Close the context and its pages; False when the browser is gone."""
+        try:
+            self.browser.call("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+            return True
+        except (DevToolsError, OSError):
+            return False
+        finally:
+            self.browser.close()
+
+
+def _relay(source: socket.socket, destination: socket.socket) -> None:
+    try:
+        while chunk := source.recv(65536):
+            destination.sendall(chunk)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, destination):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _DevToolsProxyHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        session: BrowserContextSession = self.server.session
+        head = b""
+        while b"\r\n\r\n" not in head and len(head) < 65536:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            head += chunk
+        method, target, _version = head.split(b"\r\n", 1)[0].decode(errors="replace").split(" ", 2)
+        if b"upgrade: websocket" in head.lower():
+            # Websockets (page and browser sessions) go straight to the real browser
+            upstream = socket.create_connection(("127.0.0.1", session.port))
+            upstream.sendall(head)
+            threading.Thread(target=_relay, args=(upstream, self.request), daemon=True).start()
+            _relay(self.request, upstream)
+            upstream.close()
+            return
+        parsed = urllib.parse.urlparse(target)
+        path = parsed.path.rstrip("/")
+        proxy_port = self.server.server_address[1]
+        status = "200 OK"
+        try:
+            if path in ("/json", "/json/list"):
+                body = session.targets(proxy_port)
+            elif path == "/json/version":
+                body = _devtools_json(session.port, "/json/version")
+                body["webSocketDebuggerUrl"] = body.get("webSocketDebuggerUrl", "").replace(f":{session.port}/", f":{proxy_port}/")
+            elif path == "/json/new":
+                target_info = session.new_target(urllib.parse.unquote(parsed.query))
+                body = next((entry for entry in session.targets(proxy_port) if entry["id"] == target_info["id"]), target_info)
+            elif path.startswith("/json/close/"):
+                session.browser.call("Target.closeTarget", {"targetId": path.rsplit("/", 1)[1]})
+                body = "Target is closing"
+            elif path.startswith("/json/activate/"):
+                session.browser.call("Target.activateTarget", {"targetId": path.rsplit("/", 1)[1]})
+                body = "Target activated"
+            else:
+                status, body = "404 Not Found", f"Unknown DevTools endpoint {method} {path}"
+        except (DevToolsError, OSError, ValueError, KeyError) as e:
+            status, body = "500 Internal Server Error", str(e)
+        payload = (json.dumps(body) if not isinstance(body, str) else body).encode()
+        content_type = "application/json" if not isinstance(body, str) else "text/plain"
+        self.request.sendall(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}; charset=UTF-8\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+            + payload
+        )
+
+
+class _DevToolsProxy(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _flag_value(args: list[str], name: str) -> str | None:
+    for index, arg in enumerate(args):
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+        if arg == name and index + 1 < len(args):
+            return args[index + 1]
+    return None
+
+
+def _one_off_browser(chromium: str, args: list[str]) -> PooledBrowser:
+    """A browser of its own, started like a pooled one from Odoo's flags, for tracing without a pool lease."""
+    flags = [
+        arg for arg in args if arg.startswith("--") and arg.split("=", 1)[0] not in ("--remote-debugging-port", "--user-data-dir")
+    ]
+    browser = PooledBrowser(os.getpid(), chromium, [*flags, "--remote-debugging-port=0"])
+    # Not under POOL_DIR: it belongs to the test run, so cleanup passes may reap it like Odoo's own browsers
+    browser.profile = f"/tmp/chromium-odoo-trace-{os.getpid()}"
+    browser.launch()
+    return browser
+
+
+def run_shim(args: list[str]) -> None:
+    chromium = find_chromium()
+    trace_dir = os.environ.get("ODOO_TOUR_TRACE_DIR")  # tour_trace.TRACE_DIR_ENV
+    if "--version" in args or not (os.path.exists(SOCKET_PATH) or trace_dir):
+        os.execv(chromium, [chromium, *args])
+    lease = {"error": "no pool"}
+    if os.path.exists(SOCKET_PATH):
+        try:
+            lease = pool_request({"op": "lease", "pid": os.getpid(), "timeout": LEASE_TIMEOUT_SECONDS}, LEASE_TIMEOUT_SECONDS + 5)
+        except (OSError, ValueError):
+            lease = {"error": "pool unreachable"}
+    one_off = None
+    if "port" not in lease:
+        if not trace_dir:
+            os.execv(chromium, [chromium, *args])  # Cold start, as without the pool
+        # The tracer needs the proxy in front of the browser: a one-off browser takes the pool's place
+        try:
+            one_off = _one_off_browser(chromium, args)
+        except (OSError, RuntimeError):
+            os.execv(chromium, [chromium, *args])
+        lease = {"port": one_off.port, "browser_path": one_off.browser_path}
+
+    def give_back(crashed: bool) -> None:
+        if one_off:
+            one_off.stop()
+        else:
+            _release(lease["index"], crashed)
+
+    try:
+        session = BrowserContextSession(lease["port"], lease["browser_path"], _flag_value(args, "--window-size"))
+        proxy = _DevToolsProxy(("127.0.0.1", int(_flag_value(args, "--remote-debugging-port") or 0)), _DevToolsProxyHandler)
+    except (DevToolsError, OSError, ValueError, KeyError):
+        give_back(crashed=True)
+        os.execv(chromium, [chromium, *args])
+    tracer = None
+    if trace_dir:
+        try:
+            import tour_trace  # Installed next to this script
+
+            tracer = tour_trace.TourTracer(lease["port"], lease["browser_path"], session.context_id, trace_dir)
+            tracer.start()
+        except (ImportError, DevToolsError, OSError) as e:
+            print(f"tour tracing disabled: {e}", file=sys.stderr)
+    proxy.session = session
+    threading.Thread(target=proxy.serve_forever, daemon=True).start()
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, lambda *_: stop.set())
+    user_data_dir = _flag_value(args, "--user-data-dir")
+    if user_data_dir:
+        os.makedirs(user_data_dir, exist_ok=True)
+        with open(f"{user_data_dir}/DevToolsActivePort", "w") as active_port:
+            active_port.write(f"{proxy.server_address[1]}\n{lease['browser_path']}\n")
+
+    parent = os.getppid()
+    while not stop.wait(1.0) and os.getppid() == parent:
+        pass  # Served until Odoo stops its "browser" (or dies)
+    proxy.shutdown()
+    if tracer:
+        tracer.stop()
+    give_back(crashed=not session.dispose())
+
+
+def _release(index: int, crashed: bool) -> None:
+    try:
+        pool_request({"op": "release", "index": index, "crashed": crashed})
+    except (OSError, ValueError):
+        pass  # The daemon recycles browsers whose lessee is gone
+
+
+# Installation
+
+
+def source_version() -> str:
+    with open(__file__, "rb") as source:
+        return hashlib.sha1(source.read()).hexdigest()[:12]
+
+
+def install() -> None:
+    os.makedirs(BIN_DIR, exist_ok=True)
+    for name in SHIM_NAMES:
+        shim = f"{BIN_DIR}/{name}"
+        with open(shim, "w") as wrapper:
+            wrapper.write(f'#!/bin/sh\nexec {sys.executable} {SCRIPT_PATH} shim "$@"\n')
+        os.chmod(shim, 0o755)
+
+
+def ensure(size: int, max_uses: int, flags: list[str], timeout: float) -> dict:
+    install()
+    wanted = {"size": size, "max_uses": max_uses, "flags": flags, "version": source_version()}
+    try:
+        status = pool_request({"op": "status"})
+        if all(status.get(key) == value for key, value in wanted.items()):
+            return status
+        pool_request({"op": "shutdown"})
+        deadline = time.monotonic() + 10
+        while os.path.exists(SOCKET_PATH) and time.monotonic() < deadline:
+            time.sleep(0.1)
+    except (OSError, ValueError):
+        pass
+
+    with open(LOG_PATH, "a") as log:
+        command = [
+            sys.executable,
+            SCRIPT_PATH,
+            "serve",
+            "--size",
+            str(size),
+            "--max-uses",
+            str(max_uses),
+            "--flags",
+            " ".join(flags),
+        ]
+        subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return pool_request({"op": "status"})  # Only served once the browsers are launched
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.2)
+    return {"error": f"browser pool did not start within {timeout:.0f}s (see {LOG_PATH})"}
+
+
+def pool_flags(extra_flags: str) -> list[str]:
+    flags = list(REQUIRED_FLAGS)
+    for flag in extra_flags.split():
+        if flag.split("=", 1)[0] not in {required.split("=", 1)[0] for required in REQUIRED_FLAGS} | {"--user-data-dir"}:
+            flags.append(flag)
+    return flags
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Warm headless Chromium pool for Odoo tour tests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ("serve", "ensure"):
+        subparser = subparsers.add_parser(command)
+        subparser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+        subparser.add_argument("--max-uses", type=int, default=DEFAULT_MAX_USES)
+        subparser.add_argument("--flags", default=os.environ.get("CHROMIUM_FLAGS", ""), help="Extra Chromium flags")
+        subparser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS)
+    subparsers.add_parser("install")
+    subparsers.add_parser("status")
+    subparsers.add_parser("shutdown")
+    # `shim` gets arbitrary Chromium flags: no argparse for them
+    if sys.argv[1:2] == ["shim"]:
+        run_shim(sys.argv[2:])
+        return
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.size, args.max_uses, pool_flags(args.flags))
+    elif args.command == "ensure":
+        json.dump(ensure(args.size, args.max_uses, pool_flags(args.flags), args.timeout), sys.stdout)
+    elif args.command == "install":
+        install()
+        json.dump({"installed": BIN_DIR}, sys.stdout)
+    else:
+        try:
+            json.dump(pool_request({"op": args.command}), sys.stdout)
+        except (OSError, ValueError) as e:
+            json.dump({"error": str(e)}, sys.stdout)
+
+
+# Host side
+
+
+def ensure_browser_pool(
+    container_name: str,
+    size: int = DEFAULT_SIZE,
+    max_uses: int = DEFAULT_MAX_USES,
+    flags: str = "",
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> dict:
+    """Install this script in `container_name` and make sure its pool daemon is serving.
+
+    Returns the pool status; failures are reported under "error" instead of raised.
+    """
+    command = ["ensure", "--size", str(size), "--max-uses", str(max_uses), "--flags", flags, "--timeout", str(timeout)]
+    return _run_in_container(container_name, command, timeout + 30)
+
+
+def install_browser_shims(container_name: str) -> dict:
+    """Install the scripts and the Chromium shims in `container_name` without starting a pool daemon
+    (enough for tour tracing); failures are reported under "error"."""
+    return _run_in_container(container_name, ["install"], 30)
+
+
+def _run_in_container(container_name: str, command: list[str], timeout: float) -> dict:
+    # This script and tour_trace.py (imported by the shim) are installed side by side
+    scripts = {}
+    for name in CONTAINER_SCRIPTS:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), encoding="utf-8") as source:
+            scripts[name] = source.read()
+    copy = ["docker", "exec", "-i", container_name, "python3", "-c", INSTALL_SCRIPTS, POOL_DIR]
+    try:
+        installed = subprocess.run(copy, input=json.dumps(scripts), capture_output=True, text=True, timeout=30)
+        if installed.returncode != 0:
+            return {"error": installed.stderr.strip() or f"install exited with {installed.returncode}"}
+        result = subprocess.run(
+            ["docker", "exec", container_name, "python3", SCRIPT_PATH, *command], capture_output=True, text=True, timeout=timeout
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        return {"error": str(e)}
+    if result.returncode != 0:
+        return {"error": result.stderr.strip() or f"browser pool exited with {result.returncode}"}
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return {"error": f"unreadable browser pool status: {result.stdout[:200]}"}
+
+
+def summarize_browser_pool(status: dict) -> str:
+    if "error" in status:
+        return f"browser pool unavailable: {status['error']}"
+    ready = sum(1 for browser in status.get("browsers", []) if browser["pid"])
+    return f"{ready}/{status.get('size', 0)} warm Chromium instances ({status.get('leases', 0)} leases, {status.get('cold_fallbacks', 0)} cold starts)"
+
+
+def with_browser_pool(command: list[str]) -> list[str]:
+    """Wrap a command run in the container so it finds the pool's Chromium shim first on PATH."""
+    return ["sh", "-c", f'PATH={BIN_DIR}:$PATH exec "$@"', "odoo-test", *command]
+
+
+if __name__ == "__main__":
+    main()
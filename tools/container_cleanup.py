@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""One-shot cleanup of test leftovers inside the script-runner container.
+
+Replaces dozens of sequential `docker exec pkill/find/ipcrm` calls, each with
+its own timeout, and the fixed sleeps between them. The runner pipes this file
+into a single `docker exec -i <container> python3 -` (see run_container_cleanup).
+It then:
+
+- sends SIGTERM to every process whose command line matches one of the
+  patterns (pkill -f semantics), waits until they have actually exited, and
+  sends SIGKILL only to the ones still alive after the grace period. The warm
+  browser pool (tools/browser_pool.py) and its children are never signalled;
+- optionally removes System V shared memory segments and semaphores;
+- optionally removes Odoo/Chromium temporary files, sockets, locks and
+  profiles under /tmp.
+
+It prints one JSON report of what was killed and removed. It uses the standard
+library only, because it runs with the container's python3.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+ODOO_PROCESS_PATTERNS = ("odoo-bin.*test-enable", "python.*odoo-bin", "timeout.*odoo-bin")
+BROWSER_PROCESS_PATTERNS = ("chromium", "chrome", "chrome_crashpad", "chromedriver")
+# Everything a stopped or finished test run can leave behind
+TEST_PROCESS_PATTERNS = ("odoo-bin.*test", "python.*odoo", "timeout.*odoo", "chromium", "chrome")
+KEEP_MARKER = "odoo-browser-pool"  # browser_pool.POOL_MARKER; this script must stay self-contained
+TEMP_ROOT = "/tmp"
+TEMP_FILE_PATTERNS = ("openerp-*", "odoo-*", ".odoo_*", "*.lock", "*.pid", "core.*")
+TEMP_DIR_PATTERNS = ("chrome*", "chromium*")
+POLL_INITIAL_SECONDS = 0.02
+POLL_MAX_SECONDS = 0.2
+DEFAULT_GRACE_SECONDS = 5.0
+DEFAULT_TIMEOUT_SECONDS = 60
+
+
+# Container side
+
+
+def _protected_pids() -> set[int]:
+    # This script and its ancestors (the docker exec shell) must survive their own patterns
+    protected, pid = set(), os.getpid()
+    while pid > 1:
+        protected.add(pid)
+        pid = _parent_pid(pid)
+    return protected
+
+
+def _cmdline(pid: int) -> str | None:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as cmdline:
+            return cmdline.read().replace(b"\0", b" ").decode(errors="replace").strip() or None
+    except OSError:
+        return None
+
+
+def _is_running(pid: int) -> bool:
+    # Zombies are gone as far as cleanup is concerned; only their parent can reap them
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return False
+
+
+def _parent_pid(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return int(stat.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def find_processes(patterns: list[str]) -> dict[int, str]:
+    regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    protected = _protected_pids()
+    cmdlines = {int(entry): _cmdline(int(entry)) for entry in os.listdir("/proc") if entry.isdigit()}
+    # The warm browser pool (tools/browser_pool.py) and its Chromium children manage their own lifecycle
+    kept = {pid for pid, cmdline in cmdlines.items() if cmdline and KEEP_MARKER in cmdline}
+    parents = {pid: _parent_pid(pid) for pid in cmdlines}
+
+    def is_kept(pid: int) -> bool:
+        while pid > 1:
+            if pid in kept:
+                return True
+            pid = parents.get(pid, 0)
+        return False
+
+    return {
+        pid: cmdline
+        for pid, cmdline in cmdlines.items()
+        if cmdline and pid not in protected and regex.search(cmdline) and not is_kept(pid)
+    }
+
+
+def _wait_for_exit(pids: set[int], timeout: float) -> set[int]:
+    """Poll until every pid has exited; returns the ones still running at the deadline."""
+    deadline = time.monotonic() + timeout
+    delay = POLL_INITIAL_SECONDS
+    alive = {pid for pid in pids if _is_running(pid)}
+    while alive and time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_SECONDS)
+        alive = {pid for pid in alive if _is_running(pid)}
+    return alive
+
+
+def _signal(pids: set[int], signum: int) -> None:
+    for pid in pids:
+        try:
+            os.kill(pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def terminate_processes(patterns: list[str], grace: float) -> dict:
+    processes = find_processes(patterns)
+    pids = set(processes)
+    _signal(pids, signal.SIGTERM)
+    stubborn = _wait_for_exit(pids, grace)
+    _signal(stubborn, signal.SIGKILL)
+    survivors = _wait_for_exit(stubborn, 2.0)
+    return {
+        "terminated": [{"pid": pid, "cmdline": processes[pid]} for pid in sorted(pids - stubborn)],
+        "killed": [{"pid": pid, "cmdline": processes[pid]} for pid in sorted(stubborn - survivors)],
+        "survivors": [{"pid": pid, "cmdline": processes[pid]} for pid in sorted(survivors)],
+    }
+
+
+def remove_ipc_objects() -> dict:
+    removed = {"shm": 0, "sem": 0}
+    for kind, flag in (("shm", "-m"), ("sem", "-s")):
+        try:
+            with open(f"/proc/sysvipc/{kind}") as table:
+                ids = [line.split()[1] for line in table.readlines()[1:] if line.split()]
+        except OSError:
+            continue
+        for ipc_id in ids:
+            if subprocess.run(["ipcrm", flag, ipc_id], capture_output=True).returncode == 0:
+                removed[kind] += 1
+    return removed
+
+
+def remove_temp_files(root: str = TEMP_ROOT) -> dict:
+    removed_files, removed_dirs = [], []
+    for directory, dirnames, filenames in os.walk(root, topdown=True):
+        for dirname in list(dirnames):
+            if any(fnmatch.fnmatch(dirname, pattern) for pattern in TEMP_DIR_PATTERNS):
+                path = os.path.join(directory, dirname)
+                shutil.rmtree(path, ignore_errors=True)
+                removed_dirs.append(path)
+                dirnames.remove(dirname)
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                is_socket = filename.endswith(".sock") and not os.path.isfile(path) and not os.path.islink(path)
+                if is_socket or any(fnmatch.fnmatch(filename, pattern) for pattern in TEMP_FILE_PATTERNS):
+                    os.unlink(path)
+                    removed_files.append(path)
+            except OSError:
+                continue
+    return {"removed_files": removed_files, "removed_dirs": removed_dirs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Clean up test processes and leftovers in this container")
+    parser.add_argument("--pattern", action="append", default=[], help="Terminate processes matching this regex (repeatable)")
+    parser.add_argument("--grace", type=float, default=DEFAULT_GRACE_SECONDS, help="Seconds to wait after SIGTERM")
+    parser.add_argument("--ipc", action="store_true", help="Remove System V shared memory segments and semaphores")
+    parser.add_argument("--temp-files", action="store_true", help=f"Remove Odoo/Chromium leftovers under {TEMP_ROOT}")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    report: dict = {}
+    if args.pattern:
+        report.update(terminate_processes(args.pattern, args.grace))
+    if args.ipc:
+        report["ipc_removed"] = remove_ipc_objects()
+    if args.temp_files:
+        report.update(remove_temp_files())
+    report["elapsed"] = round(time.monotonic() - started, 3)
+    json.dump(report, sys.stdout)
+
+
+# Host side
+
+
+def run_container_cleanup(
+    container_name: str,
+    patterns: tuple[str, ...] | list[str] = (),
+    ipc: bool = False,
+    temp_files: bool = False,
+    grace: float = DEFAULT_GRACE_SECONDS,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> dict:
+    """Run this script in `container_name` with one docker exec and return its report.
+
+    Failures (container down, timeout) are reported under "error" instead of raised.
+    """
+    cmd = ["docker", "exec", "-i", container_name, "python3", "-", "--grace", str(grace)]
+    for pattern in patterns:
+        cmd += ["--pattern", pattern]
+    if ipc:
+        cmd.append("--ipc")
+    if temp_files:
+        cmd.append("--temp-files")
+    with open(__file__, encoding="utf-8") as source:
+        script = source.read()
+    try:
+        result = subprocess.run(cmd, input=script, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        return {"error": str(e)}
+    if result.returncode != 0:
+        return {"error": result.stderr.strip() or f"cleanup exited with {result.returncode}"}
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return {"error": f"unreadable cleanup report: {result.stdout[:200]}"}
+
+
+def summarize_cleanup(report: dict) -> str:
+    if "error" in report:
+        return f"cleanup failed: {report['error']}"
+    parts = []
+    stopped = len(report.get("terminated", [])) + len(report.get("killed", []))
+    if "terminated" in report:
+        parts.append(f"{stopped} process(es) stopped ({len(report.get('killed', []))} needed SIGKILL)")
+    if report.get("survivors"):
+        parts.append(f"{len(report['survivors'])} survived")
+    if "ipc_removed" in report:
+        parts.append(f"{sum(report['ipc_removed'].values())} IPC object(s) removed")
+    if "removed_files" in report:
+        parts.append(f"{len(report['removed_files']) + len(report['removed_dirs'])} temp path(s) removed")
+    return f"{', '.join(parts) or 'nothing to do'} in {report.get('elapsed', 0):.1f}s"
+
+
+if __name__ == "__main__":
+    main()
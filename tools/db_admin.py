@@ -0,0 +1,269 @@
+"""Postgres administration for the test tooling: terminate, drop, clone, exists, count.
+
+Replaces forking `docker exec <db> psql -c ...` for every statement. All
+statements go through one shared, lazily opened psycopg connection to the
+`postgres` maintenance database (autocommit, since CREATE/DROP DATABASE cannot
+run in a transaction). Waiting for connections to go away polls
+`pg_stat_activity` instead of sleeping for a fixed time.
+
+The server is reached as published by the database service (PGHOST/PGPORT,
+default localhost:5432) with ODOO_DB_USER/ODOO_DB_PASSWORD. When psycopg is not
+installed or the server is not reachable from the host, statements fall back
+to `docker exec ... psql` in the database container, so behaviour is the same
+either way, only slower.
+"""
+
+import os
+import subprocess
+import threading
+import time
+
+try:
+    import psycopg
+except ImportError:  # optional: without it every statement goes through docker exec psql
+    psycopg = None
+
+MAINTENANCE_DB = "postgres"
+CONNECT_TIMEOUT_SECONDS = 5
+TERMINATE_TIMEOUT_SECONDS = 10.0
+POLL_INITIAL_SECONDS = 0.02
+POLL_MAX_SECONDS = 0.25
+CLONE_ATTEMPTS = 5  # CREATE ... TEMPLATE fails while anything is connected to the source
+SOURCE_IN_USE_MESSAGE = "is being accessed by other users"
+CLONE_STRATEGIES = ("file_copy", "wal_log")  # CREATE DATABASE ... STRATEGY, PostgreSQL 15+
+
+
+class DatabaseAdminError(RuntimeError):
+    pass
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class DatabaseAdmin:
+    """Maintenance operations on the Postgres server; safe to share between threads."""
+
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        user: str | None = None,
+        password: str | None = None,
+        db_container: str | None = None,
+    ) -> None:
+        self.host = host or os.environ.get("PGHOST", "localhost")
+        self.port = port or int(os.environ.get("PGPORT", "5432"))
+        self.user = user or os.environ.get("ODOO_DB_USER", "odoo")
+        self.password = password if password is not None else os.environ.get("ODOO_DB_PASSWORD")
+        container_prefix = os.environ.get("ODOO_CONTAINER_PREFIX", "odoo-opw")
+        self.db_container = db_container or f"{container_prefix}-database-1"
+        self._connection = None
+        self._use_psql = psycopg is None
+        self._server_version: int | None = None
+        self._lock = threading.RLock()
+
+    # Statement execution
+
+    def _connect(self) -> object | None:
+        if self._use_psql:
+            return None
+        if self._connection is not None and not self._connection.closed:
+            return self._connection
+        try:
+            self._connection = psycopg.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                dbname=MAINTENANCE_DB,
+                autocommit=True,
+                connect_timeout=CONNECT_TIMEOUT_SECONDS,
+                application_name="odoo-test-admin",
+            )
+        except psycopg.OperationalError:
+            # Not published to the host (or wrong credentials) - keep working through the container
+            self._use_psql = True
+            self._connection = None
+        return self._connection
+
+    def execute(self, sql: str) -> list[tuple]:
+        """Run one statement on the maintenance database and return its rows (empty for commands)."""
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return self._execute_psql(sql)
+            try:
+                cursor = connection.execute(sql)
+                return cursor.fetchall() if cursor.description else []
+            except psycopg.OperationalError as e:
+                if connection.closed:
+                    # Server restarted or dropped us - reconnect once and retry
+                    self._connection = None
+                    return self.execute(sql)
+                raise DatabaseAdminError(str(e).strip()) from e
+            except psycopg.Error as e:
+                raise DatabaseAdminError(str(e).strip()) from e
+
+    def query(self, database: str, sql: str, port: int | None = None) -> list[tuple]:
+        """Run one statement in another database over a short-lived connection.
+
+        `port` selects another server in the database container, such as a snapshot clone
+        (CloneBackend.db_port). Those are not published to the host, so they are always reached through psql.
+        """
+        if port and port != self.port:
+            return self._execute_psql(sql, database, port)
+        with self._lock:
+            use_psql = self._connect() is None
+        if use_psql:
+            return self._execute_psql(sql, database)
+        try:
+            with psycopg.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                dbname=database,
+                autocommit=True,
+                connect_timeout=CONNECT_TIMEOUT_SECONDS,
+                application_name="odoo-test-admin",
+            ) as connection:
+                cursor = connection.execute(sql)
+                return cursor.fetchall() if cursor.description else []
+        except psycopg.Error as e:
+            raise DatabaseAdminError(str(e).strip()) from e
+
+    def _execute_psql(self, sql: str, database: str = MAINTENANCE_DB, port: int | None = None) -> list[tuple]:
+        cmd = ["docker", "exec"]
+        if self.password:
+            cmd += ["-e", f"PGPASSWORD={self.password}"]
+        cmd += [self.db_container, "psql", "-U", self.user, "-d", database, "-t", "-A", "-F", "\t", "-v", "ON_ERROR_STOP=1"]
+        if port:
+            cmd += ["-p", str(port)]
+        cmd += ["-c", sql]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        if result.returncode != 0:
+            raise DatabaseAdminError(result.stderr.strip() or f"psql exited with {result.returncode}")
+        return [tuple(line.split("\t")) for line in result.stdout.splitlines() if line]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    @property
+    def server_version(self) -> int:
+        if self._server_version is None:
+            self._server_version = int(self.execute("SHOW server_version_num")[0][0])
+        return self._server_version
+
+    # Queries
+
+    def exists(self, db_name: str) -> bool:
+        return bool(self.execute(f"SELECT 1 FROM pg_database WHERE datname = {quote_literal(db_name)}"))
+
+    def count_connections(self, db_name: str) -> int:
+        rows = self.execute(
+            f"SELECT count(*) FROM pg_stat_activity WHERE datname = {quote_literal(db_name)} AND pid <> pg_backend_pid()"
+        )
+        return int(rows[0][0])
+
+    def list_databases(self, like: str) -> list[str]:
+        """Database names matching a LIKE pattern (escape literal underscores as \\_)."""
+        return [
+            row[0] for row in self.execute(f"SELECT datname FROM pg_database WHERE datname LIKE {quote_literal(like)} ORDER BY 1")
+        ]
+
+    # Operations
+
+    def wait_for_no_connections(self, db_name: str, timeout: float = TERMINATE_TIMEOUT_SECONDS) -> bool:
+        """Poll pg_stat_activity until nothing is connected to `db_name`; False on timeout."""
+        deadline = time.monotonic() + timeout
+        delay = POLL_INITIAL_SECONDS
+        while self.count_connections(db_name):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_SECONDS)
+        return True
+
+    def terminate(self, db_name: str, timeout: float = TERMINATE_TIMEOUT_SECONDS) -> bool:
+        """Terminate every backend connected to `db_name` and wait until they are gone."""
+        terminated = self.execute(
+            f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            f"WHERE datname = {quote_literal(db_name)} AND pid <> pg_backend_pid()"
+        )
+        return not terminated or self.wait_for_no_connections(db_name, timeout)
+
+    def drop(self, db_name: str) -> None:
+        if not db_name or db_name == MAINTENANCE_DB:
+            return
+        if self.server_version >= 130000:
+            # FORCE terminates remaining connections server-side in the same statement
+            self.execute(f"DROP DATABASE IF EXISTS {quote_identifier(db_name)} WITH (FORCE)")
+        else:
+            self.terminate(db_name)
+            self.execute(f"DROP DATABASE IF EXISTS {quote_identifier(db_name)}")
+
+    def create(self, db_name: str, template: str | None = None, options: str = "", strategy: str | None = None) -> None:
+        """CREATE DATABASE, optionally from a template; `strategy` (file_copy/wal_log) needs PG15+."""
+        statement = f"CREATE DATABASE {quote_identifier(db_name)}"
+        if template:
+            statement += f" WITH TEMPLATE {quote_identifier(template)}"
+        if strategy:
+            if strategy.lower() not in CLONE_STRATEGIES:
+                raise DatabaseAdminError(f"Unknown clone strategy {strategy!r} (expected one of {', '.join(CLONE_STRATEGIES)})")
+            if self.server_version < 150000:
+                raise DatabaseAdminError(f"STRATEGY {strategy} needs PostgreSQL 15+ (server is {self.server_version})")
+            statement += f" STRATEGY {strategy.upper()}"
+        if options:
+            statement += f" {options}"
+        self.execute(statement)
+
+    def clone(self, source_db: str, target_db: str, strategy: str | None = None) -> None:
+        """Replace `target_db` with a copy of `source_db` (CREATE DATABASE ... TEMPLATE)."""
+        self.drop(target_db)
+        for attempt in range(CLONE_ATTEMPTS):
+            self.terminate(source_db)
+            try:
+                self.create(target_db, template=source_db, strategy=strategy)
+                return
+            except DatabaseAdminError as e:
+                # A client (e.g. the web service) reconnected between terminate and create
+                if SOURCE_IN_USE_MESSAGE not in str(e) or attempt == CLONE_ATTEMPTS - 1:
+                    raise
+
+    def rename(self, db_name: str, new_name: str) -> None:
+        self.terminate(db_name)
+        self.execute(f"ALTER DATABASE {quote_identifier(db_name)} RENAME TO {quote_identifier(new_name)}")
+
+    def set_comment(self, db_name: str, comment: str) -> None:
+        self.execute(f"COMMENT ON DATABASE {quote_identifier(db_name)} IS {quote_literal(comment)}")
+
+    def comments(self, like: str) -> dict[str, str | None]:
+        """Database comments (COMMENT ON DATABASE) for names matching a LIKE pattern."""
+        rows = self.execute(
+            f"SELECT datname, shobj_description(oid, 'pg_database') FROM pg_database WHERE datname LIKE {quote_literal(like)}"
+        )
+        return {name: comment or None for name, comment in rows}
+
+    def set_template(self, db_name: str, is_template: bool) -> None:
+        self.execute(f"ALTER DATABASE {quote_identifier(db_name)} WITH IS_TEMPLATE {'true' if is_template else 'false'}")
+
+
+_shared_admin: DatabaseAdmin | None = None
+_shared_admin_lock = threading.Lock()
+
+
+def get_db_admin() -> DatabaseAdmin:
+    """The process-wide admin instance, so every caller shares one maintenance connection."""
+    global _shared_admin
+    with _shared_admin_lock:
+        if _shared_admin is None:
+            _shared_admin = DatabaseAdmin()
+        return _shared_admin
@@ -0,0 +1,268 @@
+"""Pluggable backends for cloning the production database for integration/tour runs.
+
+Configured in [tool.odoo-test.clone]:
+
+- "template" (default): CREATE DATABASE ... WITH TEMPLATE on the main server,
+  optionally with STRATEGY FILE_COPY (one file copy plus a checkpoint, usually
+  much faster for multi-GB databases) or WAL_LOG on PostgreSQL 15+.
+- "snapshot": keeps a stopped copy of the whole cluster's data directory
+  (taken with pg_basebackup, refreshed when older than `snapshot_max_age_hours`)
+  and clones it with `cp --reflink=always`, which is near-instant on btrfs/XFS
+  regardless of size. Each clone runs as its own throwaway postgres instance on
+  its own port inside the database container; the runner passes that port to
+  odoo-bin. Sources that are not in the snapshot (e.g. the unit test database),
+  or a filesystem without reflink support, fall back to the template backend.
+  Every clone records the runner that owns it; clones whose runner is gone
+  (crashed or killed before dropping them) are stopped and removed by
+  sweep_orphans(), on the backend's first clone and from test cleanup.
+"""
+
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from tools.db_admin import DatabaseAdmin, DatabaseAdminError, quote_identifier
+
+DEFAULT_SNAPSHOT_DIR = "/var/lib/postgresql/snapshots"
+DEFAULT_SNAPSHOT_MAX_AGE_HOURS = 24
+DEFAULT_SNAPSHOT_BASE_PORT = 55432
+SNAPSHOT_MARKER = ".snapshot_created"
+CLONE_OWNER_FILE = ".clone_owner"  # "<hostname> <pid>" of the runner that created the clone
+CLONE_START_TIMEOUT_SECONDS = 120
+CLONE_PORT_ATTEMPTS = 5
+# Throwaway clones never need to survive a crash
+CLONE_SERVER_OPTIONS = "-c listen_addresses='*' -c fsync=off -c full_page_writes=off -c synchronous_commit=off"
+
+
+class CloneBackend(ABC):
+    """Creates and drops the database clones test runs work on."""
+
+    name: str
+
+    @abstractmethod
+    def clone(self, source_db: str, target_db: str) -> None: ...
+
+    @abstractmethod
+    def drop(self, db_name: str) -> None: ...
+
+    def db_port(self, db_name: str) -> int | None:
+        """Port odoo-bin must use for `db_name`, or None for the main server."""
+        return None
+
+
+class TemplateCloneBackend(CloneBackend):
+    name = "template"
+
+    def __init__(self, admin: DatabaseAdmin, strategy: str | None = None) -> None:
+        self.admin = admin
+        self.strategy = strategy or None
+
+    def clone(self, source_db: str, target_db: str) -> None:
+        self.admin.clone(source_db, target_db, strategy=self.strategy)
+
+    def drop(self, db_name: str) -> None:
+        self.admin.drop(db_name)
+
+
+@dataclass
+class SnapshotClone:
+    data_dir: str
+    port: int
+
+
+def _owner_is_alive(owner: str) -> bool:
+    """Whether the runner recorded in a clone's owner file ("<hostname> <pid>") is still running here."""
+    try:
+        hostname, pid = owner.split()
+        if hostname != socket.gethostname():
+            return False
+        os.kill(int(pid), 0)
+    except PermissionError:
+        return True
+    except (ValueError, ProcessLookupError, OverflowError):
+        return False
+    return True
+
+
+class SnapshotCloneBackend(TemplateCloneBackend):
+    name = "snapshot"
+
+    def __init__(
+        self,
+        admin: DatabaseAdmin,
+        strategy: str | None = None,
+        snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+        max_age_hours: float = DEFAULT_SNAPSHOT_MAX_AGE_HOURS,
+        base_port: int = DEFAULT_SNAPSHOT_BASE_PORT,
+    ) -> None:
+        super().__init__(admin, strategy)
+        self.snapshot_dir = snapshot_dir.rstrip("/")
+        self.golden_dir = f"{self.snapshot_dir}/golden"
+        self.max_age_seconds = max_age_hours * 3600
+        self.base_port = base_port
+        self.clones: dict[str, SnapshotClone] = {}
+        self.reflink_supported = True
+        self._snapshot_databases: set[str] | None = None
+        self._swept = False
+        self._lock = threading.Lock()  # shard workers clone concurrently
+
+    def _exec(self, script: str, timeout: int = 3600, user: str = "postgres") -> subprocess.CompletedProcess:
+        cmd = ["docker", "exec", "-u", user]
+        if self.admin.password:
+            cmd += ["-e", f"PGPASSWORD={self.admin.password}"]
+        cmd += [self.admin.db_container, "sh", "-c", script]
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+    def _snapshot_age(self) -> float | None:
+        result = self._exec(f"cat {shlex.quote(f'{self.golden_dir}/{SNAPSHOT_MARKER}')}")
+        try:
+            return time.time() - float(result.stdout.strip())
+        except ValueError:
+            return None
+
+    def _ensure_snapshot(self) -> None:
+        age = self._snapshot_age()
+        if age is not None and age < self.max_age_seconds:
+            return
+        # pg_basebackup gives a consistent copy of the running cluster without stopping it;
+        # it is published under the final name only once complete
+        building = shlex.quote(f"{self.golden_dir}.building")
+        golden = shlex.quote(self.golden_dir)
+        snapshot_dir = shlex.quote(self.snapshot_dir)
+        # A fresh volume is owned by root
+        self._exec(f"mkdir -p {snapshot_dir}/clones && chown postgres:postgres {snapshot_dir} {snapshot_dir}/clones", user="root")
+        result = self._exec(
+            f"rm -rf {building} && "
+            f"pg_basebackup -U {shlex.quote(self.admin.user)} -D {building} -X stream -c fast && "
+            f"date +%s > {building}/{SNAPSHOT_MARKER} && rm -rf {golden} && mv {building} {golden}"
+        )
+        if result.returncode != 0:
+            raise DatabaseAdminError(f"Snapshot of the database cluster failed: {result.stderr.strip()}")
+        self._snapshot_databases = None
+
+    def _serves(self, source_db: str) -> bool:
+        # Test databases change between runs, so only long-lived sources (production) come from the snapshot
+        if not self.reflink_supported or "_test" in source_db:
+            return False
+        if self._snapshot_databases is None:
+            self._snapshot_databases = {row[0] for row in self.admin.execute("SELECT datname FROM pg_database")}
+        return source_db in self._snapshot_databases
+
+    def clone(self, source_db: str, target_db: str) -> None:
+        with self._lock:
+            if not self._serves(source_db):
+                super().clone(source_db, target_db)
+                return
+            if not self._swept:
+                self._sweep_orphans()
+                self._swept = True
+            self._drop_clone(target_db)
+            self._ensure_snapshot()
+            data_dir = f"{self.snapshot_dir}/clones/{target_db}"
+            # Copied under a hidden name, so a sweep never sees a clone before its owner is recorded
+            copying = shlex.quote(f"{self.snapshot_dir}/clones/.{target_db}.copying")
+            owner = shlex.quote(f"{socket.gethostname()} {os.getpid()}")
+            result = self._exec(
+                f"rm -rf {shlex.quote(data_dir)} {copying} && cp -a --reflink=always {shlex.quote(self.golden_dir)} {copying} && "
+                f"echo {owner} > {copying}/{CLONE_OWNER_FILE} && mv {copying} {shlex.quote(data_dir)}"
+            )
+            if result.returncode != 0:
+                # Without reflinks this would be a full copy - the template backend is faster then
+                self.reflink_supported = False
+                self._exec(f"rm -rf {shlex.quote(data_dir)} {copying}")
+                super().clone(source_db, target_db)
+                return
+            port = self._start_clone(data_dir)
+            clone = self.clones[target_db] = SnapshotClone(data_dir, port)
+        # A leftover copy on the main server would shadow nothing, but wastes space
+        self.admin.drop(target_db)
+        rename = f"ALTER DATABASE {quote_identifier(source_db)} RENAME TO {quote_identifier(target_db)}"
+        result = self._exec(
+            f"psql -p {clone.port} -U {shlex.quote(self.admin.user)} -d postgres -v ON_ERROR_STOP=1 -c {shlex.quote(rename)}"
+        )
+        if result.returncode != 0:
+            self.drop(target_db)
+            raise DatabaseAdminError(f"Failed to prepare snapshot clone {target_db}: {result.stderr.strip()}")
+
+    def _start_clone(self, data_dir: str) -> int:
+        """Start a postgres instance on the clone; returns its port."""
+        used_ports = {clone.port for clone in self.clones.values()}
+        candidate_ports = [port for port in range(self.base_port, self.base_port + 64) if port not in used_ports]
+        error = "no free port"
+        for port in candidate_ports[:CLONE_PORT_ATTEMPTS]:
+            # Another runner's clone may already hold the port - try the next one
+            options = shlex.quote(f"-p {port} {CLONE_SERVER_OPTIONS}")
+            result = self._exec(
+                f"pg_ctl -D {shlex.quote(data_dir)} -l {shlex.quote(f'{data_dir}/clone.log')} -o {options} "
+                f"-w -t {CLONE_START_TIMEOUT_SECONDS} start",
+                timeout=CLONE_START_TIMEOUT_SECONDS + 30,
+            )
+            if result.returncode == 0:
+                return port
+            error = result.stderr.strip() or result.stdout.strip()
+        self._exec(f"rm -rf {shlex.quote(data_dir)}")
+        raise DatabaseAdminError(f"Snapshot clone server failed to start: {error}")
+
+    def _drop_clone(self, db_name: str) -> bool:
+        clone = self.clones.pop(db_name, None)
+        if clone is None:
+            return False
+        data_dir = shlex.quote(clone.data_dir)
+        self._exec(f"pg_ctl -D {data_dir} -m immediate -w stop; rm -rf {data_dir}", timeout=120)
+        return True
+
+    def drop(self, db_name: str) -> None:
+        with self._lock:
+            if self._drop_clone(db_name):
+                return
+        super().drop(db_name)
+
+    def sweep_orphans(self) -> list[str]:
+        """Stop and remove every clone whose runner is gone; returns their data dirs."""
+        with self._lock:
+            return self._sweep_orphans()
+
+    def _sweep_orphans(self) -> list[str]:
+        clones_dir = shlex.quote(f"{self.snapshot_dir}/clones")
+        listing = self._exec(
+            f'for dir in {clones_dir}/*/; do [ -d "$dir" ] && printf \'%s\\t%s\\n\' "${{dir%/}}" '
+            f'"$(cat "$dir{CLONE_OWNER_FILE}" 2>/dev/null)"; done',
+            timeout=60,
+        )
+        own_dirs = {clone.data_dir for clone in self.clones.values()}
+        orphans = []
+        for line in listing.stdout.splitlines():
+            data_dir, _, owner = line.partition("\t")
+            if data_dir and data_dir not in own_dirs and not _owner_is_alive(owner):
+                orphans.append(data_dir)
+        for data_dir in orphans:
+            quoted = shlex.quote(data_dir)
+            # Not running (or already half removed) is fine; the data dir goes either way
+            self._exec(f"pg_ctl -D {quoted} -m immediate -w stop; rm -rf {quoted}", timeout=120)
+        return orphans
+
+    def db_port(self, db_name: str) -> int | None:
+        clone = self.clones.get(db_name)
+        return clone.port if clone else None
+
+
+def create_clone_backend(config: dict, admin: DatabaseAdmin) -> CloneBackend:
+    """Build the backend configured in [tool.odoo-test.clone]."""
+    backend = config.get("backend", "template")
+    strategy = config.get("strategy") or None
+    if backend == "snapshot":
+        return SnapshotCloneBackend(
+            admin,
+            strategy,
+            snapshot_dir=config.get("snapshot_dir", DEFAULT_SNAPSHOT_DIR),
+            max_age_hours=float(config.get("snapshot_max_age_hours", DEFAULT_SNAPSHOT_MAX_AGE_HOURS)),
+            base_port=int(config.get("snapshot_base_port", DEFAULT_SNAPSHOT_BASE_PORT)),
+        )
+    if backend != "template":
+        raise ValueError(f"Unknown clone backend {backend!r} in [tool.odoo-test.clone] (expected 'template' or 'snapshot')")
+    return TemplateCloneBackend(admin, strategy)
@@ -0,0 +1,214 @@
+"""Warm pool of pre-cloned production databases for integration and tour runs.
+
+Keeps `size` ready clones named `<source>_pool_<n>`. Each ready clone
+carries a COMMENT ON DATABASE with the source marker and creation time it was
+cloned at. Leasing renames a ready clone to the name the caller wants, which
+takes milliseconds and is atomic, so concurrent runners can never lease the same
+clone. Released databases are renamed to `<source>_pool_trash_<n>` and dropped
+later. The pool only ever drops names of its own namespace (is_pool_database),
+so test databases of running workers are never touched.
+
+Dropping trash and re-cloning missing or stale clones happens in a detached
+`python -m tools.db_pool refill` process, started after every lease and release.
+Clone latency is therefore off the critical path of the next run. A clone is
+stale when the source marker changes (the source database was recreated or
+restored, or a module was installed or upgraded) or it is older than
+`max_age_hours`.
+
+Configured in [tool.odoo-test.pool].
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from tools.db_admin import DatabaseAdmin, DatabaseAdminError, get_db_admin, quote_identifier, quote_literal
+
+POOL_LOCK_PATH = Path("tmp/tests/db_pool.lock")
+POOL_LOG_PATH = Path("tmp/tests/db_pool.log")
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_AGE_HOURS = 24
+
+
+def source_marker(admin: DatabaseAdmin, source_db: str) -> str:
+    """Changes when the source is recreated/restored (new OID) or modules are installed/upgraded."""
+    oid = admin.execute(f"SELECT oid FROM pg_database WHERE datname = {quote_literal(source_db)}")
+    if not oid:
+        raise DatabaseAdminError(f"Source database {source_db} does not exist")
+    modules = admin.query(source_db, "SELECT max(write_date) FROM ir_module_module")
+    return f"{oid[0][0]}:{modules[0][0] if modules else ''}"
+
+
+class DatabasePool:
+    def __init__(
+        self,
+        admin: DatabaseAdmin,
+        source_db: str,
+        size: int = DEFAULT_POOL_SIZE,
+        max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+        strategy: str | None = None,
+    ) -> None:
+        self.admin = admin
+        self.source_db = source_db
+        self.size = size
+        self.max_age_seconds = max_age_hours * 3600
+        self.strategy = strategy
+        self.prefix = f"{source_db}_pool_"
+        self.ready_pattern = re.compile(rf"{re.escape(self.prefix)}(\d+)")
+        self.leased: set[str] = set()  # databases this process leased (and should release)
+
+    def is_pool_database(self, db_name: str) -> bool:
+        """Ready, building and trashed clones, which generic test-database cleanup must leave to the pool."""
+        if self.ready_pattern.fullmatch(db_name):
+            return True
+        return db_name.startswith((f"{self.prefix}building_", f"{self.prefix}trash_"))
+
+    def source_marker(self) -> str:
+        return source_marker(self.admin, self.source_db)
+
+    def _pool_databases(self) -> dict[str, dict | None]:
+        databases = {}
+        for name, comment in self.admin.comments(self.prefix.replace("_", "\\_") + "%").items():
+            try:
+                databases[name] = json.loads(comment) if comment else None
+            except ValueError:
+                databases[name] = None
+        return databases
+
+    def _is_fresh(self, info: dict | None, marker: str) -> bool:
+        return bool(info) and info.get("marker") == marker and time.time() - info.get("created", 0) < self.max_age_seconds
+
+    def lease(self, target_db: str) -> bool:
+        """Rename a fresh ready clone to `target_db`; False when none is available."""
+        marker = self.source_marker()
+        for name, info in sorted(self._pool_databases().items()):
+            if not self.ready_pattern.fullmatch(name) or not self._is_fresh(info, marker):
+                continue
+            self.admin.drop(target_db)
+            try:
+                self.admin.execute(f"ALTER DATABASE {quote_identifier(name)} RENAME TO {quote_identifier(target_db)}")
+            except DatabaseAdminError:
+                continue  # leased by another runner in the meantime
+            self.admin.execute(f"COMMENT ON DATABASE {quote_identifier(target_db)} IS NULL")
+            self.leased.add(target_db)
+            return True
+        return False
+
+    def release(self, db_name: str) -> bool:
+        """Hand a leased database back for dropping in the background; False if it was not leased here."""
+        if db_name not in self.leased:
+            return False
+        self.leased.discard(db_name)
+        self.admin.terminate(db_name)
+        trash_name = f"{self.prefix}trash_{time.time_ns()}"
+        try:
+            self.admin.execute(f"ALTER DATABASE {quote_identifier(db_name)} RENAME TO {quote_identifier(trash_name)}")
+        except DatabaseAdminError:
+            self.admin.drop(db_name)
+            return True
+        self.spawn_refill()
+        return True
+
+    def refill(self) -> None:
+        """Drop trash and stale clones, then clone until `size` fresh clones are ready."""
+        marker = self.source_marker()
+        databases = self._pool_databases()
+        ready_indexes = set()
+        for name, info in databases.items():
+            if not self.is_pool_database(name):
+                continue  # Only matched by the LIKE prefix
+            match = self.ready_pattern.fullmatch(name)
+            if match and self._is_fresh(info, marker):
+                ready_indexes.add(int(match.group(1)))
+            else:
+                print(f"Dropping {name}", flush=True)
+                self.admin.drop(name)
+
+        index = 0
+        while len(ready_indexes) < self.size:
+            index += 1
+            if index in ready_indexes:
+                continue
+            name = f"{self.prefix}{index}"
+            # Cloned under a temporary name so a half-built clone is never leased
+            building_name = f"{self.prefix}building_{index}"
+            print(f"Cloning {self.source_db} → {name}", flush=True)
+            started = time.monotonic()
+            self.admin.clone(self.source_db, building_name, strategy=self.strategy)
+            self.admin.set_comment(building_name, json.dumps({"marker": marker, "created": time.time()}))
+            self.admin.execute(f"ALTER DATABASE {quote_identifier(building_name)} RENAME TO {quote_identifier(name)}")
+            ready_indexes.add(index)
+            print(f"Ready {name} in {time.monotonic() - started:.1f}s", flush=True)
+
+    def spawn_refill(self) -> None:
+        """Start a detached refill process (a running one makes it exit immediately)."""
+        POOL_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(POOL_LOG_PATH, "a") as log:
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "tools.db_pool",
+                    "refill",
+                    "--source",
+                    self.source_db,
+                    "--size",
+                    str(self.size),
+                    "--max-age-hours",
+                    str(self.max_age_seconds / 3600),
+                    *(["--strategy", self.strategy] if self.strategy else []),
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+                cwd=os.getcwd(),
+            )
+
+
+def create_db_pool(config: dict, admin: DatabaseAdmin, source_db: str, strategy: str | None = None) -> DatabasePool | None:
+    """The pool configured in [tool.odoo-test.pool], or None when disabled."""
+    if not config.get("enabled", False):
+        return None
+    return DatabasePool(
+        admin,
+        source_db,
+        size=max(1, int(config.get("size", DEFAULT_POOL_SIZE))),
+        max_age_hours=float(config.get("max_age_hours", DEFAULT_MAX_AGE_HOURS)),
+        strategy=strategy,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the warm pool of pre-cloned integration databases")
+    parser.add_argument("command", choices=["refill"])
+    parser.add_argument("--source", required=True, help="Source (production) database")
+    parser.add_argument("--size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_HOURS)
+    parser.add_argument("--strategy", default=None, help="CREATE DATABASE STRATEGY (PostgreSQL 15+)")
+    args = parser.parse_args()
+
+    POOL_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(POOL_LOCK_PATH, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return  # another refill is already running; it re-reads the pool state
+        pool = DatabasePool(get_db_admin(), args.source, args.size, args.max_age_hours, args.strategy)
+        try:
+            # Leases and releases that happen while refilling are picked up by a second pass
+            for _ in range(2):
+                pool.refill()
+        except DatabaseAdminError as e:
+            print(f"Pool refill failed: {e}", flush=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Reuse of cloned integration databases across runs while they stay unchanged.
+
+Odoo tests run inside transactions or savepoints that are rolled back, so a
+clean run leaves the clone's data as it found it. A test that commits (for
+example through a new cursor or an explicit cr.commit()) pollutes it.
+
+The fingerprint relies on one property of the per-table statistics:
+`pg_stat_user_tables.n_mod_since_analyze` only counts rows inserted, updated or
+deleted by committed transactions. A rolled-back transaction generates no change
+events. ANALYZE resets the counter, so the analyze counts are part of the
+fingerprint too. The fingerprint is taken before and after each run. It is
+unchanged exactly when nothing was committed, which is cheap to check no matter
+how large the database is.
+
+A clean clone is marked with a COMMENT ON DATABASE holding the fingerprint and
+the source marker (see db_pool.source_marker). The next run reuses it instead
+of re-cloning while both still match. Anything else (a polluted run, a changed
+production database, reset statistics) means a fresh clone.
+
+Enabled with `reuse = true` in [tool.odoo-test.clone] (or --reuse-db).
+"""
+
+import hashlib
+import json
+
+from tools.db_admin import DatabaseAdmin, DatabaseAdminError
+from tools.db_pool import source_marker
+
+# Module bookkeeping that every odoo-bin -i/-u start rewrites (update_list); not test pollution
+BOOKKEEPING_TABLES = frozenset(
+    {
+        "public.ir_module_module",
+        "public.ir_module_module_dependency",
+        "public.ir_module_module_exclusion",
+        "public.ir_module_category",
+    }
+)
+
+
+class DatabaseReuse:
+    def __init__(self, admin: DatabaseAdmin, source_db: str) -> None:
+        self.admin = admin
+        self.source_db = source_db
+
+    def fingerprint(self, db_name: str) -> dict[str, tuple[int, int]]:
+        """Per-table (committed modifications since analyze, analyze count)."""
+        rows = self.admin.query(
+            db_name,
+            "SELECT schemaname || '.' || relname, n_mod_since_analyze, analyze_count + autoanalyze_count FROM pg_stat_user_tables",
+        )
+        return {
+            table: (int(modifications), int(analyzes)) for table, modifications, analyzes in rows if table not in BOOKKEEPING_TABLES
+        }
+
+    @staticmethod
+    def digest(fingerprint: dict[str, tuple[int, int]]) -> str:
+        return hashlib.sha1(json.dumps(sorted(fingerprint.items())).encode()).hexdigest()
+
+    @staticmethod
+    def drifted_tables(before: dict[str, tuple[int, int]], after: dict[str, tuple[int, int]]) -> list[str]:
+        """Tables with committed changes (or created/dropped) between two fingerprints."""
+        return sorted(table for table in before.keys() | after.keys() if before.get(table) != after.get(table))
+
+    def mark_clean(self, db_name: str, fingerprint: dict[str, tuple[int, int]]) -> None:
+        marker = source_marker(self.admin, self.source_db)
+        self.admin.set_comment(db_name, json.dumps({"reuse": {"source_marker": marker, "fingerprint": self.digest(fingerprint)}}))
+
+    def reusable(self, db_name: str) -> bool:
+        """Whether `db_name` was marked clean and neither it nor the source changed since."""
+        try:
+            comment = self.admin.comments(db_name.replace("_", "\\_")).get(db_name)
+            info = json.loads(comment).get("reuse") if comment else None
+            if not isinstance(info, dict):
+                return False
+            if info.get("source_marker") != source_marker(self.admin, self.source_db):
+                return False
+            return info.get("fingerprint") == self.digest(self.fingerprint(db_name))
+        except (DatabaseAdminError, ValueError, AttributeError):
+            return False
@@ -0,0 +1,326 @@
+"""Thin Docker Engine API client over the local unix socket, plus a cached compose config.
+
+Container state checks, inspect, start and short execs are single HTTP round
+trips on one keep-alive connection. Before, each one spawned `docker ps`,
+`docker inspect` or `docker exec`. Only what the test tooling needs is
+implemented. When the socket is not reachable (remote DOCKER_HOST, rootless
+setups with another path, no permission), DockerUnavailable is raised and
+callers fall back to the docker CLI.
+
+`docker compose config --format json` is parsed once per process, and cached
+under tmp/tests/ keyed by the compose files, .env and the environment
+variables they reference. Repeated lookups of the production database or the
+script-runner service cost nothing.
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import re
+import socket
+import struct
+import subprocess
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+from pathlib import Path
+
+DEFAULT_SOCKET_PATH = "/var/run/docker.sock"
+API_TIMEOUT_SECONDS = 30
+EXEC_TIMEOUT_SECONDS = 600
+COMPOSE_CONFIG_CACHE_PATH = Path("tmp/tests/compose_services.json")
+LEGACY_COMPOSE_CONFIG_CACHE_PATH = Path("tmp/tests/compose_config.json")  # The full config, secrets included
+# The only environment the tooling reads; everything else (passwords, tokens, build args) is never cached
+COMPOSE_ENVIRONMENT_KEYS = ("ODOO_DB", "CHROMIUM_FLAGS")
+COMPOSE_FILES = ("compose.yaml", "compose.yml", "docker-compose.yml", "docker-compose.yaml", "docker-compose.override.yml")
+ENV_REFERENCE_PATTERN = re.compile(r"\$\{?([A-Za-z_][A-Za-z0-9_]*)")
+
+
+class DockerUnavailable(RuntimeError):
+    pass
+
+
+class DockerAPIError(RuntimeError):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+@dataclass
+class ExecResult:
+    exit_code: int
+    stdout: str
+    stderr: str
+
+
+def _socket_path() -> str | None:
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host.removeprefix("unix://")
+    if docker_host:
+        return None  # tcp/ssh hosts are left to the CLI
+    return DEFAULT_SOCKET_PATH
+
+
+def _demultiplex(payload: bytes) -> tuple[str, str]:
+    """Split a non-TTY attach/exec stream (8-byte frame headers) into stdout and stderr."""
+    streams = {1: bytearray(), 2: bytearray()}
+    offset = 0
+    while offset + 8 <= len(payload):
+        stream, length = struct.unpack(">BxxxL", payload[offset : offset + 8])
+        streams.get(stream, streams[1]).extend(payload[offset + 8 : offset + 8 + length])
+        offset += 8 + length
+    return streams[1].decode(errors="replace"), streams[2].decode(errors="replace")
+
+
+class DockerClient:
+    """Keep-alive connection to the Docker daemon; safe to share between threads."""
+
+    def __init__(self, socket_path: str | None = None, timeout: float = API_TIMEOUT_SECONDS) -> None:
+        self.socket_path = socket_path or _socket_path()
+        self.timeout = timeout
+        self._connection: _UnixHTTPConnection | None = None
+        self._lock = threading.Lock()
+
+    def _request(
+        self, method: str, path: str, body: dict | None = None, query: dict | None = None, timeout: float | None = None
+    ) -> tuple[int, bytes]:
+        if not self.socket_path or not os.path.exists(self.socket_path):
+            raise DockerUnavailable(f"Docker socket not found: {self.socket_path or os.environ.get('DOCKER_HOST')}")
+        if query:
+            path += "?" + urllib.parse.urlencode(query)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        with self._lock:
+            for attempt in range(2):
+                if self._connection is None:
+                    self._connection = _UnixHTTPConnection(self.socket_path, self.timeout)
+                self._connection.timeout = timeout or self.timeout
+                try:
+                    self._connection.request(method, path, body=payload, headers=headers)
+                    response = self._connection.getresponse()
+                    data = response.read()
+                except (ConnectionError, http.client.HTTPException) as e:
+                    # The daemon closed the idle keep-alive connection - reconnect once
+                    self._close()
+                    if attempt:
+                        raise DockerUnavailable(f"Docker API request failed: {e}") from e
+                    continue
+                except TimeoutError as e:
+                    self._close()
+                    raise subprocess.TimeoutExpired(f"{method} {path}", timeout or self.timeout) from e
+                except OSError as e:
+                    self._close()
+                    raise DockerUnavailable(f"Docker API request failed: {e}") from e
+                if response.will_close:
+                    self._close()
+                return response.status, data
+        raise DockerUnavailable("Docker API request failed")
+
+    def _json(
+        self, method: str, path: str, body: dict | None = None, query: dict | None = None, ok: tuple[int, ...] = (200,)
+    ) -> object:
+        status, data = self._request(method, path, body, query)
+        if status not in ok:
+            message = data.decode(errors="replace")
+            try:
+                message = json.loads(message).get("message", message)
+            except (ValueError, AttributeError):
+                pass
+            raise DockerAPIError(status, message)
+        return json.loads(data) if data else None
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    # Containers
+
+    def inspect_container(self, name: str) -> dict | None:
+        """`docker inspect` for one container, or None when it does not exist."""
+        try:
+            return self._json("GET", f"/containers/{urllib.parse.quote(name)}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def is_running(self, name: str) -> bool:
+        container = self.inspect_container(name)
+        return bool(container and container.get("State", {}).get("Running"))
+
+    def list_containers(self, name: str | None = None, running_only: bool = True) -> list[dict]:
+        filters = {"name": [name]} if name else {}
+        query = {"filters": json.dumps(filters), "all": "0" if running_only else "1"}
+        return self._json("GET", "/containers/json", query=query)
+
+    def start_container(self, name: str) -> bool:
+        """Start an existing container (already running counts as success); False if it does not exist."""
+        try:
+            self._json("POST", f"/containers/{urllib.parse.quote(name)}/start", ok=(204, 304))
+            return True
+        except DockerAPIError as e:
+            if e.status == 404:
+                return False
+            raise
+
+    def exec_run(
+        self,
+        container: str,
+        cmd: list[str],
+        user: str | None = None,
+        env: dict[str, str] | None = None,
+        timeout: float = EXEC_TIMEOUT_SECONDS,
+    ) -> ExecResult:
+        """Run a command in a container to completion (like `docker exec` without -it)."""
+        config = {"Cmd": cmd, "AttachStdout": True, "AttachStderr": True, "Tty": False}
+        if user:
+            config["User"] = user
+        if env:
+            config["Env"] = [f"{key}={value}" for key, value in env.items()]
+        exec_id = self._json("POST", f"/containers/{urllib.parse.quote(container)}/exec", body=config, ok=(201,))["Id"]
+        status, data = self._request("POST", f"/exec/{exec_id}/start", body={"Detach": False, "Tty": False}, timeout=timeout)
+        if status != 200:
+            raise DockerAPIError(status, data.decode(errors="replace"))
+        stdout, stderr = _demultiplex(data)
+        exit_code = self._json("GET", f"/exec/{exec_id}/json").get("ExitCode")
+        return ExecResult(exit_code if exit_code is not None else -1, stdout, stderr)
+
+
+_shared_client: DockerClient | None = None
+_shared_client_lock = threading.Lock()
+
+
+def get_docker_client() -> DockerClient:
+    """The process-wide client, so every caller shares one keep-alive connection."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = DockerClient()
+        return _shared_client
+
+
+def container_exec(
+    container: str, cmd: list[str], user: str | None = None, timeout: float = EXEC_TIMEOUT_SECONDS
+) -> subprocess.CompletedProcess:
+    """`docker exec` through the API, falling back to the CLI; returns a CompletedProcess either way
+    (exit code 125 for daemon errors, like the CLI) and raises subprocess.TimeoutExpired on timeout."""
+    try:
+        result = get_docker_client().exec_run(container, cmd, user=user, timeout=timeout)
+        return subprocess.CompletedProcess(cmd, result.exit_code, result.stdout, result.stderr)
+    except DockerAPIError as e:
+        return subprocess.CompletedProcess(cmd, 125, "", str(e))
+    except DockerUnavailable:
+        docker_cmd = ["docker", "exec"] + (["-u", user] if user else []) + [container] + cmd
+        return subprocess.run(docker_cmd, capture_output=True, text=True, timeout=timeout)
+
+
+# Compose config
+
+
+@dataclass
+class ComposeConfig:
+    name: str = ""
+    services: dict[str, dict] = field(default_factory=dict)
+
+    def find_service(self, *keywords: str) -> str | None:
+        """First service whose name contains every keyword (case-insensitive)."""
+        for service in self.services:
+            if all(keyword in service.lower() for keyword in keywords):
+                return service
+        return None
+
+    def service_environment(self, service: str) -> dict[str, str]:
+        env = self.services.get(service, {}).get("environment", {})
+        if isinstance(env, list):
+            return dict(item.split("=", 1) if "=" in item else (item, "") for item in env)
+        return {key: "" if value is None else str(value) for key, value in (env or {}).items()}
+
+
+def _compose_cache_key() -> str:
+    digest = hashlib.sha1()
+    files = [Path(name) for name in os.environ.get("COMPOSE_FILE", "").split(os.pathsep) if name] or [
+        Path(name) for name in COMPOSE_FILES
+    ]
+    referenced: set[str] = {"COMPOSE_FILE", "COMPOSE_PROFILES", "COMPOSE_PROJECT_NAME"}
+    for path in [*files, Path(".env")]:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+        referenced |= set(ENV_REFERENCE_PATTERN.findall(path.read_text(errors="ignore")))
+    for name in sorted(referenced):
+        digest.update(f"{name}={os.environ.get(name, '')}\n".encode())
+    return digest.hexdigest()
+
+
+def _compose_services(raw: dict) -> dict[str, dict]:
+    """Service names with only COMPOSE_ENVIRONMENT_KEYS of their environment."""
+    services = {}
+    for service, definition in (raw.get("services") or {}).items():
+        environment = ComposeConfig(services={service: definition}).service_environment(service)
+        services[service] = {"environment": {key: environment[key] for key in COMPOSE_ENVIRONMENT_KEYS if key in environment}}
+    return services
+
+
+def _write_private(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as cache_file:
+        cache_file.write(text)
+    os.chmod(path, 0o600)
+
+
+_compose_config: ComposeConfig | None = None
+_compose_config_lock = threading.Lock()
+
+
+def load_compose_config(cache_path: Path = COMPOSE_CONFIG_CACHE_PATH) -> ComposeConfig:
+    """Service names and the environment keys the tooling reads; empty when `docker compose config` fails.
+
+    Only that subset is cached on disk (mode 600), never the full resolved config with its secrets.
+    """
+    global _compose_config
+    with _compose_config_lock:
+        if _compose_config is not None:
+            return _compose_config
+        key = _compose_cache_key()
+        try:
+            cached = json.loads(cache_path.read_text())
+            config = cached["config"] if cached.get("key") == key else None
+        except (OSError, ValueError, KeyError, AttributeError):
+            config = None
+        if config is None:
+            try:
+                result = subprocess.run(["docker", "compose", "config", "--format", "json"], capture_output=True, text=True)
+                raw = json.loads(result.stdout) if result.returncode == 0 else None
+            except (OSError, ValueError):
+                raw = None
+            if raw is None:
+                return ComposeConfig()  # not cached: the next call may succeed
+            config = {"name": raw.get("name", ""), "services": _compose_services(raw)}
+            try:
+                _write_private(cache_path, json.dumps({"key": key, "config": config}))
+                LEGACY_COMPOSE_CONFIG_CACHE_PATH.unlink(missing_ok=True)
+            except OSError:
+                pass
+        _compose_config = ComposeConfig(name=config.get("name", ""), services=config.get("services", {}))
+        return _compose_config
@@ -0,0 +1,74 @@
+"""Copy-on-write filestores for test databases cloned from production.
+
+A test clone still references the production attachments, so it needs their
+files. It must not be able to write into the production filestore, though,
+or concurrent clones would contaminate production and each other. The modes
+in [tool.odoo-test.filestore] are:
+
+- "hardlink" (default): a hard-link farm (`cp -al`) of the source filestore.
+  Creating it costs one link per file, never a byte of file data. Odoo
+  filestores are content-addressed and write-once: new attachments go to new
+  files, and garbage collection only unlinks. So writes and deletes stay in
+  the clone's own directory tree. The farm lives on the data volume, so every
+  container sees it.
+- "overlay": an overlayfs mount with the source filestore as the read-only
+  lower layer and a per-clone upper layer under /volumes/data/filestore_overlays.
+  It is O(1) to set up, but needs mount privileges in the container and is only
+  visible inside that container. It falls back to "hardlink" when the mount
+  fails.
+- "symlink": the previous behaviour, a symlink to the source filestore (shared,
+  writable).
+"""
+
+import shlex
+
+FILESTORE_ROOT = "/volumes/data/filestore"
+OVERLAY_ROOT = "/volumes/data/filestore_overlays"
+FILESTORE_MODES = ("hardlink", "overlay", "symlink")
+
+
+def filestore_path(db_name: str) -> str:
+    return f"{FILESTORE_ROOT}/{db_name}"
+
+
+def _cleanup_commands(test_db: str) -> str:
+    target = shlex.quote(filestore_path(test_db))
+    overlay = shlex.quote(f"{OVERLAY_ROOT}/{test_db}")
+    return f"if grep -qs ' '{target}' ' /proc/mounts; then umount {target} || umount -l {target}; fi; rm -rf {target} {overlay}"
+
+
+def provision_filestore_script(test_db: str, source_db: str, mode: str = "hardlink") -> str:
+    """Shell script (run as root in the Odoo container) giving `test_db` its own view of the
+    `source_db` filestore. It prints the mode actually used."""
+    if mode not in FILESTORE_MODES:
+        raise ValueError(f"Unknown filestore mode {mode!r} (expected one of {', '.join(FILESTORE_MODES)})")
+    if test_db == source_db:
+        raise ValueError(f"Refusing to replace the filestore of {source_db} with a copy of itself")
+    target = shlex.quote(filestore_path(test_db))
+    source = shlex.quote(filestore_path(source_db))
+    upper = shlex.quote(f"{OVERLAY_ROOT}/{test_db}/upper")
+    work = shlex.quote(f"{OVERLAY_ROOT}/{test_db}/work")
+    lines = [
+        _cleanup_commands(test_db),
+        # A source without attachments yet: start the clone empty
+        f'if [ ! -d {source} ]; then mkdir -p {target} && chown "$(stat -c %u:%g {FILESTORE_ROOT})" {target} && echo empty && exit 0; fi',
+    ]
+    if mode == "symlink":
+        lines.append(f"ln -s {source} {target} && echo symlink && exit 0")
+    if mode == "overlay":
+        lines.append(
+            f'mkdir -p {upper} {work} {target} && chown "$(stat -c %u:%g {source})" {upper} {target} && '
+            f"mount -t overlay overlay -o lowerdir={source},upperdir={upper},workdir={work} {target} 2>/dev/null "
+            f"&& echo overlay && exit 0"
+        )
+        lines.append(_cleanup_commands(test_db))
+    # As root, cp -a keeps the ownership of the directories it creates
+    lines.append(f"cp -al {source} {target} && echo hardlink")
+    return "\n".join(lines)
+
+
+def cleanup_filestore_script(test_db: str) -> str:
+    """Shell script (run as root) removing the filestore of a test database, whatever its mode."""
+    if "_test" not in test_db:
+        raise ValueError(f"Refusing to remove the filestore of non-test database {test_db}")
+    return _cleanup_commands(test_db)
@@ -0,0 +1,171 @@
+"""Single-pass classification of Odoo test log lines.
+
+OutputManager used to loop over ~20 compiled patterns per line, for two pattern
+tables. Every pattern now declares the literals it cannot match without, and all
+literals are compiled into one trie-shaped prefilter that rejects the vast
+majority of lines with a single scan. For the remaining lines, the patterns of a
+table whose literals occur are compiled into one alternation of look-ahead
+branches (one named group per pattern, tried in table order, cached per
+combination), so the first pattern that matches anywhere in the line wins,
+exactly like the old `for ... in patterns.items(): if search: break` loop.
+"""
+
+import re
+from typing import NamedTuple
+
+
+class LogPattern(NamedTuple):
+    name: str
+    regex: str
+    literals: tuple[str, ...]  # at least one of these occurs in every line the regex matches
+
+
+class Classification(NamedTuple):
+    name: str
+    value: str | None  # first capturing group of the matching pattern, if it has one
+
+
+TEST_STARTED_PATTERN = re.compile(r"Starting ([\w\.]+(?:test_\w+|Test\w+))")
+
+PROGRESS_PATTERNS = (
+    LogPattern("test_start", r"(Starting|Running test|Testing) (.+)", ("Starting ", "Running test ", "Testing ")),
+    LogPattern("test_class_start", r"Starting (Test\w+)", ("Starting Test",)),
+    LogPattern("test_method_start", r"Starting .*\.(test_\w+)", ("Starting ",)),
+    LogPattern("test_complete", r"(PASS|FAIL|ERROR|OK|FAILED): (.+)", ("PASS: ", "FAIL: ", "ERROR: ", "OK: ", "FAILED: ")),
+    LogPattern("test_ok", r"test_\w+.*\.\.\. ok", ("... ok",)),
+    LogPattern("test_failed", r"test_\w+.*\.\.\. FAIL", ("... FAIL",)),
+    LogPattern("test_error", r"test_\w+.*\.\.\. ERROR", ("... ERROR",)),
+    LogPattern(
+        "phase_change",
+        r"(Loading|Installing|Testing|Finalizing|Initializing)",
+        ("Loading", "Installing", "Testing", "Finalizing", "Initializing"),
+    ),
+    LogPattern("module_loading", r"odoo: modules loaded", ("odoo: modules loaded",)),
+    LogPattern("registry_ready", r"registry loaded in", ("registry loaded in",)),
+    LogPattern("tour_start", r"Starting tour: (.+)", ("Starting tour: ",)),
+    LogPattern(
+        "browser_error",
+        r"(Console error:|Browser error:|JavaScript error:|UncaughtPromiseError|OwlError)",
+        ("Console error:", "Browser error:", "JavaScript error:", "UncaughtPromiseError", "OwlError"),
+    ),
+    LogPattern("js_test_start", r"Starting (ProductConnectJSTests|.*HttpCase|.*test_hoot)", ("Starting ",)),
+    LogPattern("hoot_test", r"\[HOOT]", ("[HOOT]",)),
+)
+
+CRITICAL_ERROR_PATTERNS = (
+    LogPattern(
+        "db_constraint",
+        r"(violates check constraint|IntegrityError|bad query:|psycopg2\..*Error)",
+        ("violates check constraint", "IntegrityError", "bad query:", "psycopg2."),
+    ),
+    LogPattern(
+        "module_error",
+        r"(Failed to load registry|Failed to initialize database|TypeError: Model|AttributeError:.*models)",
+        ("Failed to load registry", "Failed to initialize database", "TypeError: Model", "AttributeError:"),
+    ),
+    LogPattern("critical_exception", r"(CRITICAL|FATAL|OperationalError:)", ("CRITICAL", "FATAL", "OperationalError:")),
+    LogPattern(
+        "port_conflict",
+        r"(Address already in use|Port.*is in use|bind.*failed|Cannot bind)",
+        ("Address already in use", "Port", "bind"),
+    ),
+    LogPattern(
+        "access_error",
+        r"(odoo\.exceptions\.AccessError|AccessError:|You are not allowed to)",
+        ("AccessError", "You are not allowed to"),
+    ),
+    LogPattern(
+        "validation_error",
+        r"(odoo\.exceptions\.ValidationError|ValidationError:|UserError:)",
+        ("ValidationError", "UserError:"),
+    ),
+    LogPattern(
+        "missing_dependency",
+        r"(ModuleNotFoundError:|ImportError:.*No module named|unmet dependencies)",
+        ("ModuleNotFoundError:", "ImportError:", "unmet dependencies"),
+    ),
+    LogPattern(
+        "test_discovery",
+        r"(No tests? found|0 tests? collected|ImportError.*test_)",
+        ("No test", "0 test", "ImportError"),
+    ),
+)
+
+
+def _literal_prefilter(patterns: tuple[LogPattern, ...]) -> re.Pattern[str]:
+    # Literals are compiled as a character trie: sre tries each start position against
+    # one branch per distinct leading character instead of every literal in turn.
+    trie: dict[str, dict] = {}
+    for pattern in patterns:
+        for literal in pattern.literals:
+            node = trie
+            for character in literal:
+                node = node.setdefault(character, {})
+            node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        if "" in node:
+            return ""  # a shorter literal already guarantees a candidate line
+        branches = [re.escape(character) + build(child) for character, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return re.compile(build(trie))
+
+
+class PatternClassifier:
+    def __init__(self, patterns: tuple[LogPattern, ...]) -> None:
+        self.patterns = patterns
+        self._group_counts = [re.compile(pattern.regex).groups for pattern in patterns]
+        self._literal_positions = [(literal, position) for position, pattern in enumerate(patterns) for literal in pattern.literals]
+        self._alternations: dict[tuple[int, ...], tuple[re.Pattern[str], dict[str, tuple[str, int | None]]]] = {}
+
+    def _alternation(self, positions: tuple[int, ...]) -> tuple[re.Pattern[str], dict[str, tuple[str, int | None]]]:
+        # One alternation per combination of candidate patterns; real logs only produce a handful
+        cached = self._alternations.get(positions)
+        if cached:
+            return cached
+        branches = []
+        branch_values: dict[str, tuple[str, int | None]] = {}
+        group_index = 0
+        for position in positions:
+            pattern = self.patterns[position]
+            group_count = self._group_counts[position]
+            branch_name = f"p{position}"
+            branches.append(f"(?=(?s:.*?)(?P<{branch_name}>{pattern.regex}))")
+            branch_values[branch_name] = (pattern.name, group_index + 2 if group_count else None)
+            group_index += 1 + group_count
+        # Alternation is tried left to right at position 0: the first branch (in table
+        # order) whose look-ahead finds its pattern anywhere in the line wins.
+        cached = self._alternations[positions] = (re.compile("|".join(branches)), branch_values)
+        return cached
+
+    def classify(self, line: str) -> Classification | None:
+        # Only patterns whose required literals occur can match; keep them in table order
+        positions = tuple(sorted({position for literal, position in self._literal_positions if literal in line}))
+        if not positions:
+            return None
+        combined, branch_values = self._alternation(positions)
+        match = combined.match(line)
+        if not match:
+            return None
+        name, value_group = branch_values[match.lastgroup]
+        return Classification(name, match.group(value_group) if value_group else None)
+
+
+class LogClassifier:
+    """Classifies a line against the progress and critical-error tables with one shared prefilter scan."""
+
+    def __init__(
+        self,
+        progress_patterns: tuple[LogPattern, ...] = PROGRESS_PATTERNS,
+        critical_patterns: tuple[LogPattern, ...] = CRITICAL_ERROR_PATTERNS,
+    ) -> None:
+        self.progress = PatternClassifier(progress_patterns)
+        self.critical = PatternClassifier(critical_patterns)
+        self._prefilter = _literal_prefilter(progress_patterns + critical_patterns)
+
+    def classify(self, line: str) -> tuple[Classification | None, Classification | None]:
+        # Most lines (INFO chatter, werkzeug, tracebacks) carry none of the literals
+        if not self._prefilter.search(line):
+            return None, None
+        return self.progress.classify(line), self.critical.classify(line)
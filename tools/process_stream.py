@@ -0,0 +1,213 @@
+"""Asyncio engine that streams the output of one or many child processes.
+
+Replaces the `select` + `readline()` loop of the test runner: output is read in
+non-blocking chunks and split into lines here (so a partial line never blocks
+the reader), every process gets its own timeout and idle/stall hooks, and any
+number of processes can be watched concurrently on a single event loop.
+"""
+
+import asyncio
+import codecs
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 1024 * 1024  # longer partial lines are emitted in pieces
+TERMINATE_GRACE_SECONDS = 5
+KILL_GRACE_SECONDS = 2
+EXIT_WAIT_SECONDS = 10  # after end of output, how long the process may take to exit
+DRAIN_SECONDS = 10  # how long to keep reading after the process itself exited
+DRAIN_IDLE_SECONDS = 0.1
+EXIT_POLL_SECONDS = 0.05
+
+
+@dataclass
+class WatchedProcess:
+    """A command to run plus the hooks called while it streams.
+
+    Hooks run on the event loop thread. `on_idle` and `check_stop` return a
+    stop reason (any string) to terminate the process, or None to keep going.
+    """
+
+    name: str
+    command: list[str]
+    on_line: Callable[[str], None]
+    timeout: float
+    on_notice: Callable[[str], None] = print
+    idle_interval: Callable[[], float] = lambda: 3.0
+    on_idle: Callable[[float], str | None] | None = None  # receives seconds since the last output
+    check_stop: Callable[[], str | None] | None = None  # polled after every line and idle period
+
+
+@dataclass
+class ProcessOutcome:
+    name: str
+    returncode: int
+    elapsed: float
+    stop_reason: str | None = None  # None when the process exited by itself; "timeout", "cancelled" or a hook's reason
+    lines: int = 0
+    drained_lines: int = 0  # lines read after the process had already exited
+    error: str | None = None
+
+
+class LineSplitter:
+    """Incrementally decodes UTF-8 chunks into lines with universal newline handling."""
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, chunk: bytes) -> list[str]:
+        text = self._partial + self._decoder.decode(chunk)
+        # A trailing "\r" may be the first half of "\r\n" split across chunks
+        held_carriage_return = text.endswith("\r")
+        if held_carriage_return:
+            text = text[:-1]
+        lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_LINE_LENGTH:
+            lines.append(self._partial)
+            self._partial = ""
+        if held_carriage_return:
+            self._partial += "\r"
+        return lines
+
+    def close(self) -> list[str]:
+        remainder = (self._partial + self._decoder.decode(b"", final=True)).rstrip("\r")
+        self._partial = ""
+        return [remainder] if remainder else []
+
+
+async def _wait_exited(process: asyncio.subprocess.Process, timeout: float) -> bool:
+    # Process.wait() also waits for the pipes to close, which never happens while a
+    # grandchild (e.g. a browser) still holds them; the return code is set on exit.
+    deadline = time.monotonic() + timeout
+    while process.returncode is None:
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(EXIT_POLL_SECONDS)
+    return True
+
+
+async def _terminate(process: asyncio.subprocess.Process, watch: WatchedProcess) -> None:
+    try:
+        if process.returncode is None:
+            process.terminate()
+        if not await _wait_exited(process, TERMINATE_GRACE_SECONDS):
+            process.kill()
+            if not await _wait_exited(process, KILL_GRACE_SECONDS):
+                watch.on_notice("WARNING: Process failed to terminate cleanly - forcing container cleanup")
+    except ProcessLookupError:
+        pass
+
+
+def _call_hook(watch: WatchedProcess, hook: Callable, *args: object) -> str | None:
+    # A failing hook must not kill the reader - report it and keep streaming
+    try:
+        return hook(*args)
+    except Exception as e:
+        watch.on_notice(f"Error reading process output: {e}")
+        return None
+
+
+async def watch_process(watch: WatchedProcess) -> ProcessOutcome:
+    """Run one process to completion (or until stopped), feeding its output to the hooks."""
+    started = time.monotonic()
+    # Our own pipe, so its read end can be closed even if a grandchild still holds the write end
+    read_fd, write_fd = os.pipe()
+    try:
+        process = await asyncio.create_subprocess_exec(*watch.command, stdout=write_fd, stderr=asyncio.subprocess.STDOUT)
+    except OSError as e:
+        os.close(read_fd)
+        return ProcessOutcome(watch.name, -2, time.monotonic() - started, "spawn_failed", error=str(e))
+    finally:
+        os.close(write_fd)
+    output = asyncio.StreamReader()
+    output_transport, _protocol = await asyncio.get_running_loop().connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(output), os.fdopen(read_fd, "rb", buffering=0)
+    )
+
+    outcome = ProcessOutcome(watch.name, -1, 0.0)
+    splitter = LineSplitter()
+    last_output = time.monotonic()
+    drain_deadline: float | None = None
+
+    def emit(lines: list[str]) -> str | None:
+        for line in lines:
+            outcome.lines += 1
+            if drain_deadline is not None:
+                outcome.drained_lines += 1
+            _call_hook(watch, watch.on_line, line)
+            if watch.check_stop and (reason := _call_hook(watch, watch.check_stop)):
+                return reason
+        return None
+
+    try:
+        while True:
+            now = time.monotonic()
+            if drain_deadline is None and process.returncode is not None:
+                # Children that inherited the pipe can keep it open; only collect what is already there
+                drain_deadline = now + DRAIN_SECONDS
+            if drain_deadline is not None:
+                if now >= drain_deadline:
+                    break
+                read_timeout = DRAIN_IDLE_SECONDS
+            else:
+                remaining = watch.timeout - (now - started)
+                if remaining <= 0:
+                    watch.on_notice(f"TIMEOUT: Test execution exceeded {watch.timeout:g} seconds")
+                    outcome.stop_reason = "timeout"
+                    break
+                read_timeout = min(_call_hook(watch, watch.idle_interval) or 3.0, remaining)
+
+            try:
+                chunk = await asyncio.wait_for(output.read(READ_CHUNK_SIZE), read_timeout)
+            except TimeoutError:
+                if drain_deadline is not None:
+                    break
+                if watch.check_stop and (reason := _call_hook(watch, watch.check_stop)):
+                    outcome.stop_reason = reason
+                    break
+                if watch.on_idle and (reason := _call_hook(watch, watch.on_idle, time.monotonic() - last_output)):
+                    outcome.stop_reason = reason
+                    break
+                continue
+
+            if not chunk:
+                outcome.stop_reason = emit(splitter.close())
+                break
+            last_output = time.monotonic()
+            if reason := emit(splitter.feed(chunk)):
+                outcome.stop_reason = reason
+                break
+
+        if outcome.stop_reason:
+            await _terminate(process, watch)
+        elif not await _wait_exited(process, EXIT_WAIT_SECONDS):
+            watch.on_notice("WARNING: Process did not exit cleanly, forcing termination")
+            await _terminate(process, watch)
+    except asyncio.CancelledError:
+        outcome.stop_reason = "cancelled"
+        await asyncio.shield(_terminate(process, watch))
+        raise
+    finally:
+        outcome.elapsed = time.monotonic() - started
+        # Release the pipe even if a grandchild still holds the other end
+        output_transport.close()
+
+    outcome.returncode = process.returncode if process.returncode is not None else -1
+    return outcome
+
+
+async def _watch_all(watches: list[WatchedProcess]) -> list[ProcessOutcome]:
+    return list(await asyncio.gather(*(watch_process(watch) for watch in watches)))
+
+
+def watch_processes(watches: list[WatchedProcess]) -> list[ProcessOutcome]:
+    """Run and watch all processes concurrently on one event loop; outcomes keep the input order.
+
+    Ctrl-C cancels every watch, which terminates the child processes before re-raising.
+    """
+    return asyncio.run(_watch_all(watches))
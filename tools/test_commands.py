@@ -8,32 +8,31 @@ import sys
 import time
 from pathlib import Path
 
+from tools.browser_pool import BIN_DIR as BROWSER_POOL_BIN_DIR, ensure_browser_pool, summarize_browser_pool
+from tools.container_cleanup import BROWSER_PROCESS_PATTERNS, ODOO_PROCESS_PATTERNS, run_container_cleanup, summarize_cleanup
+from tools.db_admin import DatabaseAdminError, get_db_admin
+from tools.db_clone import CloneBackend, SnapshotCloneBackend, create_clone_backend
+from tools.db_pool import DatabasePool, create_db_pool
+from tools.db_reuse import DatabaseReuse
+from tools.docker_api import DockerAPIError, DockerUnavailable, container_exec, get_docker_client, load_compose_config
+from tools.filestore import cleanup_filestore_script, filestore_path, provision_filestore_script
+from tools.test_index import CATEGORY_TAGS, TestIndex
+from tools.test_plan import TestPlanError, compile_test_plan
+
+EXEC_TEST_RUN_DIR = "/volumes/data/test-runs"  # Process group files of exec-based runs (see stop_exec_test_process)
+
 
 def get_production_db_name() -> str:
-    result = subprocess.run(["docker", "compose", "config", "--format", "json"], capture_output=True, text=True)
-    if result.returncode == 0:
-        import json
-
-        config = json.loads(result.stdout)
-        for service_name, service in config.get("services", {}).items():
-            if "web" in service_name.lower():
-                env = service.get("environment", {})
-                if isinstance(env, dict):
-                    return env.get("ODOO_DB", "opw")
-                elif isinstance(env, list):
-                    for env_var in env:
-                        if env_var.startswith("ODOO_DB="):
-                            return env_var.split("=", 1)[1]
+    # Parsed once per process (and cached on disk) - this is called many times per run
+    config = load_compose_config()
+    web_service = config.find_service("web")
+    if web_service:
+        return config.service_environment(web_service).get("ODOO_DB", "opw")
     return "opw"
 
 
 def get_script_runner_service() -> str:
-    result = subprocess.run(["docker", "compose", "ps", "--services"], capture_output=True, text=True)
-    services = result.stdout.strip().split("\n") if result.returncode == 0 else []
-    for service in services:
-        if "script" in service.lower() and "runner" in service.lower():
-            return service
-    return "script-runner"
+    return load_compose_config().find_service("script", "runner") or "script-runner"
 
 
 def get_our_modules() -> list[str]:
@@ -114,65 +113,44 @@ def run_quick_tests() -> int:
     return run_docker_test_command("unit_test", test_db_name, modules, use_production_clone=False)
 
 
+def run_affected_tests() -> int:
+    # Extra arguments (e.g. a base ref or --all) are passed through to the unified runner
+    runner = Path(__file__).with_name("test_runner.py")
+    return subprocess.run([sys.executable, str(runner), "--affected", *sys.argv[1:]]).returncode
+
+
 def show_test_stats() -> int:
     modules = get_our_modules()
+    index = TestIndex.load()
 
     print("Test Statistics for all modules:")
     print("=" * 50)
 
     grand_total_files = 0
-    grand_categories = {
-        "unit_test": 0,
-        "integration_test": 0,
-        "tour_test": 0,
-        "validation_test": 0,
-    }
+    grand_categories = {category: {"files": 0, "classes": 0, "methods": 0} for category in CATEGORY_TAGS}
 
     for module in modules:
         print(f"\nModule: {module}")
         print("-" * 30)
 
-        test_root = Path(f"addons/{module}/tests")
-        if not test_root.exists():
+        if not Path(f"addons/{module}/tests").exists():
             print("  ❌ No tests directory")
             continue
 
-        categories = {
-            "unit_test": 0,
-            "integration_test": 0,
-            "tour_test": 0,
-            "validation_test": 0,
-        }
-
-        total_files = 0
-        for test_file in test_root.rglob("test_*.py"):
-            if test_file.name.startswith("test_"):
-                total_files += 1
-                with open(test_file) as f:
-                    content = f.read()
-                    if "@tagged(*UNIT_TAGS)" in content or '"unit_test"' in content or "'unit_test'" in content:
-                        categories["unit_test"] += 1
-                    elif (
-                        "@tagged(*INTEGRATION_TAGS)" in content or '"integration_test"' in content or "'integration_test'" in content
-                    ):
-                        categories["integration_test"] += 1
-                    elif "@tagged(*TOUR_TAGS)" in content or '"tour_test"' in content or "'tour_test'" in content:
-                        categories["tour_test"] += 1
-                    elif "validation" in test_file.name.lower() or '"validation_test"' in content or "'validation_test'" in content:
-                        categories["validation_test"] += 1
-
+        total_files = len(index.test_files(module))
         print(f"  Total test files: {total_files}")
-        for category, count in categories.items():
-            print(f"  {category:20}: {count:3} files")
-            grand_categories[category] += count
+        for category, counts in index.category_summary(module).items():
+            print(f"  {category:20}: {counts['files']:3} files, {counts['classes']:3} classes, {counts['methods']:4} tests")
+            for key, count in counts.items():
+                grand_categories[category][key] += count
 
         grand_total_files += total_files
 
     print("\n" + "=" * 50)
     print("GRAND TOTALS:")
     print(f"Total test files: {grand_total_files}")
-    for category, count in grand_categories.items():
-        print(f"{category:20}: {count:3} files")
+    for category, counts in grand_categories.items():
+        print(f"{category:20}: {counts['files']:3} files, {counts['classes']:3} classes, {counts['methods']:4} tests")
 
     print("\nTo run tests:")
     print("  uv run test-unit        # Fast unit tests")
@@ -185,34 +163,111 @@ def show_test_stats() -> int:
     return 0
 
 
-def cleanup_test_databases(production_db: str = None) -> None:
-    """Drop all test databases matching pattern ${PRODUCTION_DB}_test_*"""
+_db_pools: dict[str, DatabasePool | None] = {}
+_clone_backend: CloneBackend | None = None
+
+
+def get_db_pool(production_db: str) -> DatabasePool | None:
+    """The warm clone pool for `production_db` from [tool.odoo-test.pool], or None when disabled."""
+    if production_db not in _db_pools:
+        from tools.test_runner import load_test_config
+
+        test_config = load_test_config()
+        strategy = test_config.get("clone", {}).get("strategy") or None
+        _db_pools[production_db] = create_db_pool(test_config.get("pool", {}), get_db_admin(), production_db, strategy)
+    return _db_pools[production_db]
+
+
+def get_clone_backend() -> CloneBackend:
+    """The clone backend of [tool.odoo-test.clone], kept for the process so it can drop its clones again."""
+    global _clone_backend
+    if _clone_backend is None:
+        from tools.test_runner import load_test_config
+
+        _clone_backend = create_clone_backend(load_test_config().get("clone", {}), get_db_admin())
+    return _clone_backend
+
+
+def get_db_reuse(production_db: str) -> DatabaseReuse | None:
+    """Database reuse for clones of `production_db` when [tool.odoo-test.clone] reuse is on."""
+    from tools.test_runner import load_test_config
+
+    # Snapshot clones are removed with their run, so there is nothing to reuse
+    if not load_test_config().get("clone", {}).get("reuse") or isinstance(get_clone_backend(), SnapshotCloneBackend):
+        return None
+    return DatabaseReuse(get_db_admin(), production_db)
+
+
+def keep_reusable_database(reuse: DatabaseReuse, db_name: str, before: dict[str, tuple[int, int]]) -> bool:
+    """Mark `db_name` clean for the next run if the tests committed nothing to it."""
+    admin = get_db_admin()
+    try:
+        # Backends flush their table statistics before they leave pg_stat_activity
+        if not admin.wait_for_no_connections(db_name):
+            return False
+        after = reuse.fingerprint(db_name)
+        drifted = reuse.drifted_tables(before, after)
+        if drifted:
+            print(f"   🧪 Tests committed changes to {db_name} ({', '.join(drifted[:5])}); it will be re-cloned")
+            return False
+        reuse.mark_clean(db_name, after)
+    except DatabaseAdminError as e:
+        print(f"   ⚠️  Could not check {db_name} for reuse: {e}")
+        return False
+    print(f"   ♻️  Keeping unchanged database for the next run: {db_name}")
+    return True
+
+
+def cleanup_snapshot_clones() -> None:
+    """Stop and remove snapshot clone servers left behind by crashed or killed runs (backend = "snapshot")."""
+    try:
+        backend = get_clone_backend()
+    except ValueError:
+        return
+    if not isinstance(backend, SnapshotCloneBackend):
+        return
+    try:
+        orphans = backend.sweep_orphans()
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"   ⚠️  Could not sweep snapshot clones: {e}")
+        return
+    for data_dir in orphans:
+        print(f"   ✅ Stopped and removed orphaned snapshot clone: {data_dir}")
+
+
+def cleanup_test_databases(production_db: str = None, keep: set[str] | None = None) -> None:
+    """Drop all test databases matching pattern ${PRODUCTION_DB}_test_* (except those in `keep`)"""
     if production_db is None:
         production_db = get_production_db_name()
 
     print(f"🧹 Cleaning up test databases for {production_db}...")
 
-    # Get list of test databases
-    list_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-t",
-        "-c",
-        f"SELECT datname FROM pg_database WHERE datname LIKE '{production_db}_test_%';",
-    ]
-
-    result = subprocess.run(list_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ⚠️  Could not list databases: {result.stderr}")
+    admin = get_db_admin()
+    # Snapshot clones of this process run on their own servers: stop and remove them
+    if isinstance(_clone_backend, SnapshotCloneBackend):
+        for db in [db for db in _clone_backend.clones if db not in (keep or set())]:
+            _clone_backend.drop(db)
+            print(f"   ✅ Removed snapshot clone: {db}")
+    try:
+        # Cached unit-test templates (see UnifiedTestRunner._setup_unit_test_database) are kept
+        templates = set(admin.list_databases(f"{production_db}\\_test\\_template\\_%"))
+        keep = (keep or set()) | templates
+        test_dbs = [db for db in admin.list_databases(f"{production_db}_test_%") if db not in keep]
+    except DatabaseAdminError as e:
+        print(f"   ⚠️  Could not list databases: {e}")
         return
 
-    test_dbs = [db.strip() for db in result.stdout.strip().split("\n") if db.strip()]
+    # Ready pool clones are kept; leased ones go back to the pool and are dropped in the background
+    pool = get_db_pool(production_db)
+    if pool:
+        test_dbs = [db for db in test_dbs if not pool.is_pool_database(db)]
+        for db in [db for db in test_dbs if db in pool.leased]:
+            try:
+                pool.release(db)
+                test_dbs.remove(db)
+                print(f"   ♻️  Returned {db} to the database pool")
+            except DatabaseAdminError as e:
+                print(f"   ⚠️  Failed to return {db} to the database pool: {e}")
 
     if not test_dbs:
         print(f"   No test databases found")
@@ -221,91 +276,38 @@ def cleanup_test_databases(production_db: str = None) -> None:
     print(f"   Found {len(test_dbs)} test database(s): {', '.join(test_dbs)}")
 
     for db in test_dbs:
-        # Terminate connections
-        kill_cmd = [
-            "docker",
-            "exec",
-            "odoo-opw-database-1",
-            "psql",
-            "-U",
-            "odoo",
-            "-d",
-            "postgres",
-            "-c",
-            f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db}' AND pid <> pg_backend_pid();",
-        ]
-        subprocess.run(kill_cmd, capture_output=True)
-
-        # Drop database
-        drop_cmd = ["docker", "exec", "odoo-opw-database-1", "dropdb", "-U", "odoo", "--if-exists", db]
-        result = subprocess.run(drop_cmd, capture_output=True, text=True)
-        if result.returncode == 0:
+        try:
+            admin.drop(db)
             print(f"   ✅ Dropped {db}")
-        else:
-            print(f"   ⚠️  Failed to drop {db}: {result.stderr}")
+        except DatabaseAdminError as e:
+            print(f"   ⚠️  Failed to drop {db}: {e}")
 
 
-def create_filestore_symlink(test_db_name: str, production_db: str) -> None:
-    production_filestore = f"/volumes/data/filestore/{production_db}"
-    test_filestore = f"/volumes/data/filestore/{test_db_name}"
+def create_test_filestore(test_db_name: str, production_db: str) -> None:
+    """Give the test database a copy-on-write view of the production filestore (see tools/filestore.py)."""
+    from tools.test_runner import load_test_config
 
-    # Find the running script-runner container
-    script_runner_service = get_script_runner_service()
+    mode = load_test_config().get("filestore", {}).get("mode", "hardlink")
+    if mode == "overlay":
+        # Odoo runs in its own `docker compose run` container here, which would not see a mount made elsewhere
+        mode = "hardlink"
+    script = provision_filestore_script(test_db_name, production_db, mode)
 
     # First try to use any running script-runner container
-    list_cmd = ["docker", "ps", "-q", "-f", f"name=odoo-opw-{script_runner_service}", "-f", "status=running"]
-    result = subprocess.run(list_cmd, capture_output=True, text=True)
-
-    if result.returncode == 0 and result.stdout.strip():
-        # Use the first running container
-        container_id = result.stdout.strip().split()[0]
-        container_name = container_id[:12]  # Use short ID
+    script_runner_service = get_script_runner_service()
+    container_name = find_script_runner_container()
+    if container_name:
+        result = container_exec(container_name, ["sh", "-c", script], user="root")
     else:
-        # Fallback to creating the symlink on the host via docker compose run
-        print(f"   Creating filestore symlink via docker compose run...")
-        symlink_cmd = [
-            "docker",
-            "compose",
-            "run",
-            "--rm",
-            script_runner_service,
-            "sh",
-            "-c",
-            f"if [ -e '{test_filestore}' ]; then rm -rf '{test_filestore}'; fi && ln -s '{production_filestore}' '{test_filestore}'",
-        ]
-        result = subprocess.run(symlink_cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"   ✅ Created filestore symlink: {test_filestore} → {production_filestore}")
-        else:
-            print(f"   ❌ Failed to create filestore symlink: {result.stderr}")
-        return
-
-    cleanup_cmd = [
-        "docker",
-        "exec",
-        container_name,
-        "sh",
-        "-c",
-        f"if [ -e '{test_filestore}' ]; then rm -rf '{test_filestore}'; fi",
-    ]
-    result = subprocess.run(cleanup_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ⚠️  Warning: Could not clean existing filestore: {result.stderr}")
-
-    symlink_cmd = [
-        "docker",
-        "exec",
-        container_name,
-        "ln",
-        "-s",
-        production_filestore,
-        test_filestore,
-    ]
-    result = subprocess.run(symlink_cmd, capture_output=True, text=True)
+        # Fallback to a one-off container via docker compose run
+        print(f"   Creating test filestore via docker compose run...")
+        create_cmd = ["docker", "compose", "run", "--rm", "-u", "root", script_runner_service, "sh", "-c", script]
+        result = subprocess.run(create_cmd, capture_output=True, text=True)
     if result.returncode == 0:
-        print(f"   ✅ Created filestore symlink: {test_filestore} → {production_filestore}")
+        used_mode = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else mode
+        print(f"   ✅ Created {used_mode} filestore: {filestore_path(test_db_name)} ← {filestore_path(production_db)}")
     else:
-        print(f"   ❌ Failed to create filestore symlink: {result.stderr}")
+        print(f"   ❌ Failed to create test filestore: {result.stderr}")
 
 
 def cleanup_test_filestores(production_db: str = None) -> None:
@@ -328,32 +330,23 @@ def cleanup_test_filestores(production_db: str = None) -> None:
         print(f"   No test filestores found")
         return
 
-    test_filestores = result.stdout.strip().split("\n")
+    test_filestores = [
+        filestore for filestore in result.stdout.strip().split("\n") if f"/{production_db}_test_template_" not in filestore
+    ]
+    if not test_filestores:
+        print(f"   No test filestores found")
+        return
+
     print(f"   Found {len(test_filestores)} test filestore(s)")
 
     for filestore in test_filestores:
         if filestore:
-            check_symlink_cmd = [
-                "docker",
-                "exec",
-                "odoo-opw-script-runner-1",
-                "sh",
-                "-c",
-                f"if [ -L '{filestore}' ]; then echo 'symlink'; elif [ -d '{filestore}' ]; then echo 'directory'; else echo 'unknown'; fi",
-            ]
-            check_result = subprocess.run(check_symlink_cmd, capture_output=True, text=True)
-            is_symlink = check_result.stdout.strip() == "symlink"
-
-            if is_symlink:
-                rm_cmd = ["docker", "exec", "odoo-opw-script-runner-1", "rm", filestore]
-            else:
-                rm_cmd = ["docker", "exec", "odoo-opw-script-runner-1", "rm", "-rf", filestore]
-
+            filestore_name = filestore.split("/")[-1]
+            # Unmounts overlays and removes link farms or symlinks; production files are never touched
+            rm_cmd = ["docker", "exec", "-u", "root", "odoo-opw-script-runner-1", "sh", "-c", cleanup_filestore_script(filestore_name)]
             result = subprocess.run(rm_cmd, capture_output=True, text=True)
             if result.returncode == 0:
-                filestore_name = filestore.split("/")[-1]
-                type_str = "symlink" if is_symlink else "directory"
-                print(f"   ✅ Removed {type_str}: {filestore_name}")
+                print(f"   ✅ Removed test filestore: {filestore_name}")
             else:
                 print(f"   ⚠️  Failed to remove {filestore}: {result.stderr}")
 
@@ -365,6 +358,7 @@ def cleanup_all_test_artifacts() -> None:
     print("=" * 60)
 
     cleanup_test_databases(production_db)
+    cleanup_snapshot_clones()
     cleanup_test_filestores(production_db)
 
     print("=" * 60)
@@ -374,24 +368,71 @@ def cleanup_all_test_artifacts() -> None:
 def cleanup_chrome_processes() -> None:
     """Kill any lingering Chrome/Chromium processes in script runner container"""
     script_runner_service = get_script_runner_service()
-    # Try to kill Chrome processes gracefully first
-    subprocess.run(["docker", "exec", f"odoo-opw-{script_runner_service}-1", "pkill", "chrome"], capture_output=True)
-    subprocess.run(["docker", "exec", f"odoo-opw-{script_runner_service}-1", "pkill", "chromium"], capture_output=True)
-    # Force kill if still running
-    subprocess.run(["docker", "exec", f"odoo-opw-{script_runner_service}-1", "pkill", "-9", "chrome"], capture_output=True)
-    subprocess.run(["docker", "exec", f"odoo-opw-{script_runner_service}-1", "pkill", "-9", "chromium"], capture_output=True)
-    # Clean up zombie processes
-    subprocess.run(
-        [
-            "docker",
-            "exec",
-            f"odoo-opw-{script_runner_service}-1",
-            "sh",
-            "-c",
-            "ps aux | grep defunct | awk '{print $2}' | xargs -r kill -9",
-        ],
-        capture_output=True,
+    # SIGTERM first, SIGKILL for whatever is still running after the grace period - one docker exec
+    report = run_container_cleanup(f"odoo-opw-{script_runner_service}-1", BROWSER_PROCESS_PATTERNS, grace=2.0)
+    print(f"   {summarize_cleanup(report)}")
+
+
+def start_browser_pool(container: str) -> bool:
+    """Ensure the warm Chromium pool ([tool.odoo-test.browser_pool]) serves in `container`; False when disabled or failed."""
+    from tools.test_runner import load_test_config
+
+    config = load_test_config().get("browser_pool", {})
+    if not config.get("enabled", False):
+        return False
+    flags = load_compose_config().service_environment(get_script_runner_service()).get("CHROMIUM_FLAGS", "")
+    status = ensure_browser_pool(container, size=int(config.get("size", 2)), max_uses=int(config.get("max_uses", 25)), flags=flags)
+    print(f"   🌐 {summarize_browser_pool(status)}")
+    return "error" not in status
+
+
+def find_script_runner_container() -> str | None:
+    """Short ID of a running script-runner container, or None."""
+    script_runner_service = get_script_runner_service()
+    try:
+        running = [container["Id"] for container in get_docker_client().list_containers(f"odoo-opw-{script_runner_service}")]
+    except (DockerUnavailable, DockerAPIError):
+        list_cmd = ["docker", "ps", "-q", "-f", f"name=odoo-opw-{script_runner_service}", "-f", "status=running"]
+        result = subprocess.run(list_cmd, capture_output=True, text=True)
+        running = result.stdout.split() if result.returncode == 0 else []
+    return running[0][:12] if running else None
+
+
+def prepare_script_runner_container() -> str | None:
+    """Running script-runner container, started if needed and cleared of leftover test processes.
+
+    Replaces restarting the service for the exec-based path; None when no container could be started.
+    """
+    container = find_script_runner_container()
+    if not container:
+        subprocess.run(["docker", "compose", "up", "-d", get_script_runner_service()], capture_output=True)
+        container = find_script_runner_container()
+    if container:
+        report = run_container_cleanup(container, ODOO_PROCESS_PATTERNS + BROWSER_PROCESS_PATTERNS, ipc=True, temp_files=True)
+        print(f"🧹 Script runner {container}: {summarize_cleanup(report)}")
+    return container
+
+
+def exec_test_process_group_file(db_name: str) -> str:
+    # Outside /tmp, where container cleanup's temp file patterns (odoo-*, *.pid, ...) would remove it mid-run
+    return f"{EXEC_TEST_RUN_DIR}/{db_name}.pgid"
+
+
+def stop_exec_test_process(container: str, db_name: str, grace: float = 5.0) -> None:
+    """Stop an exec-based test run's whole process group (odoo-bin, Chromium, ...) in the container.
+
+    Killing the local `docker exec` client leaves the processes inside running.
+    """
+    pgid_file = exec_test_process_group_file(db_name)
+    script = (
+        f'pgid=$(cat {pgid_file} 2>/dev/null) || exit 0; pkill -TERM -g "$pgid"; '
+        f'i=0; while pgrep -g "$pgid" >/dev/null && [ $i -lt {int(grace * 10)} ]; do sleep 0.1; i=$((i + 1)); done; '
+        f'pkill -KILL -g "$pgid"; rm -f {pgid_file}'
     )
+    try:
+        container_exec(container, ["sh", "-c", script], timeout=grace + 30)
+    except subprocess.TimeoutExpired:
+        print(f"   ⚠️  Timed out stopping test processes in {container}")
 
 
 def restart_script_runner_with_orphan_cleanup() -> None:
@@ -402,145 +443,45 @@ def restart_script_runner_with_orphan_cleanup() -> None:
 
 def drop_and_create_test_database(db_name: str) -> None:
     print(f"🗄️  Cleaning up test database: {db_name}")
+    admin = get_db_admin()
 
-    # Step 1: Kill active connections to test database
+    # Step 1: Kill active connections to test database (waits until pg_stat_activity is clear)
     print(f"   Terminating connections to {db_name}...")
-
-    # First, get the connection count
-    check_connections_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-t",
-        "-c",
-        f"SELECT count(*) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();",
-    ]
-    result = subprocess.run(check_connections_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        connection_count = result.stdout.strip()
-        print(f"   Found {connection_count} active connections to {db_name}")
-
-    # Kill the connections
-    kill_connections_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();",
-    ]
-    result = subprocess.run(kill_connections_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ⚠️  Warning: Could not kill connections: {result.stderr}")
-    else:
-        print(f"   Connection termination command executed")
-
-    # Wait a moment for connections to close
-    import time
-
-    time.sleep(2)
-
-    # Check again
-    result = subprocess.run(check_connections_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        remaining_count = result.stdout.strip()
-        print(f"   {remaining_count} connections remaining after termination")
+    try:
+        print(f"   Found {admin.count_connections(db_name)} active connections to {db_name}")
+        if not admin.terminate(db_name):
+            print(f"   {admin.count_connections(db_name)} connections remaining after termination")
+    except DatabaseAdminError as e:
+        print(f"   ⚠️  Warning: Could not kill connections: {e}")
 
     # Step 2: Drop database
     print(f"   Dropping database {db_name}...")
-    drop_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"DROP DATABASE IF EXISTS {db_name};",
-    ]
-    result = subprocess.run(drop_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ❌ Failed to drop database: {result.stderr}")
+    try:
+        admin.drop(db_name)
+    except DatabaseAdminError as e:
+        print(f"   ❌ Failed to drop database: {e}")
         return
+    if admin.exists(db_name):
+        print(f"   ⚠️  Warning: Database {db_name} may still exist")
+    else:
+        print(f"   ✅ Database {db_name} successfully dropped")
 
-    # Step 3: Verify drop succeeded
-    verify_drop_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-t",
-        "-c",
-        f"SELECT count(*) FROM pg_database WHERE datname = '{db_name}';",
-    ]
-    result = subprocess.run(verify_drop_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        count = result.stdout.strip()
-        if count == "0":
-            print(f"   ✅ Database {db_name} successfully dropped")
-        else:
-            print(f"   ⚠️  Warning: Database {db_name} may still exist (count: {count})")
-
-    # Step 4: Create fresh database
+    # Step 3: Create fresh database
     print(f"   Creating fresh database {db_name}...")
-    create_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"CREATE DATABASE {db_name};",
-    ]
-    result = subprocess.run(create_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ❌ Failed to create database: {result.stderr}")
+    try:
+        admin.create(db_name)
+    except DatabaseAdminError as e:
+        print(f"   ❌ Failed to create database: {e}")
         return
-
-    # Step 5: Verify creation succeeded
-    verify_create_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-t",
-        "-c",
-        f"SELECT count(*) FROM pg_database WHERE datname = '{db_name}';",
-    ]
-    result = subprocess.run(verify_create_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        count = result.stdout.strip()
-        if count == "1":
-            print(f"   ✅ Database {db_name} successfully created")
-        else:
-            print(f"   ⚠️  Warning: Database creation may have failed (count: {count})")
+    if admin.exists(db_name):
+        print(f"   ✅ Database {db_name} successfully created")
+    else:
+        print(f"   ⚠️  Warning: Database creation may have failed")
 
     print(f"🗄️  Database cleanup completed")
 
 
-def setup_test_authentication(db_name: str) -> str:
+def setup_test_authentication(db_name: str, db_port: int | None = None) -> str:
     """Set up test authentication in the cloned database.
 
     Generates a secure random password and updates the admin user's password
@@ -564,6 +505,7 @@ def setup_test_authentication(db_name: str) -> str:
         "exec",
         "odoo-opw-database-1",
         "psql",
+        *(["-p", str(db_port)] if db_port else []),
         "-U",
         "odoo",
         "-d",
@@ -588,146 +530,41 @@ def setup_test_authentication(db_name: str) -> str:
 def clone_production_database(db_name: str) -> str:
     production_db = get_production_db_name()
     print(f"🗄️  Cloning production database: {production_db} → {db_name}")
-
-    # Step 1: Kill active connections to test database
-    print(f"   Terminating connections to {db_name}...")
-
-    # First, get the connection count
-    check_connections_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-t",
-        "-c",
-        f"SELECT count(*) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();",
-    ]
-    result = subprocess.run(check_connections_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        connection_count = result.stdout.strip()
-        print(f"   Found {connection_count} active connections to {db_name}")
-
-    # Kill the connections
-    kill_connections_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();",
-    ]
-    result = subprocess.run(kill_connections_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ⚠️  Warning: Could not kill connections: {result.stderr}")
-    else:
-        print(f"   Connection termination command executed")
-
-    # Wait a moment for connections to close
-    import time
-
-    time.sleep(2)
-
-    # Check again
-    result = subprocess.run(check_connections_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        remaining_count = result.stdout.strip()
-        print(f"   {remaining_count} connections remaining after termination")
-
-    # Step 2: Drop existing test database
-    print(f"   Dropping existing database {db_name}...")
-    drop_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"DROP DATABASE IF EXISTS {db_name};",
-    ]
-    result = subprocess.run(drop_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ❌ Failed to drop database: {result.stderr}")
-        return
-
-    # Step 3: Terminate connections to production database before cloning
-    print(f"   Terminating connections to production database {production_db}...")
-    kill_prod_connections_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{production_db}' AND pid <> pg_backend_pid();",
-    ]
-    result = subprocess.run(kill_prod_connections_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ⚠️  Warning: Could not kill production connections: {result.stderr}")
+    admin = get_db_admin()
+    backend = get_clone_backend()
+    # The pool holds template clones on the main server
+    pool = None if isinstance(backend, SnapshotCloneBackend) else get_db_pool(production_db)
+
+    leased = False
+    if pool:
+        try:
+            leased = pool.lease(db_name)
+        except DatabaseAdminError as e:
+            print(f"   ⚠️  Database pool unavailable: {e}")
+        if leased:
+            print(f"   ♻️  Leased pre-cloned database {db_name}")
+
+    # The backend drops the old test database first; template clones also terminate production
+    # connections (polling pg_stat_activity until they are gone) before CREATE DATABASE ... TEMPLATE
+    if not leased:
+        try:
+            backend.clone(production_db, db_name)
+        except DatabaseAdminError as e:
+            print(f"   ❌ Failed to clone database: {e}")
+            return
+    if pool:
+        # Replaces the leased clone, or fills the pool for the next run
+        pool.spawn_refill()
+    db_port = backend.db_port(db_name)
+    if db_port or admin.exists(db_name):
+        print(f"   ✅ Database {db_name} successfully cloned from {production_db}")
     else:
-        print(f"   Production connection termination executed")
-
-    # Wait for connections to close
-    time.sleep(2)
-
-    # Step 4: Clone from production database
-    print(f"   Cloning from production database {production_db}...")
-    clone_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-c",
-        f"CREATE DATABASE {db_name} WITH TEMPLATE {production_db};",
-    ]
-    result = subprocess.run(clone_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"   ❌ Failed to clone database: {result.stderr}")
-        return
-
-    # Step 4: Verify creation succeeded
-    verify_create_cmd = [
-        "docker",
-        "exec",
-        "odoo-opw-database-1",
-        "psql",
-        "-U",
-        "odoo",
-        "-d",
-        "postgres",
-        "-t",
-        "-c",
-        f"SELECT count(*) FROM pg_database WHERE datname = '{db_name}';",
-    ]
-    result = subprocess.run(verify_create_cmd, capture_output=True, text=True)
-    if result.returncode == 0:
-        count = result.stdout.strip()
-        if count == "1":
-            print(f"   ✅ Database {db_name} successfully cloned from {production_db}")
-        else:
-            print(f"   ⚠️  Warning: Database creation may have failed (count: {count})")
+        print(f"   ⚠️  Warning: Database creation may have failed")
 
     print(f"🗄️  Database clone completed")
 
     # Set up test authentication for tour tests
-    return setup_test_authentication(db_name)
+    return setup_test_authentication(db_name, db_port)
 
 
 def run_docker_test_command(
@@ -740,6 +577,8 @@ def run_docker_test_command(
     cleanup_after: bool = True,
     is_tour_test: bool = False,
     use_module_prefix: bool = True,
+    reuse_db: bool | None = None,
+    use_exec: bool | None = None,
 ) -> int:
     if modules_to_install is None:
         modules_to_install = get_our_modules()
@@ -756,24 +595,77 @@ def run_docker_test_command(
     print(f"📊 Database: {db_name}")
     print("-" * 60)
 
+    # Build test tags - optionally restricted to our modules (tag/module for each module when
+    # use_module_prefix=True) - and compile them against the test index before any database work
+    if not test_tags:
+        # No tags specified, just use module names
+        expression = ",".join(f"/{module}" for module in modules_to_install)
+    elif not use_module_prefix or test_tags.startswith("-"):
+        # Use tags as-is (for tour tests and negative tags)
+        expression = test_tags
+    else:
+        # e.g. "post_install,-at_install,unit_test" -> "unit_test/module" (the last tag is the category)
+        last_tag = test_tags.split(",")[-1].strip()
+        expression = ",".join(f"{last_tag}/{module}" for module in modules_to_install)
+    try:
+        plan = compile_test_plan(TestIndex.load(), expression, modules_to_install)
+    except TestPlanError as e:
+        print(f"❌ Invalid test selection: {e}")
+        return 1
+    if plan.is_empty:
+        print(f"❌ Invalid test selection: {expression} matches no tests")
+        return 1
+    test_tags_final = plan.test_tags()
+    print(f"🏷️  Final test tags: {test_tags_final} ({plan.describe()})")
+
+    # Tour runs reinstall modules, so only plain production-clone runs can keep their database
+    reuse = None
+    if use_production_clone and not is_tour_test and reuse_db is not False:
+        reuse = get_db_reuse(production_db) if reuse_db is None else DatabaseReuse(get_db_admin(), production_db)
+    reusing = bool(reuse and reuse.reusable(db_name))
+    reuse_fingerprint = None
+
     # Cleanup before tests (default behavior)
     if cleanup_before:
         print("🧹 Pre-test cleanup...")
-        cleanup_test_databases(production_db)
+        cleanup_test_databases(production_db, keep={db_name} if reusing else None)
         cleanup_test_filestores(production_db)
         print("-" * 60)
 
-    restart_script_runner_with_orphan_cleanup()
+    # Reuse the long-running script-runner container instead of a fresh `docker compose run --rm` one
+    if use_exec is None:
+        from tools.test_runner import load_test_config
+
+        use_exec = bool(load_test_config().get("commands", {}).get("exec", True))
+    exec_container = prepare_script_runner_container() if use_exec else None
+    if not exec_container:
+        restart_script_runner_with_orphan_cleanup()
+    # Tours in the long-running container get warm browsers from the pool instead of cold starts
+    browser_pool = bool(exec_container and (is_tour_test or "tour" in test_tags) and start_browser_pool(exec_container))
 
     test_password = None
+    db_port = None
     if use_production_clone:
-        test_password = clone_production_database(db_name)
+        if reusing:
+            print(f"♻️  Reusing unchanged database {db_name}")
+            test_password = setup_test_authentication(db_name)
+        else:
+            test_password = clone_production_database(db_name)
+            # Snapshot clones are served by their own postgres instance
+            db_port = get_clone_backend().db_port(db_name)
+        if reuse:
+            # Taken after the authentication setup, which writes to the clone itself
+            try:
+                reuse_fingerprint = reuse.fingerprint(db_name)
+            except DatabaseAdminError as e:
+                print(f"   ⚠️  Database reuse unavailable: {e}")
         # Create symlink after container restart for tour tests
         if is_tour_test or "tour" in test_tags:
-            print(f"   Creating filestore symlink for tour tests...")
-            create_filestore_symlink(db_name, production_db)
+            print(f"   Creating test filestore for tour tests...")
+            create_test_filestore(db_name, production_db)
             print(f"   Cleaning up Chrome processes...")
-            cleanup_chrome_processes()
+            if not browser_pool:
+                cleanup_chrome_processes()
 
             # Mark modules as uninstalled to force test module loading
             print(f"   Marking modules as uninstalled to force test discovery...")
@@ -785,6 +677,7 @@ def run_docker_test_command(
                     "-T",
                     "database",
                     "psql",
+                    *(["-p", str(db_port)] if db_port else []),
                     "-U",
                     "odoo",
                     "-d",
@@ -797,64 +690,45 @@ def run_docker_test_command(
     else:
         drop_and_create_test_database(db_name)
 
-    # Build test tags - optionally with module prefix to only run our module tests
-    # Format: module_name:test_tag for each module (when use_module_prefix=True)
-    if not test_tags:
-        # No tags specified, just use module names
-        test_tags_final = ",".join(modules_to_install)
-    elif not use_module_prefix:
-        # Use tags as-is without module prefix (for tour tests)
-        test_tags_final = test_tags
-    elif "," in test_tags:
-        # Complex tags with multiple components - apply module prefix to last tag
-        # e.g., "post_install,-at_install,unit_test" -> "module:unit_test"
-        tags = test_tags.split(",")
-        last_tag = tags[-1].strip()
-        test_tags_final = ",".join([f"{module}:{last_tag}" for module in modules_to_install])
-    elif test_tags.startswith("-"):
-        # Negative tags - use as-is
-        test_tags_final = test_tags
-    else:
-        # Simple tags - use module prefixes
-        test_tags_final = ",".join([f"{module}:{test_tags}" for module in modules_to_install])
-
-    print(f"🏷️  Final test tags: {test_tags_final}")
 
     # For tests, always use -i (install) to force test module loading
     # Even with production clones, we need -i to trigger test discovery
     # Odoo doesn't load test modules during update (-u), only during install
     module_flag = "-i"
 
-    cmd = [
-        "docker",
-        "compose",
-        "run",
-        "--rm",
+    odoo_cmd = [
+        "/odoo/odoo-bin",
+        "-d",
+        db_name,
+        module_flag,
+        modules_str,
+        "--test-tags",
+        test_tags_final,
+        "--test-enable",
+        "--stop-after-init",
+        "--max-cron-threads=0",
+        "--workers=0",
+        f"--db-filter=^{db_name}$",
+        "--log-level=test",
+        "--without-demo=all",
     ]
+    if db_port:
+        odoo_cmd.append(f"--db_port={db_port}")
 
     # Add environment variable for test password if we have one
-    if test_password:
-        cmd.extend(["-e", f"ODOO_TEST_PASSWORD={test_password}"])
-
-    cmd.extend(
-        [
-            script_runner_service,
-            "/odoo/odoo-bin",
-            "-d",
-            db_name,
-            module_flag,
-            modules_str,
-            "--test-tags",
-            test_tags_final,
-            "--test-enable",
-            "--stop-after-init",
-            "--max-cron-threads=0",
-            "--workers=0",
-            f"--db-filter=^{db_name}$",
-            "--log-level=test",
-            "--without-demo=all",
-        ]
-    )
+    env_args = ["-e", f"ODOO_TEST_PASSWORD={test_password}"] if test_password else []
+
+    if exec_container:
+        # Own session/process group, recorded so a timeout or interrupt can stop the whole tree
+        # The file is removed again when the run exits on its own
+        pgid_file = exec_test_process_group_file(db_name)
+        group_wrapper = f'mkdir -p {EXEC_TEST_RUN_DIR} && echo $$ > {pgid_file} && {{ "$@"; status=$?; rm -f {pgid_file}; exit $status; }}'
+        if browser_pool:
+            group_wrapper = f"PATH={BROWSER_POOL_BIN_DIR}:$PATH; {group_wrapper}"
+        cmd = ["docker", "exec", "-e", "PYTHONUNBUFFERED=1", *env_args, exec_container]
+        cmd += ["setsid", "-w", "sh", "-c", group_wrapper, "odoo-test", *odoo_cmd]
+    else:
+        cmd = ["docker", "compose", "run", "--rm", *env_args, script_runner_service, *odoo_cmd]
 
     print(f"🚀 Command: {' '.join(cmd)}")
     print()
@@ -872,7 +746,8 @@ def run_docker_test_command(
         if cleanup_after:
             print("-" * 60)
             print("🧹 Post-test cleanup...")
-            cleanup_test_databases(production_db)
+            kept = reuse_fingerprint is not None and keep_reusable_database(reuse, db_name, reuse_fingerprint)
+            cleanup_test_databases(production_db, keep={db_name} if kept else None)
             cleanup_test_filestores(production_db)
 
         if result.returncode == 0:
@@ -884,6 +759,8 @@ def run_docker_test_command(
 
     except subprocess.TimeoutExpired:
         print(f"\n❌ Tests timed out after {timeout} seconds")
+        if exec_container:
+            stop_exec_test_process(exec_container, db_name)
         # Cleanup on timeout if enabled
         if cleanup_after:
             print("🧹 Cleanup after timeout...")
@@ -893,6 +770,8 @@ def run_docker_test_command(
 
     except KeyboardInterrupt:
         print("\n🛑 Tests interrupted by user")
+        if exec_container:
+            stop_exec_test_process(exec_container, db_name)
         # Cleanup on interrupt if enabled
         if cleanup_after:
             print("🧹 Cleanup after interrupt...")
@@ -902,6 +781,8 @@ def run_docker_test_command(
 
     except Exception as e:
         print(f"\n💥 Error running tests: {e}")
+        if exec_container:
+            stop_exec_test_process(exec_container, db_name)
         # Cleanup on error if enabled
         if cleanup_after:
             print("🧹 Cleanup after error...")
@@ -923,6 +804,9 @@ if __name__ == "__main__":
             sys.exit(run_all_tests())
         elif command == "quick":
             sys.exit(run_quick_tests())
+        elif command == "affected":
+            sys.argv = sys.argv[1:]
+            sys.exit(run_affected_tests())
         elif command == "stats":
             sys.exit(show_test_stats())
         elif command == "clean" or command == "cleanup":
@@ -932,5 +816,5 @@ if __name__ == "__main__":
             print(f"Unknown command: {command}")
             sys.exit(1)
     else:
-        print("Usage: python test_commands.py [unit|integration|tour|all|quick|stats|clean]")
+        print("Usage: python test_commands.py [unit|integration|tour|all|quick|affected|stats|clean]")
         sys.exit(1)
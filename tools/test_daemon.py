@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Persistent Odoo test daemon for the script-runner container.
+
+Keeps the interpreter, imported addons and loaded registries warm between test
+runs. The runner copies this file into the container and invokes the `run`
+sub-command through `docker exec`; `run` starts the daemon on first use, submits
+a test-tags job over a local unix socket and streams the Odoo log back on stdout,
+so the output looks exactly like a regular `odoo-bin --test-enable` run.
+
+The daemon re-executes itself (fresh imports, registry reload) only when watched
+addon sources change. Changed data files additionally trigger a module update.
+
+Usage (inside the container):
+    python3 test_daemon.py run --database opw --test-tags /product_connect:TestFoo.test_bar
+    python3 test_daemon.py serve
+    python3 test_daemon.py stop
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+DAEMON_DIR = Path("/volumes/data/test-daemon")
+SOCKET_PATH = DAEMON_DIR / "daemon.sock"
+LOG_PATH = DAEMON_DIR / "daemon.log"
+RESULT_PREFIX = "@@TEST_DAEMON_RESULT@@ "
+RESTART_LINE = "@@TEST_DAEMON_RESTART@@"
+WATCHED_SUFFIXES = {".py", ".xml", ".csv", ".js", ".scss", ".css"}
+DATA_SUFFIXES = {".xml", ".csv"}
+
+# Configuration is passed through the environment so the daemon command line
+# never matches the runner's "python.*odoo" cleanup patterns.
+ENV_ADDONS_PATH = "ODOO_TEST_DAEMON_ADDONS_PATH"
+ENV_HTTP_PORT = "ODOO_TEST_DAEMON_HTTP_PORT"
+ENV_UPDATE_MODULES = "ODOO_TEST_DAEMON_UPDATE_MODULES"
+# The daemon's own HTTP server serves every job's HttpCase/tour tests, so the port is
+# not a per-job setting; set ODOO_TEST_DAEMON_HTTP_PORT in the container to change it.
+DEFAULT_HTTP_PORT = 20199
+
+_logger = logging.getLogger("test_daemon")
+
+
+class SourceWatcher:
+    """Tracks modification times of addon sources to decide when to reload."""
+
+    def __init__(self, roots: list[Path]) -> None:
+        self.roots = roots
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict[str, float]:
+        snapshot = {__file__: os.stat(__file__).st_mtime}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [name for name in dirnames if not name.startswith((".", "__pycache__", "node_modules"))]
+                for filename in filenames:
+                    if os.path.splitext(filename)[1] in WATCHED_SUFFIXES:
+                        path = os.path.join(dirpath, filename)
+                        try:
+                            snapshot[path] = os.stat(path).st_mtime
+                        except OSError:
+                            continue
+        return snapshot
+
+    def changed_files(self) -> list[str]:
+        current = self._scan()
+        changed = [path for path, mtime in current.items() if self.snapshot.get(path) != mtime]
+        changed.extend(path for path in self.snapshot if path not in current)
+        return changed
+
+
+class ClientLogHandler(logging.Handler):
+    """Streams formatted log records of the running job to the client socket."""
+
+    def __init__(self, connection: socket.socket, formatter: logging.Formatter | None) -> None:
+        super().__init__(logging.DEBUG)
+        self.stream = connection.makefile("w", encoding="utf-8", buffering=1)
+        self.disconnected = False
+        self.results = None
+        if formatter:
+            self.setFormatter(formatter)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.write(self.format(record))
+
+    def write(self, text: str) -> None:
+        if self.disconnected:
+            return
+        try:
+            self.stream.write(text + "\n")
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            self.disconnected = True
+            if self.results is not None:
+                # unittest checks shouldStop between tests - abandon the job once the client is gone
+                self.results.shouldStop = True
+
+
+class TestDaemon:
+    def __init__(self, addons_path: str, http_port: int) -> None:
+        self.addons_path = addons_path
+        self.http_port = http_port
+        self.database_oids: dict[str, int] = {}
+        custom_roots = [Path(path) for path in addons_path.split(",") if path.startswith("/volumes/addons")]
+        self.watcher = SourceWatcher(custom_roots)
+        self.lock = threading.Lock()
+
+    def boot(self) -> None:
+        import odoo
+        from odoo.tools import config
+
+        config.parse_config(
+            [
+                "--addons-path",
+                self.addons_path,
+                "--http-port",
+                str(self.http_port),
+                "--log-level=test",
+                "--workers=0",
+                "--max-cron-threads=0",
+                "--without-demo=all",
+            ]
+        )
+        odoo.service.server.load_server_wide_modules()
+        # HttpCase/tour tests talk to a live HTTP server
+        odoo.service.server.server = odoo.service.server.ThreadedServer(odoo.http.root)
+        odoo.service.server.server.http_spawn()
+        _logger.info("test daemon ready (pid %s, http port %s)", os.getpid(), self.http_port)
+
+    def _load_registry(self, database: str, log: ClientLogHandler) -> "odoo.modules.registry.Registry":
+        import odoo
+        from odoo.modules.registry import Registry
+        from odoo.tools import config
+
+        database_oid = self._database_oid(database)
+        if database in self.database_oids and self.database_oids[database] != database_oid:
+            # Database was dropped and recreated (e.g. a fresh unit-test DB) - drop stale state
+            log.write(f"♻️  {database} was recreated - reloading registry")
+            Registry.delete(database)
+            odoo.sql_db.close_db(database)
+        self.database_oids[database] = database_oid
+
+        update_modules = [name for name in os.environ.pop(ENV_UPDATE_MODULES, "").split(",") if name]
+        config["test_enable"] = False  # load without running at_install tests
+        config["update"] = dict.fromkeys(update_modules, 1)
+        try:
+            if database in Registry.registries and not update_modules:
+                return Registry(database)
+            started = time.time()
+            registry = Registry.new(database, update_module=bool(update_modules))
+            _logger.info("registry loaded in %.3fs", time.time() - started)
+            return registry
+        finally:
+            config["update"] = {}
+
+    @staticmethod
+    def _database_oid(database: str) -> int:
+        import odoo
+
+        with odoo.sql_db.db_connect("postgres").cursor() as cr:
+            cr.execute("SELECT oid FROM pg_database WHERE datname = %s", [database])
+            row = cr.fetchone()
+        if not row:
+            raise RuntimeError(f"database {database!r} does not exist")
+        return row[0]
+
+    def run_job(self, job: dict, log: ClientLogHandler) -> dict:
+        import odoo
+        from odoo.modules import module
+        from odoo.tests import loader
+        from odoo.tests.result import OdooTestResult
+        from odoo.tools import config
+
+        database = job["database"]
+        registry = self._load_registry(database, log)
+        config["db_name"] = database
+        config["test_enable"] = True
+        config["test_tags"] = job.get("test_tags") or None
+        threading.current_thread().dbname = database
+
+        module_names = job.get("modules") or sorted(registry._init_modules)
+        results = OdooTestResult()
+        log.results = results
+        module.current_test = True
+        threading.current_thread().testing = True
+        started = time.time()
+        try:
+            for position in ("at_install", "post_install"):
+                suite = loader.make_suite(module_names, position)
+                if not suite.countTestCases():
+                    continue
+                if position == "post_install":
+                    _logger.info("Starting post tests")
+                    if suite.has_http_case():
+                        with registry.cursor() as cr:
+                            odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})["ir.qweb"]._pregenerate_assets_bundles()
+                suite(results)
+        finally:
+            threading.current_thread().testing = False
+            module.current_test = False
+            config["test_enable"] = False
+
+        failures = results.failures_count
+        errors = results.errors_count
+        level = logging.ERROR if failures or errors else logging.INFO
+        _logger.log(level, "%s failed, %s error(s) of %s tests when running job on %r", failures, errors, results.testsRun, database)
+        return {
+            "tests": results.testsRun,
+            "failures": failures,
+            "errors": errors,
+            "elapsed": time.time() - started,
+            "returncode": 1 if failures or errors else 0,
+        }
+
+    def handle(self, connection: socket.socket) -> bool:
+        """Serve one client; returns True when the daemon must re-execute."""
+        request = json.loads(connection.makefile("r", encoding="utf-8").readline() or "{}")
+        if request.get("command") == "stop":
+            connection.sendall(b"stopping\n")
+            raise SystemExit(0)
+
+        root_logger = logging.getLogger()
+        formatter = root_logger.handlers[0].formatter if root_logger.handlers else None
+        log = ClientLogHandler(connection, formatter)
+
+        addons_path = request.get("addons_path")
+        if addons_path and addons_path != self.addons_path:
+            log.write("🔁 Addons path changed - restarting test daemon")
+            os.environ[ENV_ADDONS_PATH] = addons_path
+            log.write(RESTART_LINE)
+            return True
+
+        changed = self.watcher.changed_files()
+        if changed:
+            log.write(f"🔁 {len(changed)} watched file(s) changed - restarting test daemon")
+            data_files = [Path(path) for path in changed if path.startswith("/volumes/addons/")]
+            modules = sorted({path.relative_to("/volumes/addons").parts[0] for path in data_files if path.suffix in DATA_SUFFIXES})
+            if modules:
+                os.environ[ENV_UPDATE_MODULES] = ",".join(modules)
+            log.write(RESTART_LINE)
+            return True
+
+        root_logger.addHandler(log)
+        try:
+            with self.lock:
+                outcome = self.run_job(request, log)
+        except Exception as error:
+            _logger.exception("test daemon job failed")
+            outcome = {"tests": 0, "failures": 0, "errors": 1, "returncode": 2, "error": str(error)}
+        finally:
+            root_logger.removeHandler(log)
+        log.write(RESULT_PREFIX + json.dumps(outcome))
+        return False
+
+    def serve(self) -> None:
+        DAEMON_DIR.mkdir(parents=True, exist_ok=True)
+        if SOCKET_PATH.exists():
+            SOCKET_PATH.unlink()
+        self.boot()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(SOCKET_PATH))
+        server.listen(4)
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                restart = self.handle(connection)
+            if restart:
+                server.close()
+                SOCKET_PATH.unlink(missing_ok=True)
+                os.execv(sys.executable, [sys.executable, __file__, "serve"])
+
+
+def _connect(timeout: float) -> socket.socket | None:
+    deadline = time.time() + timeout
+    while True:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(str(SOCKET_PATH))
+            return client
+        except (FileNotFoundError, ConnectionRefusedError):
+            client.close()
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.2)
+
+
+def _spawn_daemon(addons_path: str) -> None:
+    DAEMON_DIR.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ, **{ENV_ADDONS_PATH: addons_path})
+    with open(LOG_PATH, "ab") as log_file:
+        subprocess.Popen(
+            [sys.executable, __file__, "serve"],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+
+def run_client(args: argparse.Namespace) -> int:
+    job = {
+        "database": args.database,
+        "test_tags": args.test_tags,
+        "modules": [m for m in args.modules.split(",") if m],
+        "addons_path": args.addons_path,
+    }
+    client = _connect(timeout=0.5)
+    if client is None:
+        print("Starting test daemon (first run pays the registry boot)...", flush=True)
+        _spawn_daemon(args.addons_path)
+        client = _connect(timeout=args.boot_timeout)
+        if client is None:
+            print(f"ERROR: test daemon did not start - see {LOG_PATH}", flush=True)
+            return 2
+
+    while True:
+        with client:
+            client.sendall((json.dumps(job) + "\n").encode())
+            for line in client.makefile("r", encoding="utf-8", errors="replace"):
+                line = line.rstrip("\n")
+                if line == RESTART_LINE:
+                    break
+                if line.startswith(RESULT_PREFIX):
+                    return json.loads(line[len(RESULT_PREFIX) :]).get("returncode", 1)
+                print(line, flush=True)
+            else:
+                print("ERROR: test daemon closed the connection unexpectedly", flush=True)
+                return 2
+        client = _connect(timeout=args.boot_timeout)
+        if client is None:
+            print(f"ERROR: test daemon did not restart - see {LOG_PATH}", flush=True)
+            return 2
+
+
+def stop_daemon() -> int:
+    client = _connect(timeout=0.5)
+    if client is None:
+        print("test daemon is not running")
+        return 0
+    with client:
+        client.sendall(b'{"command": "stop"}\n')
+        print(client.recv(1024).decode().strip())
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Persistent Odoo test daemon")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("serve", help="Run the daemon in the foreground")
+    subparsers.add_parser("stop", help="Stop a running daemon")
+    run_parser = subparsers.add_parser("run", help="Submit a test job and stream its output")
+    run_parser.add_argument("--database", required=True)
+    run_parser.add_argument("--test-tags", default="")
+    run_parser.add_argument("--modules", default="")
+    run_parser.add_argument("--addons-path", default="/volumes/addons,/odoo/addons,/volumes/enterprise")
+    run_parser.add_argument("--boot-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        daemon = TestDaemon(os.environ[ENV_ADDONS_PATH], int(os.environ.get(ENV_HTTP_PORT, DEFAULT_HTTP_PORT)))
+        daemon.serve()
+    elif args.command == "stop":
+        sys.exit(stop_daemon())
+    else:
+        sys.exit(run_client(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Per-test and per-run durations recorded across test runs.
+
+Timings come from the "Starting <Class>.<method>" lines of the test output (a
+test runs until the next one starts, or until the module's stats/summary line),
+and are kept in one small SQLite file under tmp/tests/. Only the newest samples
+per test and per run kind are kept, so the file stays compact no matter how
+often the suite runs.
+
+The history is used to schedule sharded runs longest-first, balancing shards
+by expected duration, and to derive timeouts from real percentiles instead of
+fixed constants.
+"""
+
+import math
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_STORE_PATH = Path("tmp/tests/test_durations.sqlite3")
+MAX_SAMPLES = 20  # newest samples kept per test and per run kind
+MIN_RUN_SAMPLES = 3  # fewer recorded category runs fall back to the fixed timeouts
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_MARGIN = 2.0
+MIN_TIMEOUT = 180
+STARTUP_KIND = "startup"  # time from process start to the first test
+CATEGORIES = ("unit", "integration", "tour")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_durations (
+    test_id TEXT NOT NULL,  -- "<module>:<TestClass>.<test_method>"
+    seconds REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS test_durations_by_test ON test_durations (test_id, recorded_at);
+CREATE TABLE IF NOT EXISTS run_durations (
+    kind TEXT NOT NULL,  -- test category of a whole-category run, or "startup"
+    seconds REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_durations_by_kind ON run_durations (kind, recorded_at);
+"""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def split_test_id(test_id: str) -> tuple[str, str, str]:
+    """Split "<module>:<Class>.<method>" into (module, class, method); module may be empty."""
+    module, _, name = test_id.rpartition(":")
+    class_name, _, method = name.partition(".")
+    return module, class_name, method
+
+
+def matches_test_spec(test_id: str, spec: str) -> bool:
+    """Whether a recorded test belongs to a test selection like "Class", "Class.method",
+    "test_method", "module:Class" or "/module:Class.method"."""
+    spec = spec.rsplit("/", 1)[-1]
+    module, class_name, method = split_test_id(test_id)
+    if ":" in spec:
+        spec_module, spec = spec.split(":", 1)
+        if spec_module != module:
+            return False
+    if "." in spec:
+        return spec == f"{class_name}.{method}"
+    if spec.startswith("test_"):
+        return spec == method
+    return spec == class_name
+
+
+def _round_timeout(seconds: float) -> int:
+    # Whole minutes, never below the floor
+    return max(MIN_TIMEOUT, math.ceil(seconds * TIMEOUT_MARGIN / 60) * 60)
+
+
+class TestDurationStore:
+    """SQLite-backed timing history. Every call opens its own connection, so one store can be
+    shared by threads (e.g. concurrent phases); reads never create the file and treat an
+    unreadable history as empty."""
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH) -> None:
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _read(self, query: str, parameters: tuple = ()) -> list[tuple]:
+        if not self.path.exists():
+            return []
+        try:
+            connection = sqlite3.connect(self.path, timeout=30)
+            try:
+                return connection.execute(query, parameters).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return []
+
+    def record_tests(self, durations: list[tuple[str, float]]) -> None:
+        """Store (test_id, seconds) samples and prune each test to its newest MAX_SAMPLES."""
+        if not durations:
+            return
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO test_durations (test_id, seconds, recorded_at) VALUES (?, ?, ?)",
+                    [(test_id, seconds, now) for test_id, seconds in durations],
+                )
+                connection.executemany(
+                    "DELETE FROM test_durations WHERE test_id = ? AND rowid NOT IN "
+                    "(SELECT rowid FROM test_durations WHERE test_id = ? ORDER BY recorded_at DESC, rowid DESC LIMIT ?)",
+                    [(test_id, test_id, MAX_SAMPLES) for test_id in {test_id for test_id, _ in durations}],
+                )
+        finally:
+            connection.close()
+
+    def record_run(self, kind: str, seconds: float) -> None:
+        """Store one run duration (a whole category, or the startup time) for `kind`."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT INTO run_durations (kind, seconds, recorded_at) VALUES (?, ?, ?)", (kind, seconds, time.time())
+                )
+                connection.execute(
+                    "DELETE FROM run_durations WHERE kind = ? AND rowid NOT IN "
+                    "(SELECT rowid FROM run_durations WHERE kind = ? ORDER BY recorded_at DESC, rowid DESC LIMIT ?)",
+                    (kind, kind, MAX_SAMPLES),
+                )
+        finally:
+            connection.close()
+
+    def test_samples(self) -> dict[str, list[float]]:
+        samples: dict[str, list[float]] = {}
+        for test_id, seconds in self._read("SELECT test_id, seconds FROM test_durations"):
+            samples.setdefault(test_id, []).append(seconds)
+        return samples
+
+    def run_percentile(self, kind: str, pct: float = TIMEOUT_PERCENTILE, min_samples: int = MIN_RUN_SAMPLES) -> float | None:
+        samples = [row[0] for row in self._read("SELECT seconds FROM run_durations WHERE kind = ?", (kind,))]
+        return percentile(samples, pct) if len(samples) >= min_samples else None
+
+    def test_durations(self) -> dict[str, float]:
+        """Expected duration per "<module>:<Class>.<method>": its median duration."""
+        return {test_id: percentile(samples, 50) for test_id, samples in self.test_samples().items()}
+
+    def class_durations(self) -> dict[str, float]:
+        """Expected duration per "<module>:<Class>": the sum of its tests' median durations."""
+        durations: dict[str, float] = {}
+        for test_id, seconds in self.test_durations().items():
+            module, class_name, _ = split_test_id(test_id)
+            key = f"{module}:{class_name}"
+            durations[key] = durations.get(key, 0.0) + seconds
+        return durations
+
+    def estimate_timeout(self, test_specs: list[str]) -> int | None:
+        """Timeout for a run of the given test selections: startup plus the p95 of every matching
+        test, with margin. None unless every selection matches recorded history."""
+        startup = self.run_percentile(STARTUP_KIND, min_samples=1)
+        if startup is None or not test_specs:
+            return None
+        samples = self.test_samples()
+        expected = startup
+        for spec in test_specs:
+            matching = [test_samples for test_id, test_samples in samples.items() if matches_test_spec(test_id, spec)]
+            if not matching:
+                return None
+            expected += sum(percentile(test_samples, TIMEOUT_PERCENTILE) for test_samples in matching)
+        return _round_timeout(expected)
+
+    def recommended_timeout(self, specific_test: str | None = None, test_mode: str = "mixed") -> int | None:
+        """History-based timeout, or None when there is not enough history for this kind of run."""
+        if specific_test:
+            return self.estimate_timeout(specific_test.split(","))
+        if test_mode in CATEGORIES:
+            category_seconds = self.run_percentile(test_mode)
+            return _round_timeout(category_seconds) if category_seconds is not None else None
+        if test_mode == "all":
+            category_seconds = [self.run_percentile(category) for category in CATEGORIES]
+            if None in category_seconds:
+                return None
+            return _round_timeout(sum(category_seconds))
+        return None
@@ -0,0 +1,172 @@
+"""Append-only JSON-lines event stream of a test run (events.jsonl).
+
+progress.json and heartbeat.json are snapshots, rewritten as a whole every
+second, and streaming.log is free text. events.jsonl is written next to them in
+every odoo-tests-* output dir (and in the dirs of phase and shard workers).
+Each line is one JSON object with the wall-clock time "ts" and the "event" name:
+
+- test_started: test (module:Class.method)
+- test_finished: test, duration (seconds) and status (passed, failed, error, or
+  stopped when the run was cut short)
+- phase_changed: phase and previous
+- stall_warning: idle_seconds, threshold, warning, max_warnings, phase and test
+- critical_error: type, phase, test and line
+- run_finished: written when the run's output is closed
+
+Lines go through one buffered writer per file. The file is flushed with the
+logs and at once after stall warnings and critical errors. Readers only ever
+append-read: follow_events keeps every events.jsonl of a run open and reads
+only what was appended since its last read.
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+EVENTS_FILE_NAME = "events.jsonl"
+EVENT_BUFFER_SIZE = 64 * 1024
+FOLLOW_POLL_INITIAL_SECONDS = 0.05
+FOLLOW_POLL_MAX_SECONDS = 0.5
+FOLLOW_RESCAN_SECONDS = 2.0  # How often to look for the events of newly started workers
+FOLLOW_FINISHED_IDLE_SECONDS = 5.0  # Stop after a run with a summary.json stayed quiet this long
+
+
+class EventLog:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.handle = open(path, "w", buffering=EVENT_BUFFER_SIZE)
+
+    def emit(self, event: str, flush: bool = False, **fields: object) -> None:
+        if self.handle.closed:
+            return
+        # One write per event: a reader only ever sees whole lines plus at most one partial tail
+        self.handle.write(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, separators=(",", ":")) + "\n")
+        if flush:
+            self.handle.flush()
+
+    def flush(self) -> None:
+        if not self.handle.closed:
+            self.handle.flush()
+
+    def close(self) -> None:
+        if not self.handle.closed:
+            self.emit("run_finished")
+            self.handle.close()
+
+
+class _EventTail:
+    """Open handle and read position in one events file; keeps a partially written last line for the next read."""
+
+    def __init__(self, path: Path, label: str) -> None:
+        self.path = path
+        self.label = label
+        self.handle = open(path, "rb")
+        self.partial = b""
+
+    def read(self) -> list[dict]:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return []
+        offset = self.handle.tell()
+        if size < offset:  # Rewritten by a new run in the same dir
+            self.handle.seek(0)
+            self.partial = b""
+        elif size == offset:
+            return []
+        *lines, self.partial = (self.partial + self.handle.read()).split(b"\n")
+        events = []
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if self.label:
+                event["source"] = self.label
+            events.append(event)
+        return events
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+def latest_run_dir(tests_dir: Path = Path("tmp/tests")) -> Path | None:
+    runs = [folder for folder in tests_dir.glob("odoo-tests-*") if folder.is_dir()]
+    return max(runs, key=lambda folder: folder.stat().st_mtime) if runs else None
+
+
+def follow_events(run_dir: Path, from_start: bool = True) -> Iterator[dict]:
+    """Yield the events of a run as they are appended, including those of its phase and shard workers.
+
+    Ends after the run's own run_finished event, or once a run that wrote its
+    summary.json stays quiet for FOLLOW_FINISHED_IDLE_SECONDS.
+    """
+    tails: dict[Path, _EventTail] = {}
+
+    def rescan(skip_existing: bool = False) -> None:
+        for path in sorted(run_dir.rglob(EVENTS_FILE_NAME)):
+            if path not in tails:
+                try:
+                    tail = tails[path] = _EventTail(path, "" if path.parent == run_dir else str(path.parent.relative_to(run_dir)))
+                except OSError:
+                    continue  # Removed along with its worker dir
+                if skip_existing:
+                    tail.handle.seek(0, 2)
+
+    # Without from_start only new events are shown; workers started later are followed from their first event
+    rescan(skip_existing=not from_start)
+    delay = FOLLOW_POLL_INITIAL_SECONDS
+    last_event = last_rescan = time.monotonic()
+    try:
+        while True:
+            received = False
+            for path, tail in list(tails.items()):
+                for event in tail.read():
+                    received = True
+                    yield event
+                    if event["event"] == "run_finished" and path.parent == run_dir:
+                        # Workers finish before their run: pick up what they appended since the last poll
+                        rescan()
+                        for worker_path, worker_tail in tails.items():
+                            if worker_path != path:
+                                yield from worker_tail.read()
+                        return
+            now = time.monotonic()
+            if received:
+                delay, last_event = FOLLOW_POLL_INITIAL_SECONDS, now
+                continue
+            if now - last_event >= FOLLOW_FINISHED_IDLE_SECONDS and (run_dir / "summary.json").exists():
+                return
+            if now - last_rescan >= FOLLOW_RESCAN_SECONDS:
+                rescan()
+                last_rescan = now
+            time.sleep(delay)
+            delay = min(delay * 2, FOLLOW_POLL_MAX_SECONDS)
+    finally:
+        for tail in tails.values():
+            tail.close()
+
+
+def format_event(event: dict) -> str:
+    """One human-readable line per event, for `--follow` without `--json`."""
+    clock = time.strftime("%H:%M:%S", time.localtime(event.get("ts", 0)))
+    prefix = f"{clock} [{event['source']}] " if event.get("source") else f"{clock} "
+    name = event.get("event")
+    if name == "test_started":
+        return f"{prefix}▶️  {event['test']}"
+    if name == "test_finished":
+        icon = {"passed": "✅", "failed": "❌", "error": "💥"}.get(event.get("status"), "⏹️ ")
+        return f"{prefix}{icon} {event['test']} ({event.get('status')}, {event.get('duration', 0):.2f}s)"
+    if name == "phase_changed":
+        return f"{prefix}🔄 phase {event.get('previous')} → {event.get('phase')}"
+    if name == "stall_warning":
+        return (
+            f"{prefix}⚠️  no output for {event.get('idle_seconds', 0):.0f}s "
+            f"[{event.get('warning')}/{event.get('max_warnings')}] (phase={event.get('phase')}, test={event.get('test')})"
+        )
+    if name == "critical_error":
+        return f"{prefix}🚨 {event.get('type')}: {event.get('line')}"
+    if name == "run_finished":
+        return f"{prefix}🏁 run finished"
+    return f"{prefix}{json.dumps(event)}"
@@ -0,0 +1,276 @@
+"""Change-impact test selection: which test classes exercise which source files.
+
+The map is built statically from the addons tree. For every test class it
+records the python files its test file imports (followed transitively inside
+the addons, but not through package __init__ files, which import everything)
+and the files defining or extending every model the class references by name,
+e.g. self.env["product.template"], including references made by imported test
+helpers and same-file base classes.
+
+The map is persisted under tmp/tests/, refreshed after full category runs and
+rebuilt on demand whenever an addon python file is newer than the map.
+"""
+
+import ast
+import json
+import re
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tools.test_index import TestIndex
+
+IMPACT_MAP_PATH = Path("tmp/tests/test_impact_map.json")
+MAP_VERSION = 1
+MODEL_NAME_PATTERN = re.compile(r"[a-z][a-z0-9_]*(?:\.[a-z0-9_]+)+")
+BROWSER_MARKERS = ("HttpCase", "start_tour", "browser_js")  # classes that load web assets
+
+
+@dataclass
+class ChangeImpact:
+    changed_files: list[str]
+    affected_classes: set[str] = field(default_factory=set)  # "<module>:<Class>"
+    reasons: dict[str, list[str]] = field(default_factory=dict)  # class → changed files that selected it
+    unmapped_files: list[str] = field(default_factory=list)  # module files no test depends on (whole module selected)
+
+
+def changed_files(base_ref: str = "HEAD") -> list[str]:
+    """Files changed between the merge base with `base_ref` and the working tree, plus untracked files."""
+    merge_base = subprocess.run(["git", "merge-base", base_ref, "HEAD"], capture_output=True, text=True)
+    if merge_base.returncode != 0:
+        raise ValueError(f"Unknown base ref {base_ref!r}: {merge_base.stderr.strip()}")
+    commands = [
+        ["git", "diff", "--name-only", merge_base.stdout.strip()],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    ]
+    files: set[str] = set()
+    for command in commands:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        files.update(line for line in result.stdout.splitlines() if line)
+    return sorted(files)
+
+
+def _module_files(addons_dir: Path) -> dict[str, list[Path]]:
+    modules = {}
+    for manifest in sorted(addons_dir.glob("*/__manifest__.py")):
+        modules[manifest.parent.name] = sorted(manifest.parent.rglob("*.py"))
+    return modules
+
+
+def _resolve(package: Path, name: str) -> Path | None:
+    candidate = package / name.replace(".", "/") if name else package
+    if candidate.with_suffix(".py").is_file():
+        return candidate.with_suffix(".py")
+    if (candidate / "__init__.py").is_file():
+        return candidate / "__init__.py"
+    return None
+
+
+def _imported_files(tree: ast.Module, path: Path, addons_dir: Path) -> set[Path]:
+    imported: set[Path] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            if node.level:
+                package = path.parent
+                for _ in range(node.level - 1):
+                    package = package.parent
+                base = node.module or ""
+            elif node.module and node.module.startswith("odoo.addons."):
+                package, base = addons_dir, node.module.removeprefix("odoo.addons.")
+            else:
+                continue
+            for alias in node.names:
+                # "from .models import product" names a submodule; "from .common import Case" names an attribute
+                resolved = _resolve(package, f"{base}.{alias.name}" if base else alias.name) or _resolve(package, base)
+                if resolved:
+                    imported.add(resolved)
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.startswith("odoo.addons."):
+                    resolved = _resolve(addons_dir, alias.name.removeprefix("odoo.addons."))
+                    if resolved:
+                        imported.add(resolved)
+    return imported
+
+
+def _model_references(node: ast.AST) -> set[str]:
+    return {
+        child.value
+        for child in ast.walk(node)
+        if isinstance(child, ast.Constant) and isinstance(child.value, str) and MODEL_NAME_PATTERN.fullmatch(child.value)
+    }
+
+
+def _defined_models(tree: ast.Module) -> set[str]:
+    models = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for statement in node.body:
+            if not isinstance(statement, ast.Assign) or not isinstance(statement.value, (ast.Constant, ast.List, ast.Tuple)):
+                continue
+            if any(isinstance(target, ast.Name) and target.id in ("_name", "_inherit") for target in statement.targets):
+                models |= {
+                    value.value
+                    for value in ast.walk(statement.value)
+                    if isinstance(value, ast.Constant) and isinstance(value.value, str)
+                }
+    return models
+
+
+def _base_names(node: ast.ClassDef) -> set[str]:
+    return {
+        base.id if isinstance(base, ast.Name) else base.attr for base in node.bases if isinstance(base, (ast.Name, ast.Attribute))
+    }
+
+
+def build_impact_map(addons_dir: Path = Path("addons")) -> dict:
+    """Statically map every test class to the addon files it depends on."""
+    trees: dict[Path, ast.Module] = {}
+    module_files = _module_files(addons_dir)
+    for files in module_files.values():
+        for path in files:
+            try:
+                trees[path] = ast.parse(path.read_text(encoding="utf-8", errors="ignore"), filename=str(path))
+            except (SyntaxError, ValueError, OSError):
+                continue
+
+    model_files: dict[str, set[Path]] = {}
+    imports: dict[Path, set[Path]] = {}
+    for path, tree in trees.items():
+        for model in _defined_models(tree):
+            model_files.setdefault(model, set()).add(path)
+        imports[path] = _imported_files(tree, path, addons_dir)
+
+    def import_closure(path: Path) -> set[Path]:
+        closure, pending = {path}, [path]
+        while pending:
+            current = pending.pop()
+            if current.name == "__init__.py" and current != path:
+                continue
+            for imported in imports.get(current, ()):
+                if imported not in closure:
+                    closure.add(imported)
+                    pending.append(imported)
+        return closure
+
+    # The same test classes the test index (and so test plans and shards) knows, whatever their file name
+    test_classes = {
+        (test_class["module"], test_class["class"], test_class["file"]) for test_class in TestIndex.load(addons_dir).test_classes()
+    }
+    classes: dict[str, dict] = {}
+    for module, files in module_files.items():
+        for path in files:
+            tree = trees.get(path)
+            if tree is None or "tests" not in path.relative_to(addons_dir / module).parts:
+                continue
+            closure = import_closure(path)
+            helper_references = set().union(
+                *(
+                    _model_references(trees[helper])
+                    for helper in closure
+                    if helper != path and "tests" in helper.parts and helper in trees
+                )
+            )
+            file_classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+            module_level = [node for node in tree.body if not isinstance(node, ast.ClassDef)]
+            file_references = set().union(*(_model_references(node) for node in module_level))
+            for class_name, node in file_classes.items():
+                if (module, class_name, str(path)) not in test_classes:
+                    continue
+                # Same-file base classes contribute their references and browser usage
+                lineage, pending = {class_name}, [node]
+                while pending:
+                    for base in _base_names(pending.pop()) & file_classes.keys() - lineage:
+                        lineage.add(base)
+                        pending.append(file_classes[base])
+                references = helper_references | file_references
+                browser = False
+                for name in lineage:
+                    references |= _model_references(file_classes[name])
+                    source = ast.unparse(file_classes[name])
+                    browser = browser or any(marker in source for marker in BROWSER_MARKERS)
+                browser = browser or any(any(marker in base for marker in BROWSER_MARKERS) for base in _base_names(node))
+                depends = closure | set().union(*(model_files.get(model, set()) for model in references))
+                classes[f"{module}:{class_name}"] = {
+                    "file": str(path),
+                    "browser": browser,
+                    "depends": sorted(str(dependency) for dependency in depends),
+                }
+
+    return {
+        "version": MAP_VERSION,
+        "built_at": time.time(),
+        "addons_dir": str(addons_dir),
+        "modules": sorted(module_files),
+        "source_count": len(trees),
+        "classes": classes,
+    }
+
+
+def _is_stale(impact_map: dict, addons_dir: Path) -> bool:
+    if impact_map.get("version") != MAP_VERSION or impact_map.get("addons_dir") != str(addons_dir):
+        return True
+    sources = [path for files in _module_files(addons_dir).values() for path in files]
+    if len(sources) != impact_map.get("source_count"):
+        return True
+    built_at = impact_map.get("built_at", 0)
+    return any(path.stat().st_mtime > built_at for path in sources)
+
+
+def save_impact_map(impact_map: dict, path: Path = IMPACT_MAP_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(impact_map, indent=1))
+    temporary.replace(path)
+
+
+def load_impact_map(addons_dir: Path = Path("addons"), path: Path = IMPACT_MAP_PATH) -> dict:
+    """Load the persisted map, rebuilding (and saving) it when missing or stale."""
+    try:
+        impact_map = json.loads(path.read_text())
+    except (OSError, ValueError):
+        impact_map = None
+    if impact_map is None or _is_stale(impact_map, addons_dir):
+        impact_map = build_impact_map(addons_dir)
+        save_impact_map(impact_map, path)
+    return impact_map
+
+
+def select_affected(impact_map: dict, changed: list[str]) -> ChangeImpact:
+    """Test classes that exercise any of the changed files.
+
+    Python files no test depends on, and non-python module files (views, data,
+    manifest), conservatively select the whole module; static assets only select
+    its browser-based classes.
+    """
+    impact = ChangeImpact(changed_files=changed)
+    addons_prefix = Path(impact_map["addons_dir"]).as_posix().rstrip("/") + "/"
+    modules = set(impact_map["modules"])
+    dependents: dict[str, list[str]] = {}
+    for class_key, entry in impact_map["classes"].items():
+        for dependency in entry["depends"]:
+            dependents.setdefault(Path(dependency).as_posix(), []).append(class_key)
+
+    def select(class_keys: list[str], changed_file: str) -> None:
+        for class_key in class_keys:
+            impact.affected_classes.add(class_key)
+            impact.reasons.setdefault(class_key, []).append(changed_file)
+
+    for changed_file in changed:
+        if not changed_file.startswith(addons_prefix):
+            continue
+        module, _, module_path = changed_file.removeprefix(addons_prefix).partition("/")
+        if module not in modules:
+            continue
+        module_classes = [class_key for class_key in impact_map["classes"] if class_key.startswith(f"{module}:")]
+        if changed_file in dependents:
+            select(dependents[changed_file], changed_file)
+        elif module_path.startswith("static/"):
+            select([class_key for class_key in module_classes if impact_map["classes"][class_key]["browser"]], changed_file)
+        else:
+            if changed_file.endswith(".py"):
+                impact.unmapped_files.append(changed_file)
+            select(module_classes, changed_file)
+    return impact
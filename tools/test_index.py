@@ -0,0 +1,246 @@
+"""Persistent AST index of the addon tests: module → class → methods, tags and file.
+
+Built with `ast` from every python file under addons/<module>/tests/, and
+kept in tmp/tests/test_index.json. On load only files whose mtime or size
+changed are re-parsed, and removed files are dropped. The index is cheap enough
+to consult for every lookup (test plans, shard discovery, test statistics).
+
+Tags come from the @tagged(...) decorators. String arguments are taken as is.
+Starred constants (@tagged(*UNIT_TAGS)) are resolved from the list/tuple
+constants defined in the module's test files. An unresolved <NAME>_TAGS falls
+back to the <name>_test convention. Tags are combined as odoo.tests.tagged
+does, starting from the tags of a base class indexed in the same module.
+
+A test class is any class under tests/, whatever its file or class name, that
+defines test methods, or whose base classes reach one of Odoo's test cases
+and give it test methods to run (ProductConnectJSTests, fixtures.py cases, ...).
+Base classes are looked up in the same module first, then in every indexed one.
+"""
+
+import ast
+import json
+from pathlib import Path
+
+TEST_INDEX_PATH = Path("tmp/tests/test_index.json")
+INDEX_VERSION = 2
+CATEGORY_TAGS = ("unit_test", "integration_test", "tour_test", "validation_test")
+DEFAULT_TAGS = ("standard", "at_install")  # odoo.tests.BaseCase.test_tags
+ODOO_TEST_BASES = frozenset({"BaseCase", "TransactionCase", "SingleTransactionCase", "SavepointCase", "HttpCase", "TestCase"})
+
+
+def _string_values(node: ast.AST) -> list[str] | None:
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)) and all(
+        isinstance(element, ast.Constant) and isinstance(element.value, str) for element in node.elts
+    ):
+        return [element.value for element in node.elts]
+    return None
+
+
+def _decorator_tags(decorators: list[ast.expr]) -> list[str] | None:
+    """Raw tags of a @tagged decorator: strings, and "*NAME" for starred constants. None without one."""
+    for decorator in decorators:
+        if not isinstance(decorator, ast.Call):
+            continue
+        function = decorator.func
+        name = function.id if isinstance(function, ast.Name) else function.attr if isinstance(function, ast.Attribute) else ""
+        if name != "tagged":
+            continue
+        tags = []
+        for argument in decorator.args:
+            if isinstance(argument, ast.Constant) and isinstance(argument.value, str):
+                tags.append(argument.value)
+            elif isinstance(argument, ast.Starred):
+                target = argument.value
+                if isinstance(target, ast.Name):
+                    tags.append(f"*{target.id}")
+                elif isinstance(target, ast.Attribute):
+                    tags.append(f"*{target.attr}")
+                elif (values := _string_values(target)) is not None:
+                    tags.extend(values)
+        return tags
+    return None
+
+
+def parse_test_file(path: Path) -> dict:
+    """Index entry for one file: its string-list constants and classes (line, bases, tags, test methods)."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8", errors="ignore"), filename=str(path))
+    except (SyntaxError, ValueError, OSError):
+        return {"constants": {}, "classes": {}}
+    constants = {}
+    classes = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and (values := _string_values(node.value)) is not None:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = values
+        elif isinstance(node, ast.ClassDef):
+            methods = {}
+            for statement in node.body:
+                if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)) and statement.name.startswith("test"):
+                    methods[statement.name] = {"line": statement.lineno}
+            classes[node.name] = {
+                "line": node.lineno,
+                "bases": [
+                    base.id if isinstance(base, ast.Name) else base.attr
+                    for base in node.bases
+                    if isinstance(base, (ast.Name, ast.Attribute))
+                ],
+                "tags": _decorator_tags(node.decorator_list),
+                "methods": methods,
+            }
+    return {"constants": constants, "classes": classes}
+
+
+class TestIndex:
+    def __init__(self, data: dict) -> None:
+        self.data = data
+
+    @classmethod
+    def load(cls, addons_dir: Path = Path("addons"), path: Path = TEST_INDEX_PATH) -> "TestIndex":
+        """Load the index, re-parsing only changed test files (and saving when anything changed)."""
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != INDEX_VERSION or data.get("addons_dir") != str(addons_dir):
+            data = {"version": INDEX_VERSION, "addons_dir": str(addons_dir), "files": {}}
+        cached_files = data["files"]
+        files = {}
+        changed = False
+        for manifest in sorted(addons_dir.glob("*/__manifest__.py")):
+            tests_dir = manifest.parent / "tests"
+            if not tests_dir.is_dir():
+                continue
+            for test_file in sorted(tests_dir.rglob("*.py")):
+                try:
+                    stat = test_file.stat()
+                except OSError:
+                    continue
+                key = str(test_file)
+                entry = cached_files.get(key)
+                if not entry or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                    entry = {
+                        "module": manifest.parent.name,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "size": stat.st_size,
+                        **parse_test_file(test_file),
+                    }
+                    changed = True
+                files[key] = entry
+        if changed or files.keys() != cached_files.keys():
+            data["files"] = files
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_suffix(".tmp")
+                temporary.write_text(json.dumps(data))
+                temporary.replace(path)
+            except OSError:
+                pass
+        return cls(data)
+
+    def _module_files(self, module: str) -> dict[str, dict]:
+        return {file: entry for file, entry in self.data["files"].items() if entry["module"] == module}
+
+    def modules(self) -> list[str]:
+        return sorted({entry["module"] for entry in self.data["files"].values()})
+
+    def test_files(self, module: str) -> list[str]:
+        return sorted({test_class["file"] for test_class in self.test_classes([module])})
+
+    def _expand(self, raw_tags: list[str], constants: dict[str, list[str]]) -> list[str]:
+        tags = []
+        for tag in raw_tags:
+            if not tag.startswith("*"):
+                tags.append(tag)
+            elif tag[1:] in constants:
+                tags.extend(constants[tag[1:]])
+            elif tag.endswith("_TAGS"):
+                # Unresolvable constant: the UNIT_TAGS → unit_test convention
+                tags.append(f"{tag[1:].removesuffix('_TAGS').lower()}_test")
+        return tags
+
+    def test_classes(self, modules: list[str] | None = None, tag: str | None = None) -> list[dict]:
+        """Test classes with their effective tags and test methods (own and inherited), optionally only those with `tag`.
+
+        Effective tags follow odoo.tests.tagged: the inherited tags (BaseCase's DEFAULT_TAGS when no
+        indexed base class is tagged) plus the included tags, minus the "-excluded" ones.
+        """
+        found = []
+        indexed_classes = {name: info for entry in self.data["files"].values() for name, info in entry["classes"].items()}
+        for module in modules if modules is not None else self.modules():
+            files = self._module_files(module)
+            constants = {name: values for entry in files.values() for name, values in entry["constants"].items()}
+            classes = {name: info for entry in files.values() for name, info in entry["classes"].items()}
+
+            def class_tags(name: str, seen: frozenset = frozenset()) -> set[str]:
+                info = classes[name]
+                inherited = next(
+                    (class_tags(base, seen | {name}) for base in info["bases"] if base in classes and base not in seen),
+                    set(DEFAULT_TAGS),
+                )
+                if info["tags"] is None:
+                    return inherited
+                tags = self._expand(info["tags"], constants)
+                return (inherited | {tag for tag in tags if not tag.startswith("-")}) - {
+                    tag[1:] for tag in tags if tag.startswith("-")
+                }
+
+            def lineage(name: str) -> list[dict]:
+                """The class and its indexed base classes, nearest first."""
+                infos, pending, seen = [], [name], set()
+                while pending:
+                    current = pending.pop(0)
+                    info = classes.get(current) or indexed_classes.get(current)
+                    if current in seen or info is None:
+                        continue
+                    seen.add(current)
+                    infos.append(info)
+                    pending.extend(info["bases"])
+                return infos
+
+            for file, entry in sorted(files.items()):
+                for class_name, info in entry["classes"].items():
+                    ancestors = lineage(class_name)
+                    methods = {}
+                    for ancestor in ancestors:
+                        for method, method_info in ancestor["methods"].items():
+                            methods.setdefault(method, method_info["line"])
+                    reaches_test_case = any(base in ODOO_TEST_BASES for ancestor in ancestors for base in ancestor["bases"])
+                    # Base classes without any test method (fixtures, helpers) run nothing of their own
+                    if not info["methods"] and not (reaches_test_case and methods):
+                        continue
+                    tags = class_tags(class_name)
+                    if tag and tag not in tags:
+                        continue
+                    found.append(
+                        {
+                            "module": module,
+                            "class": class_name,
+                            "file": file,
+                            "line": info["line"],
+                            "tags": sorted(tags),
+                            "methods": methods,
+                        }
+                    )
+        return found
+
+    def category_summary(self, module: str) -> dict[str, dict[str, int]]:
+        """Files, classes and test methods per category tag. A file counts for the first category
+        (in CATEGORY_TAGS order) one of its classes carries, or validation_test by its name."""
+        summary = {category: {"files": 0, "classes": 0, "methods": 0} for category in CATEGORY_TAGS}
+        file_categories: dict[str, str] = {}
+        for test_class in self.test_classes([module]):
+            for category in CATEGORY_TAGS:
+                if category in test_class["tags"]:
+                    summary[category]["classes"] += 1
+                    summary[category]["methods"] += len(test_class["methods"])
+                    current = file_categories.get(test_class["file"])
+                    if current is None or CATEGORY_TAGS.index(category) < CATEGORY_TAGS.index(current):
+                        file_categories[test_class["file"]] = category
+        for file in self.test_files(module):
+            if file not in file_categories and "validation" in Path(file).name.lower():
+                file_categories[file] = "validation_test"
+        for category in file_categories.values():
+            summary[category]["files"] += 1
+        return summary
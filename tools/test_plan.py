@@ -0,0 +1,237 @@
+"""Compile test selections into exact test plans before odoo-bin is started.
+
+A selection is what a user or a category run asks for: an Odoo --test-tags
+expression (`unit_test/product_connect`, `/product_connect:TestFoo.test_bar`,
+`-/mod:TestSlow`, ...) or one of the runner's shorthands:
+
+- `test_foo`: a bare test method, looked up in every module in scope
+- `TestFoo` / `TestFoo.test_bar`: a test class (and method) in any module in scope
+- `module:TestFoo[.test_bar]`: a class in the given module
+
+Each comma-separated spec is resolved against the AST test index
+(tools.test_index) with odoo.tests.tag_selector semantics. Include specs are
+united, exclude specs are subtracted, an include without a tag requires
+"standard", and only exclusions means "standard". The result is the set of
+indexed classes and methods that will run, used to validate and count. Unknown
+classes and methods, and names that exist in several modules, raise
+TestPlanError in milliseconds instead of after a full Odoo boot reporting
+"0 tests". Specs naming a module outside the index (Odoo core addons) cannot be
+checked and are forwarded unchanged.
+
+The compiled --test-tags is the selection as given, with shorthands spelled
+out as /module:Class[.method], so Odoo still selects by tag and also runs
+classes the index misses. Only a plan restricted to some of its classes (a
+shard) names every class explicitly. The plan's classes are the unit of sharding.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from tools.test_index import TestIndex
+
+# odoo.tests.tag_selector.TagsSelector.filter_spec_re, without test parameters
+FILTER_SPEC_PATTERN = re.compile(r"^([+-]?)(\*|[\w-]*)(?:/([\w.]*))?(?::(\w*))?(?:\.(\w*))?$")
+BARE_METHOD_PATTERN = re.compile(r"^test_\w+$")
+BARE_CLASS_PATTERN = re.compile(r"^(Test\w*)(?:\.(\w+))?$")
+MODULE_CLASS_PATTERN = re.compile(r"^(\w+):(\w+)(?:\.(\w+))?$")
+
+
+class TestPlanError(ValueError):
+    pass
+
+
+@dataclass
+class TestSpec:
+    exclude: bool = False
+    tag: str | None = None
+    module: str | None = None
+    class_name: str | None = None
+    method: str | None = None
+    shorthand: bool = False  # Written as a runner shorthand, not as an Odoo spec
+
+
+@dataclass
+class TestPlan:
+    expression: str
+    # (module, class) → selected methods, or None for the whole class; in discovery order
+    selection: dict[tuple[str, str], list[str] | None] = field(default_factory=dict)
+    # (module, class) → methods excluded from a whole-class selection
+    excluded_methods: dict[tuple[str, str], list[str]] = field(default_factory=dict)
+    class_info: dict[tuple[str, str], dict] = field(default_factory=dict)
+    passthrough: list[str] = field(default_factory=list)  # Specs outside the index, forwarded unvalidated
+    warnings: list[str] = field(default_factory=list)
+    specs: list[str] | None = None  # --test-tags specs; None names the selected classes explicitly
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.selection and not self.passthrough
+
+    def test_ids(self) -> list[str]:
+        """Every selected test as /module:Class.method (indexed methods of whole classes)."""
+        test_ids = []
+        for (module, class_name), methods in self.selection.items():
+            if methods is None:
+                excluded = self.excluded_methods.get((module, class_name), [])
+                methods = [method for method in self.class_info[(module, class_name)]["methods"] if method not in excluded]
+            for method in methods:
+                test_ids.append(f"/{module}:{class_name}.{method}")
+        return test_ids
+
+    def classes(self) -> list[dict[str, str]]:
+        return [
+            {"module": module, "class": class_name, "file": self.class_info[(module, class_name)]["file"]}
+            for module, class_name in self.selection
+        ]
+
+    def modules(self) -> list[str]:
+        return list(dict.fromkeys(module for module, _class_name in self.selection))
+
+    def restricted_to(self, classes: list[dict[str, str]]) -> "TestPlan":
+        """The part of this plan covering `classes` (e.g. one shard)."""
+        keys = [(test_class["module"], test_class["class"]) for test_class in classes]
+        return TestPlan(
+            self.expression,
+            {key: self.selection[key] for key in keys},
+            {key: self.excluded_methods[key] for key in keys if key in self.excluded_methods},
+            self.class_info,
+        )
+
+    def test_tags(self) -> str:
+        if self.specs is not None:
+            return ",".join(self.specs)
+        specs = []
+        for (module, class_name), methods in self.selection.items():
+            # "*": the class is already selected, so Odoo must not require "standard" of it again
+            if methods is None:
+                specs.append(f"*/{module}:{class_name}")
+                specs.extend(f"-/{module}:{class_name}.{method}" for method in self.excluded_methods.get((module, class_name), []))
+            else:
+                specs.extend(f"*/{module}:{class_name}.{method}" for method in methods)
+        return ",".join(specs + self.passthrough)
+
+    def describe(self) -> str:
+        described = f"{len(self.test_ids())} tests in {len(self.selection)} classes"
+        if self.passthrough:
+            described += f" + unchecked {','.join(self.passthrough)}"
+        return described
+
+
+def _parse_spec(raw_spec: str, index: TestIndex, modules: list[str]) -> TestSpec:
+    """Parse one spec, turning the runner's shorthands into exact class/method specs."""
+    if BARE_METHOD_PATTERN.match(raw_spec):
+        owners = [test_class for test_class in index.test_classes(modules) if raw_spec in test_class["methods"]]
+        if not owners:
+            raise TestPlanError(f"No test method {raw_spec} in {', '.join(modules) or 'any module'}")
+        if len(owners) > 1:
+            names = ", ".join(f"{owner['module']}:{owner['class']}" for owner in owners)
+            raise TestPlanError(f"Test method {raw_spec} is ambiguous ({names}) - use Class.{raw_spec}")
+        return TestSpec(module=owners[0]["module"], class_name=owners[0]["class"], method=raw_spec, shorthand=True)
+    if match := BARE_CLASS_PATTERN.match(raw_spec):
+        class_name, method = match.groups()
+        owners = sorted({test_class["module"] for test_class in index.test_classes(modules) if test_class["class"] == class_name})
+        if not owners:
+            raise TestPlanError(f"No test class {class_name} in {', '.join(modules) or 'any module'}")
+        if len(owners) > 1:
+            raise TestPlanError(f"Test class {class_name} is ambiguous ({', '.join(owners)}) - use module:{raw_spec}")
+        return TestSpec(module=owners[0], class_name=class_name, method=method, shorthand=True)
+    if match := MODULE_CLASS_PATTERN.match(raw_spec):
+        module, class_name, method = match.groups()
+        return TestSpec(module=module, class_name=class_name, method=method, shorthand=True)
+    match = FILTER_SPEC_PATTERN.match(raw_spec)
+    if not match:
+        raise TestPlanError(f"Invalid test tag spec {raw_spec!r} (expected [-][tag][/module][:Class][.method])")
+    operator, tag, module, class_name, method = match.groups()
+    return TestSpec(
+        exclude=operator == "-", tag=tag or None, module=module or None, class_name=class_name or None, method=method or None
+    )
+
+
+def _format_spec(spec: TestSpec) -> str:
+    formatted = f"{'-' if spec.exclude else ''}{spec.tag or ''}/{spec.module}"
+    if spec.class_name:
+        formatted += f":{spec.class_name}"
+    return f"{formatted}.{spec.method}" if spec.method else formatted
+
+
+def _matches(spec: TestSpec, test_class: dict, check_tag: bool = True) -> bool:
+    # As in odoo.tests.tag_selector, an include spec without a tag (/module:Class) only selects "standard" tests
+    tag = spec.tag or (None if spec.exclude else "standard")
+    return (
+        (not check_tag or tag in (None, "*") or tag in test_class["tags"])
+        and spec.module in (None, test_class["module"])
+        and spec.class_name in (None, test_class["class"])
+    )
+
+
+def compile_test_plan(index: TestIndex, expression: str, modules: list[str] | None = None) -> TestPlan:
+    """Resolve a selection over `modules` (default: every indexed module) into a TestPlan.
+
+    An expression that matches nothing gives an empty plan (see TestPlan.is_empty); unknown
+    or ambiguous names and malformed specs raise TestPlanError.
+    """
+    indexed_modules = set(index.modules())
+    if not indexed_modules:
+        # No addons tree to check against: forward the selection as given
+        specs = [spec.strip() for spec in expression.split(",") if spec.strip()]
+        return TestPlan(expression, passthrough=specs, specs=specs)
+    scope = [module for module in modules if module in indexed_modules] if modules is not None else sorted(indexed_modules)
+    plan = TestPlan(expression, specs=[])
+    includes, excludes = [], []
+    for raw_spec in (spec.strip() for spec in expression.split(",")):
+        if not raw_spec:
+            continue
+        spec = _parse_spec(raw_spec, index, scope)
+        plan.specs.append(_format_spec(spec) if spec.shorthand else raw_spec)
+        if spec.module and spec.module not in indexed_modules:
+            plan.passthrough.append(_format_spec(spec))
+            continue
+        (excludes if spec.exclude else includes).append((raw_spec, spec))
+    if not includes and (excludes or not plan.passthrough):
+        includes = [("standard", TestSpec(tag="standard"))]
+
+    candidates = index.test_classes(sorted({spec.module for _raw, spec in includes if spec.module} | set(scope)))
+    plan.class_info = {(test_class["module"], test_class["class"]): test_class for test_class in candidates}
+    for raw_spec, spec in includes:
+        matched = [test_class for test_class in candidates if _matches(spec, test_class)]
+        if spec.class_name and not matched:
+            named = [test_class for test_class in candidates if _matches(spec, test_class, check_tag=False)]
+            if not named:
+                raise TestPlanError(f"No test class {spec.class_name} in {spec.module or ', '.join(scope)} (from {raw_spec!r})")
+            plan.warnings.append(f"{spec.class_name} is not tagged {spec.tag or 'standard'}, so {raw_spec!r} selects none of it")
+        for test_class in matched:
+            key = (test_class["module"], test_class["class"])
+            if spec.method is None:
+                plan.selection[key] = None
+                continue
+            if spec.method not in test_class["methods"]:
+                if spec.class_name:
+                    # Possibly inherited from a base class outside the index; Odoo will tell
+                    plan.warnings.append(f"{test_class['class']} does not define {spec.method} itself")
+                else:
+                    continue
+            if key not in plan.selection or plan.selection[key] is not None:
+                methods = plan.selection.setdefault(key, [])
+                if spec.method not in methods:
+                    methods.append(spec.method)
+
+    for _raw_spec, spec in excludes:
+        for test_class in candidates:
+            key = (test_class["module"], test_class["class"])
+            if key not in plan.selection or not _matches(spec, test_class):
+                continue
+            if spec.method is None:
+                del plan.selection[key]
+                continue
+            methods = plan.selection[key]
+            if methods is None:
+                # The whole class stays selected; Odoo applies the exclusion to it
+                excluded = plan.excluded_methods.setdefault(key, [])
+                if spec.method not in excluded:
+                    excluded.append(spec.method)
+                continue
+            remaining = [method for method in methods if method != spec.method]
+            if remaining:
+                plan.selection[key] = remaining
+            else:
+                del plan.selection[key]
+    return plan
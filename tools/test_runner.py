@@ -7,11 +7,51 @@ import json
 import socket
 import random
 import shutil
-import select
+import copy
+import sqlite3
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from dataclasses import dataclass, asdict
-from typing import Any
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable
+
+from tools.log_classifier import TEST_STARTED_PATTERN, Classification, LogClassifier
+from tools.process_stream import ProcessOutcome, WatchedProcess, watch_processes
+from tools.asset_cache import EXPORT_BUNDLES_SQL, PREGENERATE_SCRIPT, bundle_rows, insert_bundles_sql, run_asset_cache
+from tools.browser_pool import ensure_browser_pool, install_browser_shims, summarize_browser_pool, with_browser_pool
+from tools.container_cleanup import (
+    BROWSER_PROCESS_PATTERNS,
+    ODOO_PROCESS_PATTERNS,
+    TEST_PROCESS_PATTERNS,
+    run_container_cleanup,
+    summarize_cleanup,
+)
+from tools.db_admin import DatabaseAdmin, DatabaseAdminError, get_db_admin
+from tools.db_clone import SnapshotCloneBackend, TemplateCloneBackend, create_clone_backend
+from tools.db_pool import create_db_pool
+from tools.db_reuse import DatabaseReuse
+from tools.docker_api import DockerAPIError, DockerUnavailable, container_exec, get_docker_client
+from tools.filestore import cleanup_filestore_script, filestore_path, provision_filestore_script
+from tools.test_durations import STARTUP_KIND, TestDurationStore
+from tools.test_events import EVENTS_FILE_NAME, EventLog, follow_events, format_event, latest_run_dir
+from tools.test_index import TestIndex
+from tools.test_plan import TestPlan, TestPlanError, compile_test_plan
+from tools.tour_trace import TRACE_DIR_ENV, TRACE_FILE_NAME, TRACE_ROOT, attribute_sessions, collect_tour_traces, summarize_tour_trace
+from tools.test_impact import ChangeImpact, build_impact_map, changed_files, load_impact_map, save_impact_map, select_affected
+
+
+UNIT_TEMPLATE_MODULES = "base,product_connect"
+TEST_DAEMON_CONTAINER_PATH = "/volumes/data/test-daemon/test_daemon.py"
+TOUR_CHROMIUM_FLAGS = (
+    "--headless=new --no-sandbox --disable-gpu --disable-dev-shm-usage --disable-software-rasterizer --window-size=1920,1080 "
+    "--no-first-run --no-default-browser-check --disable-web-security "
+    "--disable-features=VizDisplayCompositor,TranslateUI,site-per-process,IsolateOrigins,BlockInsecurePrivateNetworkRequests "
+    "--virtual-time-budget=30000 --run-all-compositor-stages-before-draw --disable-background-timer-throttling "
+    "--disable-renderer-backgrounding --disable-backgrounding-occluded-windows --disable-extensions --disable-plugins "
+    "--disable-sync --disable-web-bluetooth --disable-web-usb"
+)
 
 
 @dataclass
@@ -86,6 +126,13 @@ class CallerDetector:
 
 
 class OutputManager:
+    # Log appends are buffered and progress/heartbeat snapshots are coalesced on a
+    # timer instead of being rewritten for every line of (very verbose) Odoo output.
+    LOG_FLUSH_INTERVAL = 0.5  # seconds between log file flushes
+    SNAPSHOT_INTERVAL = 1.0  # seconds between progress.json/heartbeat.json rewrites
+    LOG_BUFFER_SIZE = 64 * 1024
+    LINES_PER_SECOND_BUDGET = 20000  # minimum processing capacity before we flag overhead
+
     def __init__(self, output_dir: Path, caller_type: str = "human") -> None:
         self.output_dir = output_dir
         self.caller_type = caller_type
@@ -96,76 +143,90 @@ class OutputManager:
         self.summary_file = output_dir / "summary.json"
         self.progress_file = output_dir / "progress.json"
         self.heartbeat_file = output_dir / "heartbeat.json"
+        self.events_file = output_dir / EVENTS_FILE_NAME
 
-        self.streaming_handle = open(self.streaming_log, "w", buffering=1)
-        self.full_handle = open(self.full_log, "w", buffering=1)
+        self.streaming_handle = open(self.streaming_log, "w", buffering=self.LOG_BUFFER_SIZE)
+        self.full_handle = open(self.full_log, "w", buffering=self.LOG_BUFFER_SIZE)
 
         self.progress = TestProgress()
         self.last_heartbeat = time.time()
+        # Append-only events (tools/test_events.py), flushed with the logs
+        self.events = EventLog(self.events_file)
+        self._event_phase = self.progress.phase
 
-        self.test_patterns = {
-            "test_start": re.compile(r"(Starting|Running test|Testing) (.+)"),
-            "test_class_start": re.compile(r"Starting (Test\w+)"),
-            "test_method_start": re.compile(r"Starting .*\.(test_\w+)"),
-            "test_complete": re.compile(r"(PASS|FAIL|ERROR|OK|FAILED): (.+)"),
-            "test_ok": re.compile(r"test_\w+.*\.\.\. ok"),
-            "test_failed": re.compile(r"test_\w+.*\.\.\. FAIL"),
-            "test_error": re.compile(r"test_\w+.*\.\.\. ERROR"),
-            "phase_change": re.compile(r"(Loading|Installing|Testing|Finalizing|Initializing)"),
-            "module_loading": re.compile(r"odoo: modules loaded"),
-            "registry_ready": re.compile(r"registry loaded in"),
-            "tour_start": re.compile(r"Starting tour: (.+)"),
-            "browser_error": re.compile(r"(Console error:|Browser error:|JavaScript error:|UncaughtPromiseError|OwlError)"),
-            "js_test_start": re.compile(r"Starting (ProductConnectJSTests|.*HttpCase|.*test_hoot)"),
-            "hoot_test": re.compile(r"\[HOOT]"),
-        }
+        # Flush/snapshot scheduling and throughput accounting
+        self._last_log_flush = time.monotonic()
+        self._last_snapshot = 0.0
+        self._write_depth = 0
+        self.lines_written = 0
+        self.processing_seconds = 0.0
+
+        self.log_classifier = LogClassifier()
 
         self.tests_seen = set()
 
-        self.critical_error_patterns = {
-            "db_constraint": re.compile(r"(violates check constraint|IntegrityError|bad query:|psycopg2\..*Error)"),
-            "module_error": re.compile(
-                r"(Failed to load registry|Failed to initialize database|TypeError: Model|AttributeError:.*models)"
-            ),
-            "critical_exception": re.compile(r"(CRITICAL|FATAL|OperationalError:)"),
-            "port_conflict": re.compile(r"(Address already in use|Port.*is in use|bind.*failed|Cannot bind)"),
-            "access_error": re.compile(r"(odoo\.exceptions\.AccessError|AccessError:|You are not allowed to)"),
-            "validation_error": re.compile(r"(odoo\.exceptions\.ValidationError|ValidationError:|UserError:)"),
-            "missing_dependency": re.compile(r"(ModuleNotFoundError:|ImportError:.*No module named|unmet dependencies)"),
-            "test_discovery": re.compile(r"(No tests? found|0 tests? collected|ImportError.*test_)"),
-        }
+        self._expected_error_test: tuple[str | None, bool, bool] = (None, False, False)
 
         self.critical_error_detected = False
         self.critical_error_details = None
 
-    def write_line(self, line: str):
-        timestamp = datetime.now().isoformat()
-        timestamped_line = f"[{timestamp}] {line}"
+    def write_line(self, line: str) -> None:
+        started = time.perf_counter()
+        self._write_depth += 1
+        try:
+            timestamped_line = f"[{datetime.now().isoformat()}] {line}\n"
 
-        self.full_handle.write(timestamped_line + "\n")
-        self.full_handle.flush()
+            self.full_handle.write(timestamped_line)
+            self.streaming_handle.write(timestamped_line)
 
-        if self.caller_type == "human":
-            self.streaming_handle.write(timestamped_line + "\n")
-            self.streaming_handle.flush()
-            print(line.rstrip())
-            sys.stdout.flush()
-        else:
-            self.streaming_handle.write(timestamped_line + "\n")
-            self.streaming_handle.flush()
+            if self.caller_type == "human":
+                print(line.rstrip())
+
+            progress_match, critical_match = self.log_classifier.classify(line)
+            self._update_progress(line, progress_match)
+            self._check_critical_errors(line, critical_match)
+        finally:
+            self._write_depth -= 1
 
-        self._update_progress(line)
-        self._update_heartbeat()
+        # Only account top-level lines (progress banners call write_line recursively)
+        if self._write_depth == 0:
+            self.lines_written += 1
+            self.processing_seconds += time.perf_counter() - started
+            self.tick()
 
-        self._check_critical_errors(line)
+    def tick(self, force: bool = False) -> None:
+        """Flush buffered logs and write progress/heartbeat snapshots when due.
 
-    def _update_progress(self, line: str) -> None:
+        Called after every line and from the runner's idle loop, so the heartbeat
+        stays fresh even while the test process is silent.
+        """
+        now = time.monotonic()
+        if force or now - self._last_log_flush >= self.LOG_FLUSH_INTERVAL:
+            self.full_handle.flush()
+            self.streaming_handle.flush()
+            self.events.flush()
+            if self.caller_type == "human":
+                sys.stdout.flush()
+            self._last_log_flush = now
+        if force or now - self._last_snapshot >= self.SNAPSHOT_INTERVAL:
+            self._write_progress()
+            self._update_heartbeat()
+            self._last_snapshot = now
+
+    @property
+    def lines_per_second(self) -> float:
+        """Measured processing capacity of write_line (lines per CPU-second spent in it)."""
+        if not self.processing_seconds:
+            return 0.0
+        return self.lines_written / self.processing_seconds
+
+    def _update_progress(self, line: str, classification: Classification | None) -> None:
         current_time = time.time()
 
         self.progress.output_lines_since_test += 1
 
         if "Starting" in line and ("test_" in line or "Test" in line):
-            test_match = re.search(r"Starting ([\w\.]+(?:test_\w+|Test\w+))", line)
+            test_match = TEST_STARTED_PATTERN.search(line)
             if test_match:
                 test_name = test_match.group(1)
                 if test_name not in self.tests_seen:
@@ -177,39 +238,40 @@ class OutputManager:
                     if self.progress.tests_started % 10 == 0:
                         self.write_line(f"✅ Progress: {self.progress.tests_started} tests started")
 
-        for pattern_name, pattern in self.test_patterns.items():
-            match = pattern.search(line)
-            if match:
-                if pattern_name in ["test_complete", "test_ok", "test_failed", "test_error"]:
-                    self.progress.tests_completed += 1
-                elif pattern_name == "phase_change":
-                    phase = match.group(1).lower()
-                    if phase != self.progress.phase:
-                        self.progress.phase = phase
-                elif pattern_name == "tour_start":
-                    self.progress.current_test = f"Tour: {match.group(1)}"
-                    self.progress.phase = "tour"
-                    self.progress.tests_started += 1
-                elif pattern_name == "js_test_start":
-                    self.progress.phase = "javascript_tests"
-                    self.progress.current_test = match.group(1)
-                    self.progress.tests_started += 1
-                    # Log JS test detection
-                    self.write_line("")
-                    self.write_line("=" * 80)
-                    self.write_line("🌐 JavaScript/Hoot tests detected - these may take up to 30 minutes")
-                    self.write_line("   Browser tests have extended timeouts, please be patient...")
-                    self.write_line("=" * 80)
-                    self.write_line("")
-                elif pattern_name == "hoot_test":
-                    self.progress.phase = "hoot_tests"
-                elif pattern_name == "module_loading":
-                    self.progress.phase = "modules_loaded"
-                elif pattern_name == "registry_ready":
-                    self.progress.phase = "ready_for_tests"
-                break
+        if classification:
+            pattern_name = classification.name
+            if pattern_name in ["test_complete", "test_ok", "test_failed", "test_error"]:
+                self.progress.tests_completed += 1
+            elif pattern_name == "phase_change":
+                phase = classification.value.lower()
+                if phase != self.progress.phase:
+                    self.progress.phase = phase
+            elif pattern_name == "tour_start":
+                self.progress.current_test = f"Tour: {classification.value}"
+                self.progress.phase = "tour"
+                self.progress.tests_started += 1
+            elif pattern_name == "js_test_start":
+                self.progress.phase = "javascript_tests"
+                self.progress.current_test = classification.value
+                self.progress.tests_started += 1
+                # Log JS test detection
+                self.write_line("")
+                self.write_line("=" * 80)
+                self.write_line("🌐 JavaScript/Hoot tests detected - these may take up to 30 minutes")
+                self.write_line("   Browser tests have extended timeouts, please be patient...")
+                self.write_line("=" * 80)
+                self.write_line("")
+            elif pattern_name == "hoot_test":
+                self.progress.phase = "hoot_tests"
+            elif pattern_name == "module_loading":
+                self.progress.phase = "modules_loaded"
+            elif pattern_name == "registry_ready":
+                self.progress.phase = "ready_for_tests"
 
         self.progress.last_update = current_time
+        if self.progress.phase != self._event_phase:
+            self.events.emit("phase_changed", phase=self.progress.phase, previous=self._event_phase)
+            self._event_phase = self.progress.phase
 
         if self.progress.output_lines_since_test < 100:
             base_threshold = 180
@@ -231,9 +293,6 @@ class OutputManager:
         self.progress.stall_threshold = threshold
         self.progress.is_stalled = (current_time - self.progress.last_update) > threshold
 
-        # Write progress update
-        self._write_progress()
-
     def _update_heartbeat(self) -> None:
         current_time = time.time()
         heartbeat_data = {
@@ -243,72 +302,381 @@ class OutputManager:
             "is_stalled": self.progress.is_stalled,
             "phase": self.progress.phase,
             "stall_threshold": self.progress.stall_threshold,
+            "lines_written": self.lines_written,
+            "lines_per_second": round(self.lines_per_second),
         }
-
-        with open(self.heartbeat_file, "w") as f:
-            json.dump(heartbeat_data, f, indent=2)
+        self._write_json_atomic(self.heartbeat_file, heartbeat_data)
 
     def _write_progress(self) -> None:
-        with open(self.progress_file, "w") as f:
-            json.dump(asdict(self.progress), f, indent=2)
+        self._write_json_atomic(self.progress_file, asdict(self.progress))
+
+    @staticmethod
+    def _write_json_atomic(path: Path, data: dict[str, Any]) -> None:
+        # Readers polling the file never observe a partially written snapshot
+        temporary_path = path.with_name(f".{path.name}.tmp")
+        with open(temporary_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        temporary_path.replace(path)
+
+    def _check_critical_errors(self, line: str, classification: Classification | None) -> None:
+        if not classification:
+            return
+        error_type = classification.name
 
-    def _check_critical_errors(self, line: str) -> None:
         # Skip errors in tests that are testing validation or error conditions
         if self.progress.current_test:
-            test_name = self.progress.current_test.lower()
-            # Check if this is a test that's expected to cause errors
-            if any(keyword in test_name for keyword in ["validation", "error", "constraint", "integrity", "invalid", "fail"]):
-                # Skip database constraint errors in these tests
-                if any(phrase in line.lower() for phrase in ["bad query", "null value", "constraint", "violates", "integrityerror", "error opw odoo.sql_db"]):
-                    return
+            expects_errors, is_integration = self._classify_current_test()
+            lowered_line = line.lower()
+            # Skip database constraint errors in these tests
+            if expects_errors and any(
+                phrase in lowered_line
+                for phrase in ["bad query", "null value", "constraint", "violates", "integrityerror", "error opw odoo.sql_db"]
+            ):
+                return
             # Also skip for integration tests that might be testing error conditions
-            if "integration" in test_name:
-                if any(phrase in line.lower() for phrase in ["bad query", "null value", "constraint", "violates"]):
-                    return
+            if is_integration and any(phrase in lowered_line for phrase in ["bad query", "null value", "constraint", "violates"]):
+                return
 
-        for error_type, pattern in self.critical_error_patterns.items():
-            if pattern.search(line):
-                self.critical_error_detected = True
-                self.critical_error_details = {
-                    "type": error_type,
-                    "line": line,
-                    "timestamp": datetime.now().isoformat(),
-                    "current_test": self.progress.current_test,
-                    "phase": self.progress.phase,
-                }
-
-                critical_error_file = self.output_dir / "critical_error.txt"
-                with open(critical_error_file, "w") as f:
-                    f.write("🚨 CRITICAL ERROR DETECTED 🚨\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(f"Type: {error_type}\n")
-                    f.write(f"Phase: {self.progress.phase}\n")
-                    f.write(f"Current Test: {self.progress.current_test}\n")
-                    f.write(f"Timestamp: {self.critical_error_details['timestamp']}\n")
-                    f.write(f"Error Line: {line}\n")
-                    f.write("=" * 80 + "\n")
-
-                error_banner = "\n" + "🚨" * 20 + "\n"
-                error_msg = f"{error_banner}CRITICAL ERROR DETECTED - TEST EXECUTION WILL STOP\nError Type: {error_type}\nError: {line}{error_banner}"
-
-                timestamp = datetime.now().isoformat()
-                for handle in [self.streaming_handle, self.full_handle]:
-                    handle.write(f"[{timestamp}] {error_msg}\n")
-                    handle.flush()
-
-                if self.caller_type == "human":
-                    print(error_msg)
-                    sys.stdout.flush()
-                break
+        self.critical_error_detected = True
+        self.critical_error_details = {
+            "type": error_type,
+            "line": line,
+            "timestamp": datetime.now().isoformat(),
+            "current_test": self.progress.current_test,
+            "phase": self.progress.phase,
+        }
+        self.events.emit(
+            "critical_error", flush=True, type=error_type, phase=self.progress.phase, test=self.progress.current_test, line=line
+        )
+
+        critical_error_file = self.output_dir / "critical_error.txt"
+        with open(critical_error_file, "w") as f:
+            f.write("🚨 CRITICAL ERROR DETECTED 🚨\n")
+            f.write("=" * 80 + "\n")
+            f.write(f"Type: {error_type}\n")
+            f.write(f"Phase: {self.progress.phase}\n")
+            f.write(f"Current Test: {self.progress.current_test}\n")
+            f.write(f"Timestamp: {self.critical_error_details['timestamp']}\n")
+            f.write(f"Error Line: {line}\n")
+            f.write("=" * 80 + "\n")
+
+        error_banner = "\n" + "🚨" * 20 + "\n"
+        error_msg = f"{error_banner}CRITICAL ERROR DETECTED - TEST EXECUTION WILL STOP\nError Type: {error_type}\nError: {line}{error_banner}"
+
+        timestamp = datetime.now().isoformat()
+        for handle in [self.streaming_handle, self.full_handle]:
+            handle.write(f"[{timestamp}] {error_msg}\n")
+            handle.flush()
+
+        if self.caller_type == "human":
+            print(error_msg)
+            sys.stdout.flush()
+
+    def _classify_current_test(self) -> tuple[bool, bool]:
+        # Cached per test name: returns (expects errors, is an integration test)
+        test_name, expects_errors, is_integration = self._expected_error_test
+        if test_name != self.progress.current_test:
+            lowered_name = self.progress.current_test.lower()
+            expects_errors = any(
+                keyword in lowered_name for keyword in ["validation", "error", "constraint", "integrity", "invalid", "fail"]
+            )
+            is_integration = "integration" in lowered_name
+            self._expected_error_test = (self.progress.current_test, expects_errors, is_integration)
+        return expects_errors, is_integration
 
     def close(self) -> None:
-        if hasattr(self, "streaming_handle"):
-            self.streaming_handle.close()
-        if hasattr(self, "full_handle"):
-            self.full_handle.close()
+        if self.full_handle.closed:
+            return
+        self.tick(force=True)
+        if self.lines_written >= 10000 and self.lines_per_second < self.LINES_PER_SECOND_BUDGET:
+            self.full_handle.write(
+                f"[{datetime.now().isoformat()}] ⚠️  Output processing ran at {self.lines_per_second:.0f} lines/s "
+                f"(budget {self.LINES_PER_SECOND_BUDGET} lines/s) over {self.lines_written} lines\n"
+            )
+        self.streaming_handle.close()
+        self.full_handle.close()
+        self.events.close()
+
+
+class StreamingResultParser:
+    """Builds TestResults incrementally from test output, one line at a time.
+
+    Replaces joining the whole run into one string and re-scanning it after the
+    process exits: only running totals, failures and the keyword lines of open
+    tracebacks/browser errors are kept, and each line is looked at once.
+    """
+
+    SUMMARY_PATTERN = re.compile(r"(\d+) failed, (\d+) error\(s\) of (\d+) tests")
+    RAN_PATTERN = re.compile(r"Ran (\d+) tests? in")
+    FAILED_COUNT_PATTERN = re.compile(r"FAILED \(.*?failures=(\d+)")
+    ERRORS_COUNT_PATTERN = re.compile(r"errors=(\d+)")
+    LOADING_ERROR_PATTERN = re.compile(r"(TypeError: Model.*|AttributeError:.*|ImportError:.*|.*Error:.*)")
+    FAILURE_PATTERN = re.compile(r"(FAIL|ERROR): (Test\w+\.test_\w+)")
+    FAILURE_END_PATTERN = re.compile(r"(?:FAIL|ERROR):")
+    BROWSER_ERROR_PATTERN = re.compile(r"Console error:|Browser error:|JavaScript error:|UncaughtPromiseError|OwlError")
+    LOG_RECORD_PATTERN = re.compile(r"\d{4}-")
+    TOUR_PATTERN = re.compile(r"tour", re.IGNORECASE)
+    TEST_REFERENCE_PATTERN = re.compile(r"test_", re.IGNORECASE)
+    IMPORT_ERROR_PATTERN = re.compile(r"ImportError: (.+)")
+    MODULE_NOT_FOUND_PATTERN = re.compile(r"ModuleNotFoundError: (.+)")
+    TOUR_STEP_MARKER = "Tour step failed: "
+    DETAIL_KEYWORDS = ("AssertionError:", "ERROR:", "DETAIL:", "TypeError:", "ReferenceError:", "Error:")
+    DISCOVERY_MARKERS = ("@tagged", "Starting Test", "INFO opw odoo.addons", "odoo.tests", "product_connect", "tests")
+    MAX_BROWSER_ERROR_LINES = 200
+    TEST_MODULE_PATTERN = re.compile(r"odoo\.addons\.(\w+)\.")
+    TEST_END_MARKERS = ("odoo.tests.stats:", " tests in ", " error(s) of ")  # module stats / run summary lines
+
+    def __init__(self, events: EventLog | None = None) -> None:
+        self.results = TestResults()
+        # test_started/test_finished go to the run's events.jsonl when given
+        self.events = events
+        # Per-test timings: a test runs from its "Starting" line to the next one (or the stats/summary line)
+        self.started_at = time.monotonic()
+        self.startup_seconds: float | None = None
+        self.test_durations: list[tuple[str, float]] = []
+        self.test_windows: list[tuple[str, float, float]] = []  # (test_id, wall-clock start, end), to match browser traces
+        self._current_test: tuple[str, float, float] | None = None
+        self._current_status = "passed"
+        self._last_line_at = self.started_at
+        self.loading_failed = False
+        self.first_error_line: str | None = None
+        self.ran_total: int | None = None
+        self.saw_failed = False
+        self.failed_count: int | None = None
+        self.errors_count: int | None = None
+
+        self.browser_context = False
+        self.browser_errors: list[str] = []
+        self.failed_tour_steps: list[str] = []
+        # Failed steps and browser errors per running test ("" outside any test), for tour-level results
+        self.test_issues: dict[str, dict[str, list[str]]] = {}
+        self._open_browser_error: tuple[str, list[str], str] | None = None
+        self._open_traceback: tuple[str, list[str]] | None = None
+
+        self.seen_markers: set[str] = set()
+        self._pending_markers = list(self.DISCOVERY_MARKERS)
+        self.saw_test_reference = False
+        self.import_error: str | None = None
+        self.module_not_found: str | None = None
+
+    def feed(self, line: str) -> None:
+        self._feed_test_timing(line)
+        if not self.loading_failed and ("Failed to load registry" in line or "Failed to initialize database" in line):
+            self.loading_failed = True
+        if self.first_error_line is None and ("Error:" in line):
+            error_match = self.LOADING_ERROR_PATTERN.search(line)
+            if error_match:
+                self.first_error_line = error_match.group(1).strip()
+
+        self._feed_totals(line)
+        self._feed_discovery_markers(line)
+
+        has_failure_marker = "FAIL:" in line or "ERROR:" in line
+        if has_failure_marker:
+            for match in self.FAILURE_PATTERN.finditer(line):
+                status, test_name = match.groups()
+                if status == "FAIL":
+                    self.results.failures.append(test_name)
+                else:
+                    self.results.errors_list.append(test_name)
+                if self._current_test and self._current_test[0].rpartition(":")[2] == test_name:
+                    self._current_status = "failed" if status == "FAIL" else "error"
+
+        self._feed_browser_errors(line)
+        if has_failure_marker:
+            self._feed_traceback(line)
+        elif self._open_traceback:
+            self._add_traceback_segment(line)
+
+    def _feed_test_timing(self, line: str) -> None:
+        now = self._last_line_at = time.monotonic()
+        if "Starting " in line:
+            started_match = TEST_STARTED_PATTERN.search(line)
+            if started_match:
+                self._close_test_timing(now)
+                if self.startup_seconds is None:
+                    self.startup_seconds = now - self.started_at
+                module_match = self.TEST_MODULE_PATTERN.search(line, 0, started_match.start())
+                test_name = started_match.group(1)
+                self._current_test = (f"{module_match.group(1)}:{test_name}" if module_match else test_name, now, time.time())
+                self._current_status = "passed"
+                if self.events:
+                    self.events.emit("test_started", test=self._current_test[0])
+                return
+        if self._current_test and any(marker in line for marker in self.TEST_END_MARKERS):
+            self._close_test_timing(now)
+
+    def _close_test_timing(self, ended_at: float) -> None:
+        if self._current_test:
+            test_id, started_at, wall_started_at = self._current_test
+            self._current_test = None
+            self.test_durations.append((test_id, ended_at - started_at))
+            self.test_windows.append((test_id, wall_started_at, wall_started_at + ended_at - started_at))
+            if self.events:
+                self.events.emit("test_finished", test=test_id, duration=round(ended_at - started_at, 3), status=self._current_status)
+
+    def abandon_current_test(self) -> None:
+        """Drop the timing of a test cut short by a stopped run - it never finished."""
+        if self._current_test and self.events:
+            test_id, started_at, _wall_started_at = self._current_test
+            self.events.emit("test_finished", test=test_id, duration=round(time.monotonic() - started_at, 3), status="stopped")
+        self._current_test = None
+
+    def _feed_totals(self, line: str) -> None:
+        if not self.results.summary and " tests" in line:
+            summary_match = self.SUMMARY_PATTERN.search(line)
+            if summary_match:
+                self.results.failed = int(summary_match.group(1))
+                self.results.errors = int(summary_match.group(2))
+                self.results.total = int(summary_match.group(3))
+                self.results.summary = summary_match.group()
+        if self.ran_total is None and "Ran " in line:
+            ran_match = self.RAN_PATTERN.search(line)
+            if ran_match:
+                self.ran_total = int(ran_match.group(1))
+        if "FAILED" in line:
+            self.saw_failed = True
+            if self.failed_count is None:
+                fail_match = self.FAILED_COUNT_PATTERN.search(line)
+                if fail_match:
+                    self.failed_count = int(fail_match.group(1))
+        if self.errors_count is None and "errors=" in line:
+            errors_match = self.ERRORS_COUNT_PATTERN.search(line)
+            if errors_match:
+                self.errors_count = int(errors_match.group(1))
+
+    def _feed_discovery_markers(self, line: str) -> None:
+        if self._pending_markers:
+            for marker in [marker for marker in self._pending_markers if marker in line]:
+                self.seen_markers.add(marker)
+                self._pending_markers.remove(marker)
+        if not self.saw_test_reference and self.TEST_REFERENCE_PATTERN.search(line):
+            self.saw_test_reference = True
+        if self.import_error is None and "ImportError: " in line:
+            import_match = self.IMPORT_ERROR_PATTERN.search(line)
+            self.import_error = import_match.group(1) if import_match else None
+        if self.module_not_found is None and "ModuleNotFoundError: " in line:
+            module_match = self.MODULE_NOT_FOUND_PATTERN.search(line)
+            self.module_not_found = module_match.group(1) if module_match else None
+
+    def _feed_browser_errors(self, line: str) -> None:
+        if not self.browser_context and ("OwlError" in line or "UncaughtPromiseError" in line or self.TOUR_PATTERN.search(line)):
+            self.browser_context = True
+
+        step_index = line.find(self.TOUR_STEP_MARKER)
+        if step_index != -1:
+            failed_step = line[step_index + len(self.TOUR_STEP_MARKER) :].strip()
+            self.failed_tour_steps.append(failed_step)
+            self._test_issues(self._running_test_id())["failed_steps"].append(failed_step)
+
+        # A browser error runs from its marker to the start of the next log record
+        if self._open_browser_error:
+            if not self.LOG_RECORD_PATTERN.match(line):
+                error_lines = self._open_browser_error[1]
+                if len(error_lines) < self.MAX_BROWSER_ERROR_LINES:
+                    error_lines.append(line)
+                return
+            self._close_browser_error()
+
+        error_match = self.BROWSER_ERROR_PATTERN.search(line)
+        if error_match:
+            self._open_browser_error = (error_match.group(), [line[error_match.end() :]], self._running_test_id())
+
+    def _close_browser_error(self) -> None:
+        marker, error_lines, test_id = self._open_browser_error
+        self._open_browser_error = None
+        error_text = "\n".join(error_lines).strip()
+        if error_text:
+            self.browser_errors.append(f"{marker}: {error_text}")
+            self._test_issues(test_id)["browser_errors"].append(f"{marker}: {error_text}")
+
+    def _running_test_id(self) -> str:
+        return self._current_test[0] if self._current_test else ""
+
+    def _test_issues(self, test_id: str) -> dict[str, list[str]]:
+        return self.test_issues.setdefault(test_id, {"failed_steps": [], "browser_errors": []})
+
+    def _feed_traceback(self, line: str) -> None:
+        # Details of a FAIL/ERROR run until the next "FAIL:"/"ERROR:" anywhere in the output
+        position = 0
+        while True:
+            if self._open_traceback:
+                end_match = self.FAILURE_END_PATTERN.search(line, position)
+                segment_end = end_match.start() if end_match else len(line)
+                self._add_traceback_segment(line[position:segment_end])
+                if not end_match:
+                    return
+                self._close_traceback()
+                position = end_match.start()
+            start_match = self.FAILURE_PATTERN.search(line, position)
+            if not start_match:
+                return
+            self._open_traceback = (start_match.group(2), [])
+            position = start_match.end()
+
+    def _add_traceback_segment(self, segment: str) -> None:
+        if any(keyword in segment for keyword in self.DETAIL_KEYWORDS):
+            self._open_traceback[1].append(segment.strip())
+
+    def _close_traceback(self) -> None:
+        test_name, error_lines = self._open_traceback
+        self._open_traceback = None
+        if error_lines:
+            self.results.error_details[test_name] = "\n".join(error_lines)
+
+    def finish(self, progress: TestProgress | None = None) -> TestResults:
+        results = self.results
+        self._close_test_timing(self._last_line_at)
+        if self._open_traceback:
+            self._close_traceback()
+        if self._open_browser_error:
+            self._close_browser_error()
+
+        if self.loading_failed:
+            loading_error = self.first_error_line or "Module loading failed (check logs for details)"
+            return TestResults(loading_failed=True, loading_error=loading_error, summary=f"Module loading failed: {loading_error}")
+
+        if results.summary:
+            results.passed = results.total - results.failed - results.errors
+        elif self.ran_total is not None:
+            results.total = self.ran_total
+            if self.saw_failed:
+                results.failed = self.failed_count or 0
+                results.errors = self.errors_count or 0
+            results.passed = results.total - results.failed - results.errors
+            results.summary = f"{results.failed} failed, {results.errors} error(s) of {results.total} tests"
+        elif progress and progress.tests_started > 0:
+            # Fall back to progress tracking if no standard summary found
+            results.total = progress.tests_started
+            results.passed = results.total - results.failed - results.errors
+            results.summary = f"{results.failed} failed, {results.errors} error(s) of {results.total} tests"
+
+        if self.browser_context:
+            results.browser_errors = self.browser_errors
+            results.failed_tour_steps = self.failed_tour_steps
+        return results
+
+
+@dataclass
+class StreamingRun:
+    """A prepared odoo-bin run and the state its streaming hooks keep."""
+
+    test_type: str
+    specific_test: str | None
+    timeout: int
+    docker_cmd: list[str]
+    is_tour_test: bool
+    result_parser: StreamingResultParser = field(default_factory=StreamingResultParser)
+    stall_warnings: int = 0
+    max_stall_warnings: int = 20  # Increased to be more tolerant of long operations
+    took_stall_diagnostics: bool = False
+    tour_completion_deadline: float | None = None
+    trace_dir: str | None = None  # In the container, when the run's browsers are traced
 
 
 class UnifiedTestRunner:
+    _port_claim_lock = threading.Lock()
+
     def __init__(
         self,
         verbose: bool = False,
@@ -332,6 +700,50 @@ class UnifiedTestRunner:
         self.test_tags: str | None = None  # Track specific test requested
         self.modules: list[str] = []  # Modules to test
         self.test_mode = test_mode  # Test execution mode
+        self.http_port: int | None = None  # Fixed HTTP port (sharded workers each get their own)
+        self.exclusive_container = True  # False when other test processes share the container
+        self.use_daemon = False  # Submit jobs to the persistent in-container test daemon
+
+        # Parallel execution settings from [tool.odoo-test.parallel]
+        test_config = load_test_config()
+        parallel_config = test_config.get("parallel", {})
+        self.parallel_enabled = bool(parallel_config.get("enabled", False))
+        self.parallel_workers = max(1, int(parallel_config.get("workers", 1)))
+        self.parallel_scope = parallel_config.get("scope", "class")
+        # Tours are sharded per test method; every shard drives its own browser, so default to half the cores
+        self.tour_workers = max(1, int(parallel_config.get("tour_workers", 0)) or min(self.parallel_workers, (os.cpu_count() or 2) // 2))
+
+        # Concurrent phase settings and per-phase resource caps from [tool.odoo-test.concurrent]
+        self.concurrent_config = test_config.get("concurrent", {})
+        self.concurrent_phases = bool(self.concurrent_config.get("enabled", False))
+        self.chromium_flags_extra: list[str] = []  # Appended to CHROMIUM_FLAGS (tour Chromium budget)
+        self.claimed_ports: set[int] = set()  # Shared by all worker copies of this runner
+        self.cancel_event = threading.Event()  # Set to stop every process watched by this runner and its copies
+        self.duration_store = TestDurationStore()  # Timing history for shard balancing and timeouts
+        self.affected_classes: set[str] | None = None  # "<module>:<Class>" filter set by select_affected_tests
+        self._test_index: TestIndex | None = None  # Loaded (and incrementally refreshed) on first lookup
+        # How integration/tour databases are cloned, from [tool.odoo-test.clone]; shared by worker copies
+        self.clone_backend = create_clone_backend(test_config.get("clone", {}), get_db_admin())
+        # Warm pool of ready production clones from [tool.odoo-test.pool]; snapshot clones are already near-instant
+        self.db_pool = None
+        if isinstance(self.clone_backend, TemplateCloneBackend) and not isinstance(self.clone_backend, SnapshotCloneBackend):
+            self.db_pool = create_db_pool(test_config.get("pool", {}), get_db_admin(), self.database, self.clone_backend.strategy)
+        # Warm Chromium instances for tours from [tool.odoo-test.browser_pool]; started on the first tour run
+        self.browser_pool_config = test_config.get("browser_pool", {})
+        self.browser_pool_ready: bool | None = None
+        # Compiled web.assets_* bundles seeded into tour databases from [tool.odoo-test.asset_cache]
+        self.asset_cache = bool(test_config.get("asset_cache", {}).get("enabled", False))
+        # CDP traces of tour runs (tools/tour_trace.py) from [tool.odoo-test.tour_trace]
+        self.tour_trace = bool(test_config.get("tour_trace", {}).get("enabled", False))
+        self.tour_trace_ready: bool | None = None
+        # How test clones get their own copy-on-write filestore, from [tool.odoo-test.filestore]
+        self.filestore_mode = test_config.get("filestore", {}).get("mode", "hardlink")
+        # Keep integration/tour clones between runs while nothing commits to them ([tool.odoo-test.clone] reuse)
+        self.db_reuse = DatabaseReuse(get_db_admin(), self.database) if test_config.get("clone", {}).get("reuse") else None
+        if self.db_reuse and isinstance(self.clone_backend, SnapshotCloneBackend):
+            # A snapshot clone's server is stopped and its data dir removed with the run, so there is nothing to keep
+            print("⚠️  [tool.odoo-test.clone] reuse is not supported with backend = \"snapshot\" - cloning every run")
+            self.db_reuse = None
 
         # Detect caller type
         self.caller_type = CallerDetector.detect_caller()
@@ -373,18 +785,12 @@ class UnifiedTestRunner:
         ]
 
         for container in containers_to_check:
-            check_cmd = ["docker", "ps", "--filter", f"name={container['name']}", "--format", "{{.Names}}"]
-            result = subprocess.run(check_cmd, capture_output=True, text=True)
-
-            if container["name"] not in result.stdout:
+            if not self._container_running(container["name"]):
                 if self.verbose:
                     print(f"Container {container['name']} not running, starting it...")
 
                 # First try to restart existing container
-                restart_cmd = ["docker", "start", container["name"]]
-                restart_result = subprocess.run(restart_cmd, capture_output=True, text=True)
-                
-                if restart_result.returncode == 0:
+                if self._start_existing_container(container["name"]):
                     if self.verbose:
                         print(f"Restarted existing container {container['name']}")
                     continue
@@ -422,73 +828,32 @@ class UnifiedTestRunner:
                         print(f"Failed to start container {container['name']} after cleanup")
                         sys.exit(1)
 
+    @staticmethod
+    def _container_running(name: str) -> bool:
+        try:
+            return get_docker_client().is_running(name)
+        except (DockerUnavailable, DockerAPIError):
+            check_cmd = ["docker", "ps", "--filter", f"name={name}", "--format", "{{.Names}}"]
+            result = subprocess.run(check_cmd, capture_output=True, text=True)
+            return name in result.stdout.split()
+
+    @staticmethod
+    def _start_existing_container(name: str) -> bool:
+        try:
+            return get_docker_client().start_container(name)
+        except (DockerUnavailable, DockerAPIError):
+            return subprocess.run(["docker", "start", name], capture_output=True, text=True).returncode == 0
+
     def _cleanup_zombie_processes(self, container_name: str) -> None:
         """Clean up zombie processes in the container to prevent database locks."""
-        try:
-            if self.verbose:
-                print(f"DEBUG: Cleaning up zombie processes in {container_name}...")
-            
-            # Kill all Odoo test processes first (they hold database locks)
-            odoo_cleanup_commands = [
-                ["docker", "exec", container_name, "pkill", "-f", "odoo-bin.*test-enable"],
-                ["docker", "exec", container_name, "pkill", "-f", "python3.*odoo-bin"],
-                ["docker", "exec", container_name, "pkill", "-f", "timeout.*odoo-bin"],
-            ]
-            
-            for cmd in odoo_cleanup_commands:
-                try:
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                    if self.verbose and result.returncode == 0:
-                        print(f"DEBUG: Killed processes with: {' '.join(cmd[-2:])}")
-                except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-                    continue  # Ignore cleanup failures
-            
-            # Wait for processes to terminate gracefully
-            import time
-            time.sleep(2)
-            
-            # Kill zombie chromium/browser processes
-            browser_cleanup_commands = [
-                ["docker", "exec", container_name, "pkill", "-f", "chromium"],
-                ["docker", "exec", container_name, "pkill", "-f", "chrome"],
-                ["docker", "exec", container_name, "pkill", "-f", "chrome_crashpad"],
-                ["docker", "exec", container_name, "pkill", "-9", "-f", "chromium"],  # Force kill if needed
-            ]
-            
-            for cmd in browser_cleanup_commands:
-                try:
-                    subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-                    continue  # Ignore cleanup failures
-            
-            # Enhanced cleanup: clear shared memory and orphaned resources  
-            enhanced_cleanup_commands = [
-                # Clear shared memory segments
-                ["docker", "exec", container_name, "sh", "-c", "ipcs -m | awk '/^0x/ {print $2}' | xargs -r ipcrm -m || true"],
-                # Clear semaphores
-                ["docker", "exec", container_name, "sh", "-c", "ipcs -s | awk '/^0x/ {print $2}' | xargs -r ipcrm -s || true"],
-                # Remove socket files
-                ["docker", "exec", container_name, "find", "/tmp", "-name", "*.sock", "-type", "s", "-delete"],
-                # Clean up temp files
-                ["docker", "exec", container_name, "sh", "-c", "find /tmp -name 'odoo-*' -type f -delete || true"],
-                ["docker", "exec", container_name, "sh", "-c", "find /tmp -name 'chrome*' -type d -exec rm -rf {} + || true"],
-                # Add chromedriver to browser cleanup
-                ["docker", "exec", container_name, "pkill", "-f", "chromedriver"],
-                ["docker", "exec", container_name, "pkill", "-9", "-f", "chromedriver"],
-            ]
-            
-            for cmd in enhanced_cleanup_commands:
-                try:
-                    subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-                    continue  # Ignore cleanup failures
-                    
-            if self.verbose:
-                print("DEBUG: Enhanced process cleanup completed")
-                
-        except Exception as e:
-            if self.verbose:
-                print(f"DEBUG: Process cleanup warning: {e}")
+        if self.verbose:
+            print(f"DEBUG: Cleaning up zombie processes in {container_name}...")
+        # Odoo test processes first (they hold database locks), then browsers, IPC objects and temp files
+        report = run_container_cleanup(
+            container_name, ODOO_PROCESS_PATTERNS + BROWSER_PROCESS_PATTERNS, ipc=True, temp_files=True
+        )
+        if self.verbose:
+            print(f"DEBUG: Process cleanup: {summarize_cleanup(report)}")
 
     def discover_local_modules(self) -> list[str]:
         """Discover all modules in the local addons directory."""
@@ -515,37 +880,18 @@ class UnifiedTestRunner:
 
         return modules
 
-    def _resolve_bare_test_method(self, method_name: str, modules: list[str]) -> dict[str, str] | None:
-        """Given a bare method like 'test_foo', find its class and module.
+    def _get_test_index(self) -> TestIndex:
+        if self._test_index is None:
+            self._test_index = TestIndex.load()
+        return self._test_index
 
-        Returns dict with keys: module, class, tag (formatted as /module:Class.method)
-        or None if not found.
-        """
-        addons_root = Path("addons")
-        for module in modules:
-            module_dir = addons_root / module / "tests"
-            if not module_dir.exists():
-                continue
-            # Search recursively for test files
-            for py in module_dir.rglob("test_*.py"):
-                try:
-                    content = py.read_text(encoding="utf-8", errors="ignore")
-                except Exception:
-                    continue
-                # Find the method in the file
-                for m in re.finditer(rf"^\s*def\s+{re.escape(method_name)}\s*\(", content, re.MULTILINE):
-                    # Walk backwards to find the enclosing class definition
-                    upto = content[: m.start()]
-                    class_matches = list(re.finditer(r"^\s*class\s+(Test\w+)\s*\(", upto, re.MULTILINE))
-                    if not class_matches:
-                        continue
-                    cls_name = class_matches[-1].group(1)
-                    return {
-                        "module": module,
-                        "class": cls_name,
-                        "tag": f"/{module}:{cls_name}.{method_name}",
-                    }
-        return None
+    def _compile_test_plan(self, expression: str, modules: list[str] | None = None) -> TestPlan:
+        return compile_test_plan(self._get_test_index(), expression, modules or self.discover_local_modules())
+
+    def _invalid_plan_results(self, error: TestPlanError) -> TestResults:
+        if self.output_manager:
+            self.output_manager.write_line(f"❌ Invalid test selection: {error}")
+        return TestResults(critical_error={"type": "invalid_test_plan", "phase": "planning", "error": str(error)})
 
     @staticmethod
     def get_available_port(start: int = 20100, end: int = 21000) -> int:
@@ -634,6 +980,16 @@ class UnifiedTestRunner:
 
         Stops at first category failure for fail-fast behavior.
         """
+        run = self._prepare_streaming_run(test_type, specific_test, timeout, modules)
+        if isinstance(run, TestResults):
+            return run
+        outcome = watch_processes([self._watch_streaming_run(run)])[0]
+        return self._finish_streaming_run(run, outcome)
+
+    def _prepare_streaming_run(
+        self, test_type: str, specific_test: str | None, timeout: int, modules: list[str] | None
+    ) -> StreamingRun | TestResults:
+        """Build the odoo-bin command for a run; returns TestResults instead when it cannot start."""
         # Initialize output manager only if not already created (e.g., by run_progressive_tests)
         self._should_close_output_manager = False
         if not self.output_manager:
@@ -683,27 +1039,22 @@ class UnifiedTestRunner:
         # Store specific test for diagnostics
         self.test_tags = specific_test
 
-        # Resolve bare test method names like "test_foo" to full test-tags
-        # format "/<module>:<TestClass>.test_foo" to avoid discovery failures
-        if specific_test and isinstance(specific_test, str):
+        # Resolve the selection against the test index before booting Odoo: bad ones fail here
+        plan = None
+        if specific_test:
             try:
-                if re.match(r"^test_[A-Za-z0-9_]+$", specific_test):
-                    search_modules = modules or (self.modules if self.modules else self.discover_local_modules())
-                    resolved = self._resolve_bare_test_method(specific_test, search_modules)
-                    if resolved:
-                        specific_test = resolved["tag"]
-                        # Keep modules context aligned for logs
-                        self.modules = [resolved["module"]]
-                        if self.verbose or self.debug:
-                            self.output_manager.write_line(
-                                f"DEBUG: Resolved bare method '{self.test_tags}' → '{specific_test}'"
-                            )
-            except Exception:
-                # Non-fatal; fall back to original behavior
-                pass
+                plan = self._compile_test_plan(specific_test, modules or self.modules)
+            except TestPlanError as e:
+                return self._invalid_plan_results(e)
+            if plan.is_empty:
+                return self._invalid_plan_results(TestPlanError(f"{specific_test} matches no tests"))
+            for warning in plan.warnings:
+                self.output_manager.write_line(f"⚠️  {warning}")
+            if self.verbose or self.debug:
+                self.output_manager.write_line(f"DEBUG: Test plan for '{specific_test}': {plan.describe()}")
 
         # Build command
-        port = UnifiedTestRunner.get_available_port()
+        port = self.http_port or UnifiedTestRunner.get_available_port()
         cmd = [
             "/odoo/odoo-bin",
             "-d",
@@ -720,6 +1071,10 @@ class UnifiedTestRunner:
             "--log-level=test",  # Changed from info to test for better visibility
             "--without-demo=all",  # Prevent loading demo data that conflicts with production DB
         ]
+        # Snapshot clones are served by their own postgres instance
+        db_port = self.clone_backend.db_port(self.database)
+        if db_port:
+            cmd.append(f"--db_port={db_port}")
         
         # For tour tests, add additional optimizations to prevent hanging
         if (test_type and "tour" in str(test_type).lower()) or (specific_test and any(k in specific_test for k in ["HttpCase", "JSTest", "test_js", "Tour"])):
@@ -739,39 +1094,8 @@ class UnifiedTestRunner:
                 self.output_manager.write_line(f"DEBUG: Running tests for modules: {', '.join(self.modules)}")
 
         # Add test filtering if specific test requested
-        elif specific_test:
-            # Detect module prefix if present
-            if ":" in specific_test:
-                parts = specific_test.split(":", 1)
-                if "/" in parts[0]:
-                    # Full format like /product_connect:TestClass
-                    cmd.extend(["--test-tags", specific_test])
-                else:
-                    # Module:TestClass format
-                    module_prefix = parts[0]
-                    test_part = parts[1]
-                    cmd.extend(["--test-tags", f"/{module_prefix}:{test_part}"])
-            elif "." in specific_test:
-                # TestClass.test_method format - need to find which module
-                if len(self.modules) == 1:
-                    cmd.extend(["--test-tags", f"/{self.modules[0]}:{specific_test}"])
-                else:
-                    # Multiple modules - try without module prefix
-                    cmd.extend(["--test-tags", specific_test])
-            elif specific_test.startswith("Test"):
-                # TestClass format - for tour tests, ensure we include the module
-                if len(self.modules) == 1:
-                    # For single module, use module prefix to ensure proper discovery
-                    cmd.extend(["--test-tags", f"/{self.modules[0]}:{specific_test}"])
-                else:
-                    # Multiple modules or no modules specified - try global search
-                    cmd.extend(["--test-tags", specific_test])
-            elif specific_test.startswith("/"):
-                # Already a full tag format
-                cmd.extend(["--test-tags", specific_test])
-            else:
-                # If not resolved above, treat as raw tag expression
-                cmd.extend(["--test-tags", specific_test])
+        elif plan:
+            cmd.extend(["--test-tags", plan.test_tags()])
         elif test_type == "python-only":
             # Run module tests but exclude JS tests
             if self.modules:
@@ -781,6 +1105,9 @@ class UnifiedTestRunner:
                 all_tags = tags + exclusions
                 cmd.extend(["--test-tags", ",".join(all_tags)])
 
+        if self.use_daemon:
+            cmd = self._build_daemon_command(cmd)
+
         docker_cmd = [
             "docker",
             "exec",
@@ -794,26 +1121,37 @@ class UnifiedTestRunner:
         docker_cmd = docker_cmd[:2] + ["-e", "PYTHONFAULTHANDLER=1"] + docker_cmd[2:]
 
         # Improve headless browser stability for tour/JS tests
+        trace_dir = None
         try:
             if (
                 (test_type and "tour" in str(test_type).lower())
                 or (specific_test and any(k in specific_test for k in ["HttpCase", "JSTest", "test_js", "Tour"]))
             ):
                 # Enhanced browser configuration for tour tests to prevent hanging
+                chromium_budget = "".join(f" {flag}" for flag in self.chromium_flags_extra)
+                use_pool = self._ensure_browser_pool()
+                if self._ensure_tour_tracing():
+                    trace_dir = f"{TRACE_ROOT}/{self.output_dir.as_posix().replace('/', '_')}"
                 browser_env = [
                     "-e", "HEADLESS_CHROMIUM=1",
                     "-e", "CHROMIUM_BIN=/usr/bin/chromium",
                     "-e", "DISPLAY=:99",  # Set virtual display
                     # Override CHROMIUM_FLAGS with tour-specific optimizations
-                    "-e", "CHROMIUM_FLAGS=--headless=new --no-sandbox --disable-gpu --disable-dev-shm-usage --disable-software-rasterizer --window-size=1920,1080 --no-first-run --no-default-browser-check --disable-web-security --disable-features=VizDisplayCompositor,TranslateUI,site-per-process,IsolateOrigins,BlockInsecurePrivateNetworkRequests --virtual-time-budget=30000 --run-all-compositor-stages-before-draw --disable-background-timer-throttling --disable-renderer-backgrounding --disable-backgrounding-occluded-windows --disable-extensions --disable-plugins --disable-sync --disable-web-bluetooth --disable-web-usb",
+                    "-e", f"CHROMIUM_FLAGS={TOUR_CHROMIUM_FLAGS}{chromium_budget}",
                     # Additional environment variables to prevent hanging after tour completion
                     "-e", "ODOO_TEST_BROWSER_TIMEOUT=60",
                     "-e", "ODOO_TEST_TIMEOUT=300", 
                     "-e", "ODOO_TOUR_DISABLE_WEBSOCKET=1",  # Disable websockets that cause hanging
                     "-e", "ODOO_DISABLE_WEBSOCKET=1",  # Global websocket disable for tests
                 ]
+                if trace_dir:
+                    browser_env += ["-e", f"{TRACE_DIR_ENV}={trace_dir}"]
                 docker_cmd = docker_cmd[:2] + browser_env + docker_cmd[2:]
                 self.output_manager.write_line("Applied enhanced browser configuration for tour tests")
+                if use_pool or trace_dir:
+                    # Odoo's ChromeBrowser finds the shim first: a warm browser context, traced when enabled
+                    container_index = docker_cmd.index(self.container_name) + 1
+                    docker_cmd = docker_cmd[:container_index] + with_browser_pool(docker_cmd[container_index:])
         except Exception as e:
             # Log error but proceed - don't let browser setup break the test
             if self.output_manager:
@@ -831,191 +1169,136 @@ class UnifiedTestRunner:
         self.output_manager.write_line(f"Caller type: {self.caller_type}")
         self.output_manager.write_line("-" * 80)
 
-        start_time = time.time()
-        output_lines = []
+        is_tour_test = bool(
+            (test_type and "tour" in str(test_type).lower())
+            or (specific_test and any(k in specific_test for k in ["HttpCase", "JSTest", "test_js", "Tour"]))
+        )
+        return StreamingRun(
+            test_type,
+            specific_test,
+            timeout,
+            docker_cmd,
+            is_tour_test,
+            result_parser=StreamingResultParser(self.output_manager.events),
+            trace_dir=trace_dir,
+        )
 
-        try:
-            # Start process with real-time output and improved buffering
-            process = subprocess.Popen(
-                docker_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,  # Line buffered
-                universal_newlines=True,
-            )
-            
-            last_output_time = time.time()
-            stall_warnings = 0
-            max_stall_warnings = 20  # Increased to be more tolerant of long operations
-
-            took_stall_diagnostics = False
-            tour_completed = False  # Track if tour has completed successfully
-            is_tour_test = (test_type and "tour" in str(test_type).lower()) or (specific_test and any(k in specific_test for k in ["HttpCase", "JSTest", "test_js", "Tour"]))
-            while True:
-                # Check if process is still running
-                if process.poll() is not None:
-                    break
-
-                # Check for critical errors - stop immediately if detected
-                if self.output_manager.critical_error_detected:
-                    self.output_manager.write_line("Terminating test process due to critical error...")
-                    self._safe_terminate_process(process)
-                    break
-
-                # Check for timeout first
-                current_time = time.time()
-                if current_time - start_time > timeout:
-                    self.output_manager.write_line(f"TIMEOUT: Test execution exceeded {timeout} seconds")
-                    self._safe_terminate_process(process)
-                    break
-
-                # Try to read line with non-blocking select
-                try:
-                    # Use select to check if data is available (with adaptive timeout)
-                    select_timeout = self._get_adaptive_select_timeout()
-                    ready, _, _ = select.select([process.stdout], [], [], select_timeout)
-
-                    if ready:
-                        # Data is available, read it
-                        line = process.stdout.readline()
-                        if line:
-                            line = line.rstrip()
-                            output_lines.append(line)
-                            self.output_manager.write_line(line)
-                            last_output_time = time.time()
-                            stall_warnings = 0  # Reset stall warnings on new output
-                            
-                            # Check if tour has completed successfully
-                            if is_tour_test and not tour_completed:
-                                if "Test completed successfully" in line or "test_basic_tour: ok" in line:
-                                    tour_completed = True
-                                    self.output_manager.write_line("✅ Tour completed successfully - waiting for clean shutdown...")
-                                    # Give process 30 seconds to shutdown cleanly after tour completion
-                                    tour_completion_timeout = time.time() + 30
-                    else:
-                        # No data available within select timeout
-                        
-                        # For tour tests, check if we should force terminate after completion
-                        if is_tour_test and tour_completed:
-                            if current_time > tour_completion_timeout:
-                                self.output_manager.write_line("⚠️  Tour completed but process didn't exit cleanly - forcing termination")
-                                self._safe_terminate_process(process)
-                                break
-                        
-                        # Only check for stall if we're past the adaptive threshold
-                        stall_threshold = self._get_adaptive_stall_threshold()
-                        if current_time - last_output_time > stall_threshold:
-                            stall_warnings += 1
-                            last_test = getattr(self.output_manager.progress, "current_test", "") or "unknown"
-                            phase = getattr(self.output_manager.progress, "phase", "") or "unknown"
-                            self.output_manager.write_line(
-                                f"WARNING: No output for {current_time - last_output_time:.1f}s "
-                                f"(threshold: {stall_threshold}s) [{stall_warnings}/{max_stall_warnings}] "
-                                f"(phase={phase}, last_test={last_test})"
-                            )
-                            # On first significant stall, capture diagnostics and try SIGUSR1 stack dump
-                            if not took_stall_diagnostics and stall_warnings >= 3:
-                                self._capture_stall_diagnostics()
-                                took_stall_diagnostics = True
-
-                            # Terminate if too many stall warnings (increased threshold)
-                            if stall_warnings >= max_stall_warnings:
-                                self.output_manager.write_line(
-                                    f"STALLED: Process appears to be stuck after {stall_warnings} warnings. Terminating..."
-                                )
-                                self._safe_terminate_process(process)
-                                break
-
-                except Exception as e:
-                    self.output_manager.write_line(f"Error reading process output: {e}")
-                    # Don't break immediately - try to recover
-                    time.sleep(0.1)
-                    continue
+    def _watch_streaming_run(self, run: StreamingRun) -> WatchedProcess:
+        """Hook a prepared run into the process streaming engine."""
+        return WatchedProcess(
+            name=str(run.test_type),
+            command=run.docker_cmd,
+            on_line=lambda line: self._on_test_output(run, line),
+            timeout=run.timeout,
+            on_notice=self.output_manager.write_line,
+            idle_interval=self._get_adaptive_idle_interval,
+            on_idle=lambda idle_seconds: self._on_test_idle(run, idle_seconds),
+            check_stop=self._check_test_stop,
+        )
 
-            # Get final return code with timeout to prevent hanging
-            try:
-                return_code = process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self.output_manager.write_line("WARNING: Process did not exit cleanly, forcing termination")
-                self._safe_terminate_process(process)
-                return_code = -1
-            elapsed = time.time() - start_time
-
-            # Override return code if critical error detected
-            if self.output_manager.critical_error_detected:
-                error_type = self.output_manager.critical_error_details.get("type", "unknown")
-                if error_type == "db_constraint":
-                    return_code = -10
-                elif error_type == "module_error":
-                    return_code = -11
-                else:
-                    return_code = -12
+    def _on_test_output(self, run: StreamingRun, line: str) -> None:
+        line = line.rstrip()
+        run.result_parser.feed(line)
+        self.output_manager.write_line(line)
+        run.stall_warnings = 0  # Reset stall warnings on new output
+
+        # Check if tour has completed successfully
+        if run.is_tour_test and run.tour_completion_deadline is None:
+            if "Test completed successfully" in line or "test_basic_tour: ok" in line:
+                self.output_manager.write_line("✅ Tour completed successfully - waiting for clean shutdown...")
+                # Give process 30 seconds to shutdown cleanly after tour completion
+                run.tour_completion_deadline = time.time() + 30
+
+    def _check_test_stop(self) -> str | None:
+        if self.cancel_event.is_set():
+            self.output_manager.write_line("Terminating test process - run cancelled")
+            return "cancelled"
+        # Check for critical errors - stop immediately if detected
+        if self.output_manager.critical_error_detected:
+            self.output_manager.write_line("Terminating test process due to critical error...")
+            return "critical_error"
+        return None
 
-            # Get any remaining output with improved timeout handling
-            try:
-                # Use non-blocking approach to collect remaining output
-                remaining_lines = []
-                start_collect = time.time()
-                max_collect_time = 10  # Maximum time to spend collecting remaining output
-                
-                while time.time() - start_collect < max_collect_time and process.poll() is None:
-                    try:
-                        ready, _, _ = select.select([process.stdout], [], [], 0.1)
-                        if ready:
-                            line = process.stdout.readline()
-                            if line:
-                                line = line.rstrip()
-                                if line.strip():
-                                    remaining_lines.append(line)
-                                    output_lines.append(line)
-                                    # Don't check for critical errors in remaining output
-                                    if not self.output_manager.critical_error_detected:
-                                        self.output_manager.write_line(line)
-                            else:
-                                # No more data available
-                                break
-                        else:
-                            # No data ready, exit collection
-                            break
-                    except Exception:
-                        # Error reading remaining data, exit collection
-                        break
-                        
-                if remaining_lines:
-                    self.output_manager.write_line(f"Collected {len(remaining_lines)} remaining output lines")
-                    
-            except Exception as e:
-                self.output_manager.write_line(f"Error collecting remaining output: {e}")
-                # Don't let this crash the entire test run
+    def _on_test_idle(self, run: StreamingRun, idle_seconds: float) -> str | None:
+        # No output within the idle interval - keep heartbeat/log snapshots fresh
+        self.output_manager.tick()
+
+        # For tour tests, check if we should force terminate after completion
+        if run.tour_completion_deadline is not None and time.time() > run.tour_completion_deadline:
+            self.output_manager.write_line("⚠️  Tour completed but process didn't exit cleanly - forcing termination")
+            return "tour_completed"
+
+        # Only check for stall if we're past the adaptive threshold
+        stall_threshold = self._get_adaptive_stall_threshold()
+        if idle_seconds <= stall_threshold:
+            return None
+
+        run.stall_warnings += 1
+        last_test = getattr(self.output_manager.progress, "current_test", "") or "unknown"
+        phase = getattr(self.output_manager.progress, "phase", "") or "unknown"
+        self.output_manager.events.emit(
+            "stall_warning",
+            flush=True,
+            idle_seconds=round(idle_seconds, 1),
+            threshold=stall_threshold,
+            warning=run.stall_warnings,
+            max_warnings=run.max_stall_warnings,
+            phase=phase,
+            test=last_test,
+        )
+        self.output_manager.write_line(
+            f"WARNING: No output for {idle_seconds:.1f}s "
+            f"(threshold: {stall_threshold}s) [{run.stall_warnings}/{run.max_stall_warnings}] "
+            f"(phase={phase}, last_test={last_test})"
+        )
+        # On first significant stall, capture diagnostics and try SIGUSR1 stack dump
+        if not run.took_stall_diagnostics and run.stall_warnings >= 3:
+            self._capture_stall_diagnostics()
+            run.took_stall_diagnostics = True
 
-        except subprocess.TimeoutExpired:
-            self.output_manager.write_line(f"Process timed out after {timeout} seconds")
-            return_code = -1
-            elapsed = timeout
-        except Exception as e:
-            self.output_manager.write_line(f"Unexpected error during test execution: {e}")
-            return_code = -2
-            elapsed = time.time() - start_time
-        finally:
-            # Ensure process cleanup to prevent zombies
+        # Terminate if too many stall warnings (increased threshold)
+        if run.stall_warnings >= run.max_stall_warnings:
+            self.output_manager.write_line(
+                f"STALLED: Process appears to be stuck after {run.stall_warnings} warnings. Terminating..."
+            )
+            return "stalled"
+        return None
+
+    def _finish_streaming_run(self, run: StreamingRun, outcome: ProcessOutcome) -> TestResults:
+        """Turn a finished (or stopped) run into TestResults and write the summary files."""
+        return_code = outcome.returncode
+        elapsed = outcome.elapsed
+        if outcome.error:
+            self.output_manager.write_line(f"Unexpected error during test execution: {outcome.error}")
+        elif outcome.stop_reason and self.exclusive_container:
+            # Kill any test processes the stopped odoo-bin left behind in the container
+            # (skipped when sibling workers share the container)
             try:
-                if 'process' in locals() and process is not None:
-                    if process.poll() is None:
-                        self.output_manager.write_line("Cleaning up running process...")
-                        self._safe_terminate_process(process)
-            except Exception as e:
-                if self.output_manager:
-                    self.output_manager.write_line(f"Error during final cleanup: {e}")
-                else:
-                    print(f"Error during final cleanup: {e}")
+                self._force_terminate_test_processes()
+            except Exception as cleanup_error:
+                self.output_manager.write_line(f"Warning during process cleanup: {cleanup_error}")
+        if outcome.drained_lines:
+            self.output_manager.write_line(f"Collected {outcome.drained_lines} remaining output lines")
+
+        # Override return code if critical error detected
+        if self.output_manager.critical_error_detected:
+            error_type = self.output_manager.critical_error_details.get("type", "unknown")
+            if error_type == "db_constraint":
+                return_code = -10
+            elif error_type == "module_error":
+                return_code = -11
+            else:
+                return_code = -12
 
         self.output_manager.write_line("-" * 80)
         self.output_manager.write_line(f"Tests completed in {elapsed:.1f} seconds with return code: {return_code}")
 
-        # Parse results
-        full_output = "\n".join(output_lines)
-        results = self._parse_test_results(full_output)
+        # Results were parsed while streaming
+        result_parser = run.result_parser
+        if outcome.stop_reason:
+            result_parser.abandon_current_test()
+        results = result_parser.finish(self.output_manager.progress)
+        self._record_test_durations(result_parser)
         results.elapsed = elapsed
         results.returncode = return_code
 
@@ -1035,7 +1318,7 @@ class UnifiedTestRunner:
         # Check for test discovery failure
         elif return_code == 0 and results.total == 0 and not self.output_manager.critical_error_detected:
             # Tests completed "successfully" but no tests found
-            error_msg = self._analyze_test_discovery_failure(full_output)
+            error_msg = self._analyze_test_discovery_failure(result_parser)
             results.critical_error = {
                 "type": "test_discovery_failure",
                 "phase": "discovery",
@@ -1050,8 +1333,12 @@ class UnifiedTestRunner:
             "summary_json": str(self.output_manager.summary_file),
             "progress_json": str(self.output_manager.progress_file),
             "heartbeat_json": str(self.output_manager.heartbeat_file),
+            "events_jsonl": str(self.output_manager.events_file),
         }
 
+        if run.trace_dir:
+            self._write_tour_trace(run, results)
+
         # Add critical error file if it exists
         critical_error_file = self.output_dir / "critical_error.txt"
         if critical_error_file.exists():
@@ -1066,35 +1353,85 @@ class UnifiedTestRunner:
 
         return results
 
-    def _safe_terminate_process(self, process: subprocess.Popen) -> None:
-        """Safely terminate a process with proper cleanup and deadlock prevention."""
+    def _write_tour_trace(self, run: StreamingRun, results: TestResults) -> None:
+        """Fetch the run's browser traces from the container into tour_trace.json, matched to their tests."""
+        trace = collect_tour_traces(self.container_name, run.trace_dir)
+        self.output_manager.write_line(f"🔬 {summarize_tour_trace(trace)}")
+        if "error" in trace:
+            return
+        trace_file = self.output_dir / TRACE_FILE_NAME
         try:
-            # First attempt: gentle termination
-            if process.poll() is None:
-                process.terminate()
-                try:
-                    # Wait for graceful termination with timeout
-                    process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    # Force kill if it doesn't terminate gracefully
-                    if process.poll() is None:
-                        process.kill()
-                        try:
-                            process.wait(timeout=2)
-                        except subprocess.TimeoutExpired:
-                            # Process is truly stuck - log warning and force cleanup
-                            self.output_manager.write_line("WARNING: Process failed to terminate cleanly - forcing container cleanup")
-                            
-            # Additional cleanup: kill any remaining test processes in container
-            try:
-                self._force_terminate_test_processes()
-            except Exception as cleanup_error:
-                self.output_manager.write_line(f"Warning during process cleanup: {cleanup_error}")
-                
-        except Exception as e:
-            self.output_manager.write_line(f"Error during process termination: {e}")
+            trace_file.write_text(json.dumps(attribute_sessions(trace, run.result_parser.test_windows), separators=(",", ":")))
+            results.output_files["tour_trace"] = str(trace_file)
+        except OSError as e:
+            self.output_manager.write_line(f"⚠️  Failed to write tour trace: {e}")
+
+    def _record_test_durations(self, result_parser: StreamingResultParser) -> None:
+        try:
+            self.duration_store.record_tests(result_parser.test_durations)
+            # Daemon jobs skip registry loading, so their startup says nothing about a cold run
+            if result_parser.startup_seconds is not None and not self.use_daemon:
+                self.duration_store.record_run(STARTUP_KIND, result_parser.startup_seconds)
+        except sqlite3.Error as e:
+            self.output_manager.write_line(f"⚠️  Failed to record test durations: {e}")
+
+    def _record_category_duration(self, category: str, results: TestResults) -> None:
+        # Only complete, healthy whole-category runs are representative for category timeouts
+        if results.critical_error or results.loading_failed or not results.total or self.use_daemon:
+            return
+        try:
+            self.duration_store.record_run(category, results.elapsed)
+        except sqlite3.Error as e:
+            if self.output_manager:
+                self.output_manager.write_line(f"⚠️  Failed to record {category} duration: {e}")
+
+    def _build_daemon_command(self, odoo_cmd: list[str]) -> list[str]:
+        """Translate an odoo-bin test command into a job for the persistent test daemon.
+
+        The daemon keeps the registry warm inside the container, so only the first
+        run pays interpreter startup, addon import and registry load. Its HTTP server
+        (and port) is shared by every job, so the command's --http-port is not passed on.
+        Its registry connects to the main postgres server, so snapshot clones (--db_port)
+        cannot be served.
+        """
+        if any(arg.startswith("--db_port=") for arg in odoo_cmd):
+            raise RuntimeError('The test daemon cannot run against snapshot clones (backend = "snapshot"); use the template backend')
+        self._install_daemon_script()
+        test_tags = odoo_cmd[odoo_cmd.index("--test-tags") + 1] if "--test-tags" in odoo_cmd else ""
+        if self.output_manager:
+            self.output_manager.write_line(f"🔥 Using warm test daemon ({TEST_DAEMON_CONTAINER_PATH})")
+        return [
+            "python3",
+            TEST_DAEMON_CONTAINER_PATH,
+            "run",
+            "--database",
+            self.database,
+            "--test-tags",
+            test_tags,
+            "--modules",
+            ",".join(self.modules),
+            "--addons-path",
+            self.addons_path,
+        ]
+
+    def _install_daemon_script(self) -> None:
+        """Copy the daemon script into the container (a changed copy makes the daemon restart itself)."""
+        daemon_dir = str(Path(TEST_DAEMON_CONTAINER_PATH).parent)
+        subprocess.run(["docker", "exec", self.container_name, "mkdir", "-p", daemon_dir], capture_output=True, text=True)
+        daemon_source = Path(__file__).with_name("test_daemon.py")
+        result = subprocess.run(
+            ["docker", "cp", str(daemon_source), f"{self.container_name}:{TEST_DAEMON_CONTAINER_PATH}"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "Failed to copy test daemon into container")
+
+    def stop_test_daemon(self) -> None:
+        subprocess.run(
+            ["docker", "exec", self.container_name, "python3", TEST_DAEMON_CONTAINER_PATH, "stop"], capture_output=True, text=True
+        )
 
-    
     def _capture_stall_diagnostics(self) -> None:
         """Capture helpful diagnostics when output stalls to pinpoint the hang."""
         try:
@@ -1129,8 +1466,8 @@ class UnifiedTestRunner:
         except Exception as e:
             self.output_manager.write_line(f"⚠️  Stall diagnostics error: {e}")
 
-    def _get_adaptive_select_timeout(self) -> float:
-        """Get adaptive select timeout based on current test phase."""
+    def _get_adaptive_idle_interval(self) -> float:
+        """Get how long to wait for output before running idle checks, based on current test phase."""
         if not hasattr(self, 'output_manager') or not self.output_manager:
             return 3.0  # Default fallback
             
@@ -1186,6 +1523,9 @@ class UnifiedTestRunner:
 
         Stops at first category failure for fail-fast behavior.
         """
+        if self.concurrent_phases:
+            return self._run_phases_concurrently(modules)
+
         all_results = TestResults()
 
         # Initialize output manager if not already done
@@ -1261,256 +1601,396 @@ class UnifiedTestRunner:
 
         return all_results
 
+    def _run_phases_concurrently(self, modules: list[str] | None) -> TestResults:
+        """Run the unit, integration and tour phases side by side.
+
+        The phases already use separate databases; each also gets its own HTTP
+        port, output directory (<output_dir>/<phase>) and the resource caps from
+        [tool.odoo-test.concurrent]. Wall-clock time is that of the slowest phase.
+        """
+        if self.output_manager is None:
+            self.output_manager = OutputManager(self.output_dir, self.caller_type)
+
+        phases = ["unit", "integration", "tour"]
+        self.output_manager.write_line("")
+        self.output_manager.write_line("=" * 80)
+        self.output_manager.write_line("⚡ Running unit, integration and tour phases concurrently")
+        self.output_manager.write_line("=" * 80)
+
+        workers: dict[str, UnifiedTestRunner] = {}
+        phase_results: dict[str, TestResults] = {}
+        try:
+            for phase in phases:
+                workers[phase] = self._create_phase_worker(phase)
+                self.output_manager.write_line(f"   {phase}: output in {workers[phase].output_dir}")
+
+            with ThreadPoolExecutor(max_workers=len(phases)) as executor:
+                futures = {phase: executor.submit(worker._run_test_category, phase, modules, None) for phase, worker in workers.items()}
+                try:
+                    for phase, future in futures.items():
+                        try:
+                            phase_results[phase] = future.result()
+                        except Exception as e:
+                            self.output_manager.write_line(f"⚠️  {phase} phase failed: {e}")
+                            phase_results[phase] = TestResults(
+                                critical_error={"type": "phase_failure", "phase": phase, "error": str(e)},
+                                summary=f"CRITICAL ERROR: phase_failure ({phase})",
+                            )
+                        result = phase_results[phase]
+                        self.output_manager.write_line(
+                            f"   {phase}: {result.summary or f'{result.passed}/{result.total} passed'} in {result.elapsed:.1f}s"
+                        )
+                except KeyboardInterrupt:
+                    # Let every phase terminate its odoo-bin before the executor joins the threads
+                    self.cancel_event.set()
+                    raise
+        finally:
+            for worker in workers.values():
+                worker.output_manager.close()
+            # Final comprehensive cleanup once no phase is running any more
+            self._deep_cleanup_between_phases("concurrent phases", "final")
+            self.output_manager.close()
+
+        all_results = merge_test_results([phase_results[phase] for phase in phases], labels=phases)
+        if not all_results.critical_error:
+            all_results.summary = f"All tests completed: {all_results.passed}/{all_results.total} passed"
+        return all_results
+
+    def _create_phase_worker(self, phase: str) -> "UnifiedTestRunner":
+        """Clone this runner for one concurrently running phase with its own output and resource caps."""
+        worker = copy.copy(self)
+        worker.exclusive_container = False
+        worker.http_port = self._claim_port()
+        worker.output_dir = self.output_dir / phase
+        # Phases log to their own files only; the parent prints per-phase summaries
+        worker.output_manager = OutputManager(worker.output_dir, "agent")
+
+        caps = self.concurrent_config
+        if phase in ("unit", "integration"):
+            # Shard workers per phase, so three phases do not multiply the configured parallelism
+            worker.parallel_workers = max(1, int(caps.get(f"{phase}_workers", self.parallel_workers)))
+            worker.parallel_enabled = self.parallel_enabled and worker.parallel_workers > 1
+        elif phase == "tour":
+            worker.tour_workers = max(1, int(caps.get("tour_workers", 1)))
+            worker.chromium_flags_extra = self._tour_chromium_budget()
+        return worker
+
+    def _tour_chromium_budget(self) -> list[str]:
+        """Chromium flags capping one tour browser, for tours sharing the container with other work."""
+        renderers = int(self.concurrent_config.get("tour_chromium_renderers", 2))
+        heap_mb = int(self.concurrent_config.get("tour_chromium_heap_mb", 1024))
+        return [f"--renderer-process-limit={renderers}", f"--js-flags=--max-old-space-size={heap_mb}"]
+
     def _setup_unit_test_database(self) -> None:
         """Set up a clean test database for unit tests.
 
-        Creates a fresh empty database with the '_test' suffix and initializes it
-        with only the necessary modules. This provides proper isolation for unit tests.
+        The fully initialized database (base + product_connect) is cached as a
+        template named '<test_db>_template_<hash>', keyed by the addon manifests,
+        data files and Odoo version. Each run instantiates the test database from
+        that template with CREATE DATABASE ... TEMPLATE, which takes seconds
+        instead of a full module install. The template is only rebuilt when the
+        hash changes; stale templates are evicted.
         """
-        import os
-        
         test_db = f"{self.database}_test" if not self.database.endswith("_test") else self.database
-        db_password = os.environ.get("ODOO_DB_PASSWORD")
-        if not db_password:
-            raise RuntimeError("ODOO_DB_PASSWORD environment variable not set")
-        
-        container_prefix = os.environ.get("ODOO_CONTAINER_PREFIX", "odoo-opw")
-        db_container = f"{container_prefix}-database-1"
+        template_db = f"{test_db}_template_{self._compute_unit_template_hash()}"
 
         print(f"Setting up clean test database: {test_db}")
 
-        # Step 1: Terminate any existing connections to the test database
-        terminate_cmd = [
-            "docker",
-            "exec",
-            "-e",
-            f"PGPASSWORD={db_password}",
-            db_container,
-            "psql",
-            "-U",
-            "odoo",
-            "-d",
-            "postgres",
-            "-c",
-            f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{test_db}' AND pid <> pg_backend_pid();",
-        ]
-        result = subprocess.run(terminate_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Note: No connections to terminate (this is normal for first run)")
+        if not self._database_exists(template_db):
+            print(f"No cached template for current addon sources - building {template_db}...")
+            if not self._build_unit_template_database(template_db):
+                print("Test database template build failed")
+                return
+            self._evict_stale_unit_templates(test_db, keep=template_db)
+        else:
+            print(f"♻️  Reusing cached template {template_db}")
 
-        # Step 2: Drop existing test database if it exists
-        drop_cmd = [
-            "docker",
-            "exec",
-            "-e", 
-            f"PGPASSWORD={db_password}",
-            db_container,
-            "psql",
-            "-U",
-            "odoo",
-            "-d",
-            "postgres",
-            "-c",
-            f"DROP DATABASE IF EXISTS {test_db};"
-        ]
+        # Instantiate the test database from the cached template
+        try:
+            self.db_admin.clone(template_db, test_db)
+        except DatabaseAdminError as e:
+            print(f"Error creating test database from template: {e}")
+            print("Falling back to using base database")
+            return
+        self._copy_filestore(template_db, test_db)
 
-        print(f"Dropping existing test database (if any)...")
-        result = subprocess.run(drop_cmd, capture_output=True, text=True)
-        if result.returncode != 0 and "does not exist" not in result.stderr:
-            print(f"Warning: Could not drop database: {result.stderr}")
-            print(f"Return code: {result.returncode}")
+        print(f"✅ Test database {test_db} created from template")
+        print("-" * 80)
 
-        # Step 3: Create new EMPTY database (not from template)
-        create_cmd = [
-            "docker",
-            "exec",
-            "-e",
-            f"PGPASSWORD={db_password}",
-            db_container,
-            "psql",
-            "-U",
-            "odoo",
-            "-d",
-            "postgres",
-            "-c",
-            f"CREATE DATABASE {test_db} WITH TEMPLATE template0 ENCODING 'UTF8';",
-        ]
+    def _compute_unit_template_hash(self) -> str:
+        """Hash addon manifests, data files, model sources and the Odoo version."""
+        import ast
+        import hashlib
 
-        print(f"Creating fresh EMPTY test database...")
-        result = subprocess.run(create_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Error creating test database: {result.stderr}")
-            print("Falling back to using base database")
-            return
+        digest = hashlib.sha256()
+        digest.update(self._get_odoo_version().encode())
+        digest.update(UNIT_TEMPLATE_MODULES.encode())
+
+        for module in sorted(self.discover_local_modules()):
+            module_dir = Path("addons") / module
+            manifest_file = module_dir / "__manifest__.py"
+            if not manifest_file.exists():
+                continue
+            manifest_source = manifest_file.read_bytes()
+            tracked_files = {manifest_file}
+            try:
+                manifest = ast.literal_eval(manifest_source.decode("utf-8"))
+            except (ValueError, SyntaxError, UnicodeDecodeError):
+                manifest = {}
+            for key in ("data", "demo", "init_xml", "update_xml"):
+                for data_file in manifest.get(key, []):
+                    tracked_files.add(module_dir / data_file)
+            # Python sources define the schema the template was built with
+            tracked_files.update(
+                source for source in module_dir.rglob("*.py") if "tests" not in source.relative_to(module_dir).parts
+            )
+
+            for tracked_file in sorted(tracked_files):
+                if not tracked_file.is_file():
+                    continue
+                digest.update(str(tracked_file).encode())
+                digest.update(tracked_file.read_bytes())
+
+        return digest.hexdigest()[:12]
+
+    def _get_odoo_version(self) -> str:
+        if not hasattr(self, "_odoo_version"):
+            result = subprocess.run(
+                ["docker", "exec", self.container_name, "/odoo/odoo-bin", "--version"], capture_output=True, text=True, timeout=60
+            )
+            self._odoo_version = result.stdout.strip() if result.returncode == 0 else "unknown"
+        return self._odoo_version
+
+    @property
+    def db_admin(self) -> DatabaseAdmin:
+        # One maintenance connection shared by this runner, its worker copies and test_commands
+        return get_db_admin()
 
-        # Step 4: Initialize the database with base modules and product_connect
-        print(f"Initializing test database with modules...")
+    def _database_exists(self, db_name: str) -> bool:
+        try:
+            return self.db_admin.exists(db_name)
+        except DatabaseAdminError:
+            return False
+
+    def _build_unit_template_database(self, template_db: str) -> bool:
+        """Create and initialize a template database; published under its final name only on success."""
+        building_db = f"{template_db}_building"
+        print("Creating fresh EMPTY template database...")
+        try:
+            self.db_admin.drop(building_db)
+            self.db_admin.create(building_db, template="template0", options="ENCODING 'UTF8'")
+        except DatabaseAdminError as e:
+            print(f"Error creating template database: {e}")
+            return False
+
+        print(f"Initializing template database with modules ({UNIT_TEMPLATE_MODULES})...")
         init_cmd = [
             "docker",
             "exec",
             self.container_name,
             "/odoo/odoo-bin",
             "-d",
-            test_db,
+            building_db,
             "--addons-path",
             self.addons_path,
             "-i",
-            "base,product_connect",  # Install base and our module
+            UNIT_TEMPLATE_MODULES,
             "--stop-after-init",
             "--log-level=warn",
             "--without-demo=all",
         ]
-
         result = subprocess.run(init_cmd, capture_output=True, text=True)
         if result.returncode != 0:
-            print(f"Error initializing test database: {result.stderr}")
-            print("Test database created but initialization failed")
-        else:
-            print(f"✅ Test database {test_db} initialized successfully")
+            print(f"Error initializing template database: {result.stderr}")
+            self._drop_database_safely(building_db)
+            self._remove_filestore(building_db)
+            return False
 
-        print("-" * 80)
+        try:
+            self.db_admin.rename(building_db, template_db)
+            self.db_admin.set_template(template_db, True)
+        except DatabaseAdminError as e:
+            print(f"Error publishing template database: {e}")
+            self._drop_database_safely(building_db)
+            self._remove_filestore(building_db)
+            return False
+        self._move_filestore(building_db, template_db)
+        print(f"✅ Template database {template_db} built")
+        return True
+
+    def _evict_stale_unit_templates(self, test_db: str, keep: str) -> None:
+        try:
+            templates = self.db_admin.list_databases(f"{test_db}\\_template\\_%")
+        except DatabaseAdminError:
+            return
+        for stale_template in [name for name in templates if name != keep]:
+            print(f"🧹 Evicting stale template {stale_template}")
+            try:
+                self.db_admin.set_template(stale_template, False)
+            except DatabaseAdminError:
+                continue
+            self._drop_database_safely(stale_template)
+            self._remove_filestore(stale_template)
 
-    def _terminate_db_connections(self, db_name: str) -> None:
-        import os
-        db_password = os.environ.get("ODOO_DB_PASSWORD")
-        if not db_password:
-            raise RuntimeError("ODOO_DB_PASSWORD environment variable not set")
-        
-        container_prefix = os.environ.get("ODOO_CONTAINER_PREFIX", "odoo-opw")
-        db_container = f"{container_prefix}-database-1"
-        
-        terminate_cmd = [
-            "docker",
-            "exec",
-            "-e",
-            f"PGPASSWORD={db_password}",
-            db_container,
-            "psql",
-            "-U",
-            "odoo",
-            "-d",
-            "postgres",
-            "-c",
-            f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}' AND pid <> pg_backend_pid();",
-        ]
-        result = subprocess.run(terminate_cmd, capture_output=True, text=True, timeout=30)
-        
-        # Also try to cancel any running queries on this database
-        cancel_cmd = [
+    def _copy_filestore(self, source_db: str, target_db: str) -> None:
+        source = f"/volumes/data/filestore/{source_db}"
+        target = f"/volumes/data/filestore/{target_db}"
+        cmd = [
             "docker",
             "exec",
-            "-e", 
-            f"PGPASSWORD={db_password}",
-            db_container,
-            "psql",
-            "-U",
-            "odoo", 
-            "-d",
-            "postgres",
+            self.container_name,
+            "sh",
             "-c",
-            f"SELECT pg_cancel_backend(pid) FROM pg_stat_activity WHERE datname = '{db_name}' AND state = 'active';",
+            f"rm -rf '{target}' && if [ -d '{source}' ]; then cp -a '{source}' '{target}'; fi",
         ]
-        subprocess.run(cancel_cmd, capture_output=True, text=True, timeout=10)
+        subprocess.run(cmd, capture_output=True, text=True)
+
+    def _move_filestore(self, source_db: str, target_db: str) -> None:
+        source = f"/volumes/data/filestore/{source_db}"
+        target = f"/volumes/data/filestore/{target_db}"
+        cmd = ["docker", "exec", self.container_name, "sh", "-c", f"rm -rf '{target}' && if [ -d '{source}' ]; then mv '{source}' '{target}'; fi"]
+        subprocess.run(cmd, capture_output=True, text=True)
+
+    def _remove_filestore(self, db_name: str) -> None:
+        container_exec(self.container_name, ["rm", "-rf", f"/volumes/data/filestore/{db_name}"])
+
+    def _terminate_db_connections(self, db_name: str) -> None:
+        # Returns once pg_stat_activity shows no backend left (bounded wait)
+        self.db_admin.terminate(db_name)
 
     def _drop_database_safely(self, db_name: str) -> None:
-        import os
-        if not db_name or db_name == "postgres":
-            return
         try:
-            self._terminate_db_connections(db_name)
-            
-            db_password = os.environ.get("ODOO_DB_PASSWORD")
-            if not db_password:
-                raise RuntimeError("ODOO_DB_PASSWORD environment variable not set")
-            
-            container_prefix = os.environ.get("ODOO_CONTAINER_PREFIX", "odoo-opw")
-            db_container = f"{container_prefix}-database-1"
-            
-            drop_cmd = [
-                "docker",
-                "exec",
-                "-e",
-                f"PGPASSWORD={db_password}",
-                db_container,
-                "psql",
-                "-U",
-                "odoo",
-                "-d",
-                "postgres",
-                "-c",
-                f"DROP DATABASE IF EXISTS {db_name};",
-            ]
-            subprocess.run(drop_cmd, capture_output=True, text=True)
+            # Leased pool clones are renamed away and dropped by the background refill
+            if self.db_pool and self.db_pool.release(db_name):
+                return
+            self.clone_backend.drop(db_name)
         except Exception:
             pass
 
     def _clone_production_database(self, target_db: str, source_db: str) -> None:
-        import os
-        
         if self.output_manager:
             self.output_manager.write_line(
                 f"🗄️  Cloning database: {source_db} → {target_db}"
             )
 
-        # Ensure target is dropped and source has no active connections
-        self._terminate_db_connections(target_db)
-        self._drop_database_safely(target_db)
-        self._terminate_db_connections(source_db)
+        if self.db_pool and source_db == self.db_pool.source_db:
+            try:
+                leased = self.db_pool.lease(target_db)
+            except DatabaseAdminError as e:
+                leased = False
+                if self.output_manager:
+                    self.output_manager.write_line(f"⚠️  Database pool unavailable: {e}")
+            if leased:
+                # Replaces the leased clone in the background
+                self.db_pool.spawn_refill()
+                if self.output_manager:
+                    self.output_manager.write_line(f"♻️  Leased pre-cloned database: {target_db}")
+                return
 
-        db_password = os.environ.get("ODOO_DB_PASSWORD")
-        if not db_password:
-            raise RuntimeError("ODOO_DB_PASSWORD environment variable not set")
-        
-        container_prefix = os.environ.get("ODOO_CONTAINER_PREFIX", "odoo-opw")
-        db_container = f"{container_prefix}-database-1"
-        
-        clone_cmd = [
-            "docker",
-            "exec",
-            "-e",
-            f"PGPASSWORD={db_password}",
-            db_container,
-            "psql",
-            "-U",
-            "odoo",
-            "-d",
-            "postgres",
-            "-c",
-            f"CREATE DATABASE {target_db} WITH TEMPLATE {source_db};",
-        ]
-        result = subprocess.run(clone_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or "Failed to clone database")
+        # The backend drops the target first and (for template clones) clears connections to the source
+        self.clone_backend.clone(source_db, target_db)
+        if self.db_pool and source_db == self.db_pool.source_db:
+            # Pool was empty or stale - build it after this clone, so the next run can lease
+            self.db_pool.spawn_refill()
 
         if self.output_manager:
             self.output_manager.write_line(f"✅ Database cloned: {target_db}")
 
-    def _create_filestore_symlink(self, test_db: str, production_db: str) -> None:
-        test_filestore = f"/volumes/data/filestore/{test_db}"
-        prod_filestore = f"/volumes/data/filestore/{production_db}"
+    def _database_fingerprint(self, db_name: str) -> dict[str, tuple[int, int]] | None:
+        """Committed-change fingerprint for database reuse, or None when reuse is off or unavailable."""
+        if not self.db_reuse:
+            return None
+        try:
+            return self.db_reuse.fingerprint(db_name)
+        except DatabaseAdminError as e:
+            if self.output_manager:
+                self.output_manager.write_line(f"⚠️  Database reuse unavailable for {db_name}: {e}")
+            return None
+
+    def _keep_reusable_database(self, db_name: str, before: dict[str, tuple[int, int]]) -> bool:
+        """Mark the database clean for the next run if the tests committed nothing to it."""
+        try:
+            # Backends flush their table statistics before they leave pg_stat_activity
+            if not self.db_admin.wait_for_no_connections(db_name):
+                return False
+            after = self.db_reuse.fingerprint(db_name)
+            drifted = self.db_reuse.drifted_tables(before, after)
+            if drifted:
+                if self.output_manager:
+                    shown = ", ".join(drifted[:5]) + (f" (+{len(drifted) - 5} more)" if len(drifted) > 5 else "")
+                    self.output_manager.write_line(f"🧪 Tests committed changes to {db_name} ({shown}); it will be re-cloned")
+                return False
+            self.db_reuse.mark_clean(db_name, after)
+        except DatabaseAdminError:
+            return False
+        if self.output_manager:
+            self.output_manager.write_line(f"♻️  Keeping unchanged database for the next run: {db_name}")
+        return True
+
+    def _create_test_filestore(self, test_db: str, production_db: str) -> None:
+        """Give `test_db` a copy-on-write view of the production filestore (see tools/filestore.py)."""
         if self.output_manager:
             self.output_manager.write_line(
-                f"🔗 Creating filestore link: {test_filestore} → {prod_filestore}"
+                f"🗂️  Creating {self.filestore_mode} filestore: {filestore_path(test_db)} ← {filestore_path(production_db)}"
             )
-        cmd = [
-            "docker",
-            "exec",
-            self.container_name,
-            "sh",
-            "-c",
-            f"if [ -e '{test_filestore}' ]; then rm -rf '{test_filestore}'; fi && ln -s '{prod_filestore}' '{test_filestore}'",
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        script = provision_filestore_script(test_db, production_db, self.filestore_mode)
+        result = container_exec(self.container_name, ["sh", "-c", script], user="root")
         if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or "Failed to create filestore symlink")
+            raise RuntimeError(result.stderr.strip() or "Failed to create test filestore")
         if self.output_manager:
-            self.output_manager.write_line("✅ Filestore symlink ready")
+            mode = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else self.filestore_mode
+            self.output_manager.write_line(f"✅ Filestore ready ({mode})")
+
+    def _prepare_asset_bundles(self, test_db: str) -> None:
+        """Seed the compiled web.assets_* bundles of the current sources into `test_db` (see tools/asset_cache.py).
+
+        On a cache miss the bundles are pregenerated in `test_db` once and published to the cache,
+        so the first tour of this and every later run with the same sources no longer compiles them.
+        """
+        if not self.asset_cache:
+            return
+        started = time.monotonic()
+        report = run_asset_cache(self.container_name, ["seed", "--db", test_db, "--addons-path", self.addons_path])
+        try:
+            if "error" in report:
+                raise RuntimeError(report["error"])
+            if report["hit"] and report["rows"]:
+                self.db_admin.query(test_db, insert_bundles_sql(report["rows"]), port=self.clone_backend.db_port(test_db))
+                if self.output_manager:
+                    self.output_manager.write_line(
+                        f"📦 Seeded {len(report['rows'])} cached asset bundle files ({report['key']}) in {time.monotonic() - started:.1f}s"
+                    )
+                return
+            if self.output_manager:
+                self.output_manager.write_line(f"📦 Building asset bundles for sources {report['key']} in {test_db}...")
+            cmd = ["docker", "exec", "-i", self.container_name, "/odoo/odoo-bin", "shell", "-d", test_db, "--addons-path", self.addons_path]
+            cmd += ["--no-http", "--stop-after-init", "--log-level=warn"]
+            db_port = self.clone_backend.db_port(test_db)
+            if db_port:
+                cmd.append(f"--db_port={db_port}")
+            built = subprocess.run(cmd, input=PREGENERATE_SCRIPT, capture_output=True, text=True, timeout=900)
+            if built.returncode != 0:
+                raise RuntimeError(built.stderr.strip()[-300:] or f"odoo-bin shell exited with {built.returncode}")
+            rows = bundle_rows(self.db_admin.query(test_db, EXPORT_BUNDLES_SQL, port=self.clone_backend.db_port(test_db)))
+            stored = run_asset_cache(self.container_name, ["store", "--db", test_db, "--key", report["key"], "--rows", json.dumps(rows)])
+            if "error" in stored:
+                raise RuntimeError(stored["error"])
+            if self.output_manager:
+                self.output_manager.write_line(
+                    f"📦 Built and cached {stored['stored']} asset bundle files in {time.monotonic() - started:.1f}s"
+                )
+        except (RuntimeError, DatabaseAdminError, subprocess.TimeoutExpired, OSError, KeyError) as e:
+            # Odoo compiles whatever is missing on the first page load, as before
+            if self.output_manager:
+                self.output_manager.write_line(f"⚠️  Asset bundle cache skipped: {e}")
 
     def _cleanup_test_filestore(self, test_db: str) -> None:
-        # Best-effort removal of test filestore path
-        path = f"/volumes/data/filestore/{test_db}"
-        cmd = ["docker", "exec", self.container_name, "sh", "-c", f"[ -L '{path}' ] && rm '{path}' || true"]
-        subprocess.run(cmd, capture_output=True, text=True)
+        # Best-effort removal of the test filestore (link farm, overlay mount or symlink); never the source's files
+        try:
+            script = cleanup_filestore_script(test_db)
+        except ValueError:
+            return
+        container_exec(self.container_name, ["sh", "-c", script], user="root")
 
     def _deep_cleanup_between_phases(self, from_phase: str, to_phase: str) -> None:
         """Perform comprehensive cleanup between test phases to prevent hangs."""
@@ -1520,22 +2000,15 @@ class UnifiedTestRunner:
             self.output_manager.write_line("-" * 40)
         
         try:
-            # 1. Force terminate all test-related processes
-            self._force_terminate_test_processes()
+            # 1. Processes, IPC objects and temp files/locks in one container-side pass
+            #    (waits for the processes to exit instead of sleeping)
+            self._run_container_cleanup(
+                f"{from_phase} → {to_phase}", TEST_PROCESS_PATTERNS, ipc=True, temp_files=True
+            )
             
             # 2. Clean up database connections
             self._cleanup_database_connections()
             
-            # 3. Reset Docker container state
-            self._reset_container_state()
-            
-            # 4. Clean up temporary files and locks
-            self._cleanup_temp_files_and_locks()
-            
-            # 5. Wait for container to stabilize
-            import time
-            time.sleep(3)
-            
             if self.output_manager:
                 self.output_manager.write_line("✅ Deep cleanup completed")
                 self.output_manager.write_line("")
@@ -1544,74 +2017,63 @@ class UnifiedTestRunner:
             if self.output_manager:
                 self.output_manager.write_line(f"⚠️ Cleanup warning: {e}")
 
+    def _ensure_browser_pool(self) -> bool:
+        """Start (or check) the warm Chromium pool once per runner; False when disabled or unavailable."""
+        if not self.browser_pool_config.get("enabled", False):
+            return False
+        if self.browser_pool_ready is None:
+            size = int(self.browser_pool_config.get("size", 2))
+            if self._should_shard_category("tour"):
+                # One warm browser per tour shard
+                size = max(size, self.tour_workers)
+            status = ensure_browser_pool(
+                self.container_name,
+                size=size,
+                max_uses=int(self.browser_pool_config.get("max_uses", 25)),
+                flags=TOUR_CHROMIUM_FLAGS,
+            )
+            self.browser_pool_ready = "error" not in status
+            if self.output_manager:
+                self.output_manager.write_line(f"🌐 {summarize_browser_pool(status)}")
+        return self.browser_pool_ready
+
+    def _ensure_tour_tracing(self) -> bool:
+        """Install the tracing browser shims once per runner (the pool installs them too); False when disabled."""
+        if not self.tour_trace:
+            return False
+        if self.tour_trace_ready is None:
+            status = {} if self.browser_pool_ready else install_browser_shims(self.container_name)
+            self.tour_trace_ready = "error" not in status
+            if self.output_manager and not self.tour_trace_ready:
+                self.output_manager.write_line(f"⚠️  Tour tracing disabled: {status['error']}")
+        return self.tour_trace_ready
+
+    def _run_container_cleanup(self, label: str, patterns: tuple[str, ...], ipc: bool = False, temp_files: bool = False) -> dict:
+        """Run tools/container_cleanup.py in the container; the JSON report goes to cleanup_reports.jsonl."""
+        report = run_container_cleanup(self.container_name, patterns, ipc=ipc, temp_files=temp_files)
+        if self.output_manager:
+            self.output_manager.write_line(f"   🧹 {summarize_cleanup(report)}")
+            if self.verbose or self.debug:
+                for process in report.get("killed", []) + report.get("survivors", []):
+                    self.output_manager.write_line(f"     pid {process['pid']}: {process['cmdline'][:120]}")
+        try:
+            with open(self.output_dir / "cleanup_reports.jsonl", "a") as reports:
+                reports.write(json.dumps({"label": label, "container": self.container_name, **report}) + "\n")
+        except OSError:
+            pass
+        return report
+
     def _force_cleanup_category_processes(self, category: str) -> None:
         """Force cleanup of processes specific to a test category."""
-        try:
-            # Kill any remaining processes for this category
-            process_patterns = [
-                "odoo-bin.*test-enable",
-                "python.*odoo-bin",
-                "timeout.*odoo-bin",
-            ]
-            
-            # Add browser processes for tour tests
-            if category == "tour":
-                process_patterns.extend([
-                    "chromium",
-                    "chrome",
-                    "chrome_crashpad",
-                    "chromedriver",
-                ])
-            
-            for pattern in process_patterns:
-                cmd = ["docker", "exec", self.container_name, "pkill", "-f", pattern]
-                subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                
-            # Force kill any stubborn processes
-            for pattern in process_patterns:
-                cmd = ["docker", "exec", self.container_name, "pkill", "-9", "-f", pattern]
-                subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                
-        except Exception as e:
-            if self.output_manager:
-                self.output_manager.write_line(f"⚠️ Process cleanup warning: {e}")
+        # Add browser processes for tour tests
+        patterns = ODOO_PROCESS_PATTERNS + (BROWSER_PROCESS_PATTERNS if category == "tour" else ())
+        self._run_container_cleanup(f"{category} processes", patterns)
 
     def _force_terminate_test_processes(self) -> None:
         """Aggressively terminate all test-related processes."""
-        try:
-            if self.output_manager:
-                self.output_manager.write_line("   🔄 Terminating test processes...")
-            
-            # Get all test-related PIDs
-            find_pids_cmd = [
-                "docker", "exec", self.container_name, "sh", "-c",
-                "pgrep -f 'odoo-bin.*test|python.*odoo|timeout.*odoo|chromium|chrome' || true"
-            ]
-            
-            result = subprocess.run(find_pids_cmd, capture_output=True, text=True, timeout=10)
-            pids = [p.strip() for p in result.stdout.split() if p.strip().isdigit()]
-            
-            if pids:
-                if self.output_manager:
-                    self.output_manager.write_line(f"     Found {len(pids)} processes to terminate")
-                
-                # Try graceful termination first
-                for pid in pids:
-                    cmd = ["docker", "exec", self.container_name, "kill", "-TERM", pid]
-                    subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                
-                # Wait a moment for graceful shutdown
-                import time
-                time.sleep(2)
-                
-                # Force kill any remaining processes
-                for pid in pids:
-                    cmd = ["docker", "exec", self.container_name, "kill", "-KILL", pid]
-                    subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                    
-        except Exception as e:
-            if self.output_manager:
-                self.output_manager.write_line(f"     ⚠️ Process termination warning: {e}")
+        if self.output_manager:
+            self.output_manager.write_line("   🔄 Terminating test processes...")
+        self._run_container_cleanup("test processes", TEST_PROCESS_PATTERNS)
 
     def _cleanup_database_connections(self) -> None:
         """Clean up database connections and reset connection pool."""
@@ -1637,58 +2099,6 @@ class UnifiedTestRunner:
             if self.output_manager:
                 self.output_manager.write_line(f"     ⚠️ DB connection cleanup warning: {e}")
 
-    def _reset_container_state(self) -> None:
-        """Reset Docker container state without full restart."""
-        try:
-            if self.output_manager:
-                self.output_manager.write_line("   🐳 Resetting container state...")
-            
-            # Clear shared memory segments
-            cmd = ["docker", "exec", self.container_name, "sh", "-c", "ipcs -m | awk '/^0x/ {print $2}' | xargs -r ipcrm -m || true"]
-            subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            # Clear semaphores
-            cmd = ["docker", "exec", self.container_name, "sh", "-c", "ipcs -s | awk '/^0x/ {print $2}' | xargs -r ipcrm -s || true"]
-            subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            # Clear orphaned sockets
-            cmd = ["docker", "exec", self.container_name, "sh", "-c", "find /tmp -name '*.sock' -type s -delete || true"]
-            subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-        except Exception as e:
-            if self.output_manager:
-                self.output_manager.write_line(f"     ⚠️ Container reset warning: {e}")
-
-    def _cleanup_temp_files_and_locks(self) -> None:
-        """Clean up temporary files and locks that might cause hangs."""
-        try:
-            if self.output_manager:
-                self.output_manager.write_line("   🗂️ Cleaning temporary files and locks...")
-            
-            # Clean up Odoo temporary files
-            cleanup_commands = [
-                # Remove Odoo cache and session files
-                "find /tmp -name 'openerp-*' -type f -delete || true",
-                "find /tmp -name 'odoo-*' -type f -delete || true",
-                "find /tmp -name '.odoo_*' -type f -delete || true",
-                # Remove browser cache and temp files
-                "find /tmp -name 'chrome*' -type d -exec rm -rf {} + || true",
-                "find /tmp -name 'chromium*' -type d -exec rm -rf {} + || true",
-                # Remove stale lock files
-                "find /tmp -name '*.lock' -type f -delete || true",
-                "find /tmp -name '*.pid' -type f -delete || true",
-                # Clean up core dumps
-                "find /tmp -name 'core.*' -type f -delete || true",
-            ]
-            
-            for cleanup_cmd in cleanup_commands:
-                cmd = ["docker", "exec", self.container_name, "sh", "-c", cleanup_cmd]
-                subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                
-        except Exception as e:
-            if self.output_manager:
-                self.output_manager.write_line(f"     ⚠️ Temp file cleanup warning: {e}")
-
     def _run_test_category(self, category: str, modules: list[str] | None, specific_test: str | None = None) -> TestResults:
         """Run a specific category of tests.
 
@@ -1707,15 +2117,54 @@ class UnifiedTestRunner:
         test_tag = tag_map.get(category)
         if not test_tag:
             # Fallback to running all tests if category not recognized
-            timeout = get_recommended_timeout(category, test_mode=category)
+            timeout = get_recommended_timeout(category, test_mode=category, duration_store=self.duration_store)
             return self._run_normal_tests(category, None, timeout, modules)
         
         # Track whether modules were explicitly provided by the user
         explicit_modules = bool(modules)
 
+        # Change-impact mode: only the classes of this category that exercise changed files
+        affected = None
+        if self.affected_classes is not None and not specific_test:
+            affected = self._select_test_classes(modules or self.discover_local_modules(), test_tag)
+            if not affected:
+                if self.output_manager:
+                    self.output_manager.write_line(f"⏭️  No affected {category} test classes")
+                return TestResults(summary=f"No affected {category} tests")
+
+        # Shard whole-category runs across parallel workers when enabled
+        if not specific_test and self._should_shard_category(category):
+            results = self._run_sharded_category(category, test_tag, modules)
+            if not explicit_modules and affected is None:
+                self._refresh_impact_map()
+            return results
+
+        # Compile the selection before preparing any database, so a bad one fails in milliseconds.
+        # Tag filter format is tag/module (NOT /module:tag), restricted to our custom modules
+        # so Odoo core tests that may cause conflicts never run.
+        search_modules = modules or self.discover_local_modules()
+        if specific_test:
+            expression = specific_test
+        elif affected:
+            expression = ",".join(f"{test_tag}/{test_class['module']}:{test_class['class']}" for test_class in affected)
+        else:
+            expression = ",".join(f"{test_tag}/{module}" for module in search_modules) or test_tag
+        try:
+            plan = self._compile_test_plan(expression, search_modules)
+        except TestPlanError as e:
+            return self._invalid_plan_results(e)
+        if plan.is_empty:
+            if specific_test:
+                return self._invalid_plan_results(TestPlanError(f"{specific_test} matches no tests"))
+            if self.output_manager:
+                self.output_manager.write_line(f"⏭️  No {category} tests")
+            return TestResults(summary=f"No {category} tests")
+        test_tags = plan.test_tags()
+
         # Prepare isolated database per category
         original_db = self.database
         test_db_was_prepared = False
+        reuse_fingerprint = None
 
         if category == "unit":
             # Clean empty test DB for unit tests
@@ -1733,64 +2182,39 @@ class UnifiedTestRunner:
             # Clone production DB for isolation
             cloned_db = f"{original_db}_test_{category}"
             try:
-                self._clone_production_database(cloned_db, source_db=original_db)
+                if self.db_reuse and self.db_reuse.reusable(cloned_db):
+                    if self.output_manager:
+                        self.output_manager.write_line(f"♻️  Reusing unchanged database: {cloned_db}")
+                else:
+                    self._clone_production_database(cloned_db, source_db=original_db)
                 self.database = cloned_db
                 test_db_was_prepared = True
                 # For integration and tour tests, ensure filestore access (attachments, images)
                 if category in ("integration", "tour"):
                     try:
-                        self._create_filestore_symlink(cloned_db, original_db)
+                        self._create_test_filestore(cloned_db, original_db)
                     except Exception as fe:
                         if self.output_manager:
-                            self.output_manager.write_line(f"⚠️  Failed to create filestore symlink: {fe}")
+                            self.output_manager.write_line(f"⚠️  Failed to create test filestore: {fe}")
+                if category == "tour":
+                    self._prepare_asset_bundles(cloned_db)
+                # Taken once the database is fully prepared: seeded bundles are not test pollution
+                reuse_fingerprint = self._database_fingerprint(cloned_db)
             except Exception as e:
                 if self.output_manager:
                     self.output_manager.write_line(f"⚠️  Failed to clone database for {category}: {e}. Using {original_db}.")
                 self.database = original_db
 
-        # If a specific test was requested, resolve/forward it instead of broad tag filters
-        resolved_specific = None
-        if specific_test:
-            try:
-                if re.match(r"^test_[A-Za-z0-9_]+$", specific_test):
-                    search_modules = modules or (self.modules if self.modules else self.discover_local_modules())
-                    resolved = self._resolve_bare_test_method(specific_test, search_modules)
-                    if resolved:
-                        resolved_specific = resolved["tag"]  # format: /module:Class.method
-                        # Align module context to improve downstream handling/logs
-                        self.modules = [resolved["module"]]
-                else:
-                    # Use as-is (could be TestClass or TestClass.method or already /module:...)
-                    resolved_specific = specific_test
-            except Exception:
-                # Non-fatal; fall back to tag-based selection
-                resolved_specific = None
-
-        if resolved_specific:
-            test_tags = resolved_specific
-        else:
-            # Build the tag filter for Odoo test runner
-            # Correct format is: tag/module or just /module (NOT /module:tag)
-            # To filter by tag in specific modules, use: tag/module1,tag/module2
-            if modules:
-                # Run tests with specific tag in specific modules
-                test_tags = ",".join([f"{test_tag}/{module}" for module in modules])
-            else:
-                # Discover our custom modules and run tests only for them
-                # This prevents running Odoo core tests that may cause conflicts
-                discovered_modules = self.discover_local_modules()
-                if discovered_modules:
-                    test_tags = ",".join([f"{test_tag}/{module}" for module in discovered_modules])
-                else:
-                    # Fallback if no modules discovered
-                    test_tags = test_tag
-
         # Get appropriate timeout for this category
-        timeout = get_recommended_timeout(category, test_mode=category)
+        timeout = get_recommended_timeout(category, test_mode=category, duration_store=self.duration_store)
 
         # Run tests with tag filtering
         try:
-            return self._run_tests_with_tags(test_tags, timeout, modules, category)
+            results = self._run_tests_with_tags(test_tags, timeout, modules, category)
+            if not specific_test and not explicit_modules and affected is None:
+                self._record_category_duration(category, results)
+                self._refresh_impact_map()
+            return results
         finally:
             # Cleanup cloned/created test DBs to avoid accumulation
             if test_db_was_prepared:
@@ -1798,8 +2222,9 @@ class UnifiedTestRunner:
                     if category in ("integration", "tour"):
                         # Best-effort cleanup of filestore link
                         self._cleanup_test_filestore(self.database)
-                    # Drop the test database
-                    self._drop_database_safely(self.database)
+                    # Drop the test database, unless it is kept for reuse
+                    if reuse_fingerprint is None or not self._keep_reusable_database(self.database, reuse_fingerprint):
+                        self._drop_database_safely(self.database)
                 except Exception as ce:
                     if self.output_manager:
                         self.output_manager.write_line(f"⚠️  Cleanup warning for {self.database}: {ce}")
@@ -1808,7 +2233,261 @@ class UnifiedTestRunner:
                     self.database = original_db
                     
                     # Ensure full process cleanup after each category
-                    self._force_cleanup_category_processes(category)
+                    if self.exclusive_container:
+                        self._force_cleanup_category_processes(category)
+
+    def _should_shard_category(self, category: str) -> bool:
+        if category == "tour":
+            return self.parallel_enabled and self.tour_workers > 1
+        return self.parallel_enabled and self.parallel_workers > 1 and category in ("unit", "integration")
+
+    def _discover_test_classes(self, modules: list[str], test_tag: str) -> list[dict[str, str]]:
+        """Statically discover test classes carrying the given category tag.
+
+        Returns dicts with keys: module, class, file, from the compiled test plan of the
+        category, so tags set through constants (@tagged(*UNIT_TAGS)) or inherited from
+        a base class are resolved exactly.
+        """
+        return self._compile_test_plan(",".join(f"{test_tag}/{module}" for module in modules), modules).classes()
+
+    def _select_test_classes(self, modules: list[str], test_tag: str) -> list[dict[str, str]]:
+        """Discovered classes for the tag, narrowed to the affected classes in change-impact mode."""
+        test_classes = self._discover_test_classes(modules, test_tag)
+        if self.affected_classes is None:
+            return test_classes
+        return [test_class for test_class in test_classes if f"{test_class['module']}:{test_class['class']}" in self.affected_classes]
+
+    def select_affected_tests(self, base_ref: str) -> ChangeImpact:
+        """Restrict category runs to the test classes affected by changes since `base_ref`."""
+        impact = select_affected(load_impact_map(), changed_files(base_ref))
+        self.affected_classes = impact.affected_classes
+        return impact
+
+    def _refresh_impact_map(self) -> None:
+        # Full category runs keep the change-impact map current for later --affected runs
+        try:
+            save_impact_map(build_impact_map())
+        except OSError as e:
+            if self.output_manager:
+                self.output_manager.write_line(f"⚠️  Failed to refresh test impact map: {e}")
+
+    def _partition_into_shards(self, test_classes: list[dict[str, str]], workers: int) -> list[list[dict[str, str]]]:
+        """Split discovered classes into at most `workers` shards, balanced by historical duration.
+
+        Units (classes, or whole modules with scope="module") are scheduled longest-first onto the
+        currently lightest shard. Classes without history count as the average known class, so
+        without any history the split is the same as round-robin.
+        """
+        if self.parallel_scope == "module":
+            by_module: dict[str, list[dict[str, str]]] = {}
+            for test_class in test_classes:
+                by_module.setdefault(test_class["module"], []).append(test_class)
+            units = list(by_module.values())
+        else:
+            units = [[test_class] for test_class in test_classes]
+
+        class_seconds = self.duration_store.class_durations()
+        known = [class_seconds[key] for key in (f"{c['module']}:{c['class']}" for c in test_classes) if key in class_seconds]
+        default_seconds = sum(known) / len(known) if known else 1.0
+
+        def unit_seconds(unit: list[dict[str, str]]) -> float:
+            return sum(class_seconds.get(f"{c['module']}:{c['class']}", default_seconds) for c in unit)
+
+        return _balance_shards(units, unit_seconds, workers)
+
+    def _partition_tours(self, tour_ids: list[str], workers: int) -> list[list[str]]:
+        """Split tours (/module:Class.method) into at most `workers` shards, balanced by each tour's
+        median duration. Every tour is a browser session of its own, so methods are scheduled alone."""
+        tour_seconds = self.duration_store.test_durations()
+        known = [tour_seconds[tour_id[1:]] for tour_id in tour_ids if tour_id[1:] in tour_seconds]
+        default_seconds = sum(known) / len(known) if known else 1.0
+        return _balance_shards([[tour_id] for tour_id in tour_ids], lambda unit: tour_seconds.get(unit[0][1:], default_seconds), workers)
+
+    def _run_sharded_category(self, category: str, test_tag: str, modules: list[str] | None) -> TestResults:
+        """Run a test category split across parallel workers.
+
+        Each shard runs in its own odoo-bin process against its own database clone
+        and HTTP port; results are merged into a single TestResults. Tours are
+        sharded per test method, each shard driving its own browser, and their
+        outcomes are collected per tour into tour_results.json.
+        """
+        search_modules = modules or self.discover_local_modules()
+        test_classes = self._select_test_classes(search_modules, test_tag)
+        if category == "tour":
+            tour_plan = self._compile_test_plan(",".join(f"{test_tag}/{c['module']}:{c['class']}" for c in test_classes), search_modules)
+            units = tour_plan.test_ids() if test_classes else []
+            shards = self._partition_tours(units, self.tour_workers)
+            # Shard specs: /module:Class.method, run as tour_test/module:Class.method
+            shard_specs = shards
+        else:
+            units = test_classes
+            shards = self._partition_into_shards(test_classes, self.parallel_workers)
+            shard_specs = [[f"{test_class['module']}:{test_class['class']}" for test_class in shard] for shard in shards]
+        if len(shards) < 2:
+            # Nothing to parallelise - run the category serially
+            self.parallel_enabled = False
+            try:
+                return self._run_test_category(category, modules, None)
+            finally:
+                self.parallel_enabled = True
+
+        if self.output_manager:
+            unit_name = "tours" if category == "tour" else "test classes"
+            self.output_manager.write_line(f"⚡ Sharding {len(units)} {category} {unit_name} across {len(shards)} workers")
+        if category == "tour":
+            # Started once here, so every shard worker inherits the ready pool (and tracing shims)
+            self._ensure_browser_pool()
+            self._ensure_tour_tracing()
+
+        original_db = self.database
+        source_db = original_db
+        if category == "unit":
+            try:
+                self._setup_unit_test_database()
+                source_db = f"{original_db}_test" if not original_db.endswith("_test") else original_db
+            except Exception as e:
+                if self.output_manager:
+                    self.output_manager.write_line(f"⚠️  Failed to setup unit test database: {e}. Running serially.")
+                self.parallel_enabled = False
+                try:
+                    return self._run_test_category(category, modules, None)
+                finally:
+                    self.parallel_enabled = True
+
+        workers: list[UnifiedTestRunner] = []
+        timeout = get_recommended_timeout(category, test_mode=category, duration_store=self.duration_store)
+        try:
+            for index, specs in enumerate(shard_specs):
+                worker = self._create_shard_worker(index, category, source_db, original_db)
+                workers.append(worker)
+                if self.output_manager:
+                    names = ", ".join(spec.rsplit(":", 1)[-1] for spec in specs)
+                    self.output_manager.write_line(f"   shard {index}: {worker.database} port={worker.http_port} → {names}")
+
+            runs = []
+            for index, (worker, specs) in enumerate(zip(workers, shard_specs)):
+                # A shard holds a known set of tests - size its timeout from their history when complete
+                shard_timeout = self.duration_store.estimate_timeout(specs) or timeout
+                shard_tags = ",".join(f"{test_tag}{spec}" for spec in specs) if category == "tour" else ",".join(f"{test_tag}/{spec}" for spec in specs)
+                runs.append(worker._prepare_streaming_run(f"{category} shard {index}", shard_tags, shard_timeout, modules))
+            # All shard processes are watched concurrently on one event loop
+            watched = [(worker, run) for worker, run in zip(workers, runs) if isinstance(run, StreamingRun)]
+            outcomes = iter(watch_processes([worker._watch_streaming_run(run) for worker, run in watched]))
+            shard_results = [
+                worker._finish_streaming_run(run, next(outcomes)) if isinstance(run, StreamingRun) else run
+                for worker, run in zip(workers, runs)
+            ]
+        finally:
+            for worker in workers:
+                worker.output_manager.close()
+                self._cleanup_test_filestore(worker.database)
+                self._drop_database_safely(worker.database)
+            if source_db != original_db:
+                self._drop_database_safely(source_db)
+            self.database = original_db
+            if self.exclusive_container:
+                self._force_cleanup_category_processes(category)
+
+        merged = merge_test_results(shard_results)
+        if category == "tour":
+            self._aggregate_tour_results(shards, runs, shard_results, merged)
+        if self.output_manager:
+            for index, result in enumerate(shard_results):
+                self.output_manager.write_line(
+                    f"   shard {index}: {result.passed}/{result.total} passed in {result.elapsed:.1f}s"
+                )
+            self.output_manager.write_line(f"⚡ {category} shards merged: {merged.summary}")
+        return merged
+
+    def _aggregate_tour_results(
+        self, shards: list[list[str]], runs: list[StreamingRun | TestResults], shard_results: list[TestResults], merged: TestResults
+    ) -> None:
+        """Collect the outcome of every tour across shards into tour_results.json.
+
+        The merged failed_tour_steps and browser_errors are rebuilt from it, labelled with the
+        tour (or the shard, for output outside any tour) they came from.
+        """
+        tours, failed_steps, browser_errors = [], [], []
+        for index, (tour_ids, run, result) in enumerate(zip(shards, runs, shard_results)):
+            if not isinstance(run, StreamingRun):
+                # The shard never started: nothing to attribute
+                failed_steps.extend(f"shard{index}: {step}" for step in result.failed_tour_steps)
+                browser_errors.extend(f"shard{index}: {error}" for error in result.browser_errors)
+                tours.extend(
+                    {"test": tour_id[1:], "shard": index, "status": "not_run", "seconds": None, "failed_steps": [], "browser_errors": []}
+                    for tour_id in tour_ids
+                )
+                continue
+            durations = dict(run.result_parser.test_durations)
+            issues = dict(run.result_parser.test_issues)
+            for tour_id in tour_ids:
+                test_id = tour_id[1:]
+                test_name = test_id.split(":", 1)[1]
+                # Tests outside odoo.addons.<module> are timed without their module
+                seconds = durations.get(test_id, durations.get(test_name))
+                tour_issues = issues.pop(test_id, None) or issues.pop(test_name, None) or {"failed_steps": [], "browser_errors": []}
+                if test_name in result.errors_list:
+                    status = "error"
+                elif test_name in result.failures:
+                    status = "failed"
+                else:
+                    status = "passed" if seconds is not None else "not_run"
+                tours.append(
+                    {"test": test_id, "shard": index, "status": status, "seconds": round(seconds, 2) if seconds is not None else None, **tour_issues}
+                )
+                failed_steps.extend(f"{test_name}: {step}" for step in tour_issues["failed_steps"])
+                browser_errors.extend(f"{test_name}: {error}" for error in tour_issues["browser_errors"])
+            for label, leftover in issues.items():
+                label = label.split(":", 1)[-1] or f"shard{index}"
+                failed_steps.extend(f"{label}: {step}" for step in leftover["failed_steps"])
+                browser_errors.extend(f"{label}: {error}" for error in leftover["browser_errors"])
+        merged.failed_tour_steps = failed_steps
+        merged.browser_errors = browser_errors
+
+        tour_results_file = self.output_dir / "tour_results.json"
+        try:
+            tour_results_file.parent.mkdir(parents=True, exist_ok=True)
+            tour_results_file.write_text(json.dumps({"workers": len(shards), "elapsed": merged.elapsed, "tours": tours}, indent=2))
+            merged.output_files["tour_results"] = str(tour_results_file)
+        except OSError as e:
+            if self.output_manager:
+                self.output_manager.write_line(f"⚠️  Failed to write tour results: {e}")
+        if self.output_manager:
+            for tour in tours:
+                if tour["status"] != "passed":
+                    self.output_manager.write_line(f"   ❌ {tour['test']} ({tour['status']}, shard {tour['shard']})")
+
+    def _create_shard_worker(
+        self, index: int, category: str, source_db: str, production_db: str
+    ) -> "UnifiedTestRunner":
+        """Clone this runner into an isolated shard worker with its own DB, port and output."""
+        shard_db = f"{source_db}_shard{index}" if category == "unit" else f"{production_db}_test_{category}_shard{index}"
+        self._clone_production_database(shard_db, source_db=source_db)
+        # Shards read attachments (including compiled assets) through a copy-on-write view of the source filestore
+        self._create_test_filestore(shard_db, source_db)
+        if category == "tour":
+            self._prepare_asset_bundles(shard_db)
+
+        worker = copy.copy(self)
+        worker.database = shard_db
+        worker.http_port = self._claim_port()
+        worker.exclusive_container = False
+        if category == "tour":
+            # Several browsers share the container: cap each one
+            worker.chromium_flags_extra = self.chromium_flags_extra or self._tour_chromium_budget()
+        worker.output_dir = self.output_dir / f"{category}-shard-{index}"
+        # Shards log to their own files only; the parent prints the merged summary
+        worker.output_manager = OutputManager(worker.output_dir, "agent")
+        return worker
+
+    def _claim_port(self) -> int:
+        """Pick a free HTTP port no other worker of this run has been given."""
+        with self._port_claim_lock:
+            port = UnifiedTestRunner.get_available_port()
+            while port in self.claimed_ports:
+                port = UnifiedTestRunner.get_available_port()
+            self.claimed_ports.add(port)
+            return port
 
     def _run_tests_with_tags(self, test_tags: str, timeout: int, modules: list[str] | None, category: str) -> TestResults:
         """Run tests with specific tag filtering.
@@ -1830,115 +2509,25 @@ class UnifiedTestRunner:
         # This is essentially a wrapper for the existing run_tests_with_streaming
         return self.run_tests_with_streaming(test_type=test_type, specific_test=specific_test, timeout=timeout, modules=modules)
 
-    def _parse_test_results(self, output: str) -> TestResults:
-        results = TestResults()
-
-        # Check for module loading failures
-        if "Failed to load registry" in output or "Failed to initialize database" in output:
-            results.loading_failed = True
-            error_match = re.search(r"(TypeError: Model.*|AttributeError:.*|ImportError:.*|.*Error:.*)", output)
-            if error_match:
-                results.loading_error = error_match.group(1).strip()
-            else:
-                results.loading_error = "Module loading failed (check logs for details)"
-            results.summary = f"Module loading failed: {results.loading_error}"
-            return results
-
-        # Extract overall summary
-        summary_match = re.search(r"(\d+) failed, (\d+) error\(s\) of (\d+) tests", output)
-        if summary_match:
-            results.failed = int(summary_match.group(1))
-            results.errors = int(summary_match.group(2))
-            results.total = int(summary_match.group(3))
-            results.passed = results.total - results.failed - results.errors
-            results.summary = summary_match.group()
-        else:
-            # Try alternative format
-            ran_match = re.search(r"Ran (\d+) tests? in", output)
-            if ran_match:
-                results.total = int(ran_match.group(1))
-                if "FAILED" in output:
-                    fail_match = re.search(r"FAILED \(.*?failures=(\d+)", output)
-                    error_match = re.search(r"errors=(\d+)", output)
-                    results.failed = int(fail_match.group(1)) if fail_match else 0
-                    results.errors = int(error_match.group(1)) if error_match else 0
-                else:
-                    results.failed = 0
-                    results.errors = 0
-                results.passed = results.total - results.failed - results.errors
-                results.summary = f"{results.failed} failed, {results.errors} error(s) of {results.total} tests"
-            else:
-                # Fall back to progress tracking if no standard summary found
-                if hasattr(self.output_manager, 'progress') and self.output_manager.progress.tests_started > 0:
-                    results.total = self.output_manager.progress.tests_started
-                    # For tour tests, we need to parse the actual results from output
-                    # since TestProgress doesn't track pass/fail status
-                    results.passed = results.total - results.failed - results.errors
-                    results.summary = f"{results.failed} failed, {results.errors} error(s) of {results.total} tests"
-
-        # Extract individual failures and errors
-        failure_pattern = r"(FAIL|ERROR): (Test\w+\.test_\w+)"
-        for match in re.finditer(failure_pattern, output):
-            status, test_name = match.groups()
-            if status == "FAIL":
-                results.failures.append(test_name)
-            else:
-                results.errors_list.append(test_name)
-
-        # Extract browser errors for tour tests
-        if "tour" in output.lower() or "OwlError" in output or "UncaughtPromiseError" in output:
-            console_error_pattern = (
-                r"(Console error:|Browser error:|JavaScript error:|UncaughtPromiseError|OwlError)(.*?)(?=\n\d{4}-|$)"
-            )
-            for match in re.finditer(console_error_pattern, output, re.DOTALL):
-                error_text = match.group(2).strip()
-                if error_text:
-                    results.browser_errors.append(f"{match.group(1)}: {error_text}")
-
-            # Extract tour step failures
-            tour_step_pattern = r"Tour step failed: (.*?)(?=\n|$)"
-            for match in re.finditer(tour_step_pattern, output):
-                results.failed_tour_steps.append(match.group(1).strip())
-
-        # Extract detailed error information
-        traceback_pattern = r"(FAIL|ERROR): (Test\w+\.test_\w+)(.*?)(?=(?:FAIL|ERROR):|$)"
-        for match in re.finditer(traceback_pattern, output, re.DOTALL):
-            status, test_name, details = match.groups()
-            error_lines = []
-            for line in details.split("\n"):
-                if any(
-                    keyword in line
-                    for keyword in ["AssertionError:", "ERROR:", "DETAIL:", "TypeError:", "ReferenceError:", "Error:"]
-                ):
-                    error_lines.append(line.strip())
-            if error_lines:
-                results.error_details[test_name] = "\n".join(error_lines)
-
-        return results
-
-    def _analyze_test_discovery_failure(self, output: str) -> str:
+    def _analyze_test_discovery_failure(self, result_parser: StreamingResultParser) -> str:
         """Analyze why test discovery failed and provide actionable diagnostics."""
         reasons = []
 
         # Check for common test discovery issues
-        if "ImportError" in output:
-            import_match = re.search(r"ImportError: (.+)", output)
-            if import_match:
-                reasons.append(f"Import error: {import_match.group(1)}")
+        if result_parser.import_error:
+            reasons.append(f"Import error: {result_parser.import_error}")
 
-        if "ModuleNotFoundError" in output:
-            module_match = re.search(r"ModuleNotFoundError: (.+)", output)
-            if module_match:
-                reasons.append(f"Missing module: {module_match.group(1)}")
+        if result_parser.module_not_found:
+            reasons.append(f"Missing module: {result_parser.module_not_found}")
 
         # Only check for @tagged if we see no tests starting (module-wide runs don't show @tagged)
-        if "@tagged" not in output and "Starting Test" not in output and "INFO opw odoo.addons" not in output:
+        if not result_parser.seen_markers & {"@tagged", "Starting Test", "INFO opw odoo.addons"}:
             reasons.append("No @tagged decorator found - tests must have @tagged('post_install', '-at_install')")
 
-        if "test_" not in output.lower():
+        if not result_parser.saw_test_reference:
             reasons.append("No test methods found - ensure methods start with 'test_'")
 
-        if "odoo.tests" not in output:
+        if "odoo.tests" not in result_parser.seen_markers:
             reasons.append("No test imports found - ensure tests import from odoo.tests")
 
         # Check for test file naming
@@ -1953,7 +2542,7 @@ class UnifiedTestRunner:
                 reasons.append(f"Verify class '{test_pattern}' exists in tests/ directory")
 
         # Check for common test configuration issues
-        if "product_connect" in output and "tests" in output:
+        if {"product_connect", "tests"} <= result_parser.seen_markers:
             reasons.append("Module found but no tests discovered - check test file imports")
             reasons.append("Ensure tests/__init__.py imports all test files")
 
@@ -2093,7 +2682,70 @@ class UnifiedTestRunner:
         }
 
 
-def get_recommended_timeout(test_type: str, specific_test: str | None = None, test_mode: str = "mixed") -> int:
+def load_test_config() -> dict[str, Any]:
+    """Load the [tool.odoo-test] table from pyproject.toml (empty if unavailable)."""
+    pyproject = Path("pyproject.toml")
+    if not pyproject.exists():
+        return {}
+    try:
+        with open(pyproject, "rb") as f:
+            return tomllib.load(f).get("tool", {}).get("odoo-test", {})
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+
+
+def _balance_shards(units: list[list], unit_seconds: Callable[[list], float], workers: int) -> list[list]:
+    """Longest-first scheduling of units onto at most `workers` shards, each onto the currently lightest one."""
+    shards: list[list] = [[] for _ in range(min(workers, len(units)))]
+    loads = [0.0] * len(shards)
+    for unit in sorted(units, key=unit_seconds, reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].extend(unit)
+        loads[lightest] += unit_seconds(unit)
+    return [shard for shard in shards if shard]
+
+
+def merge_test_results(results: list[TestResults], labels: list[str] | None = None) -> TestResults:
+    """Merge results from parallel shards (or concurrent phases, named by `labels`) into one TestResults."""
+    merged = TestResults()
+    labels = labels or [f"shard{index}" for index in range(len(results))]
+    for label, result in zip(labels, results):
+        merged.total += result.total
+        merged.passed += result.passed
+        merged.failed += result.failed
+        merged.errors += result.errors
+        merged.failures.extend(result.failures)
+        merged.errors_list.extend(result.errors_list)
+        merged.browser_errors.extend(result.browser_errors)
+        merged.failed_tour_steps.extend(result.failed_tour_steps)
+        merged.error_details.update(result.error_details)
+        for name, path in result.output_files.items():
+            merged.output_files[f"{label}_{name}"] = path
+        # Wall-clock time of a parallel run is the slowest shard
+        merged.elapsed = max(merged.elapsed, result.elapsed)
+        if result.loading_failed and not merged.loading_failed:
+            merged.loading_failed = True
+            merged.loading_error = result.loading_error
+        if result.critical_error and not merged.critical_error:
+            merged.critical_error = result.critical_error
+        if result.returncode and not merged.returncode:
+            merged.returncode = result.returncode
+
+    if merged.critical_error:
+        merged.summary = f"CRITICAL ERROR: {merged.critical_error.get('type', 'unknown')}"
+    else:
+        merged.summary = f"{merged.failed} failed, {merged.errors} error(s) of {merged.total} tests"
+    return merged
+
+
+def get_recommended_timeout(
+    test_type: str, specific_test: str | None = None, test_mode: str = "mixed", duration_store: TestDurationStore | None = None
+) -> int:
+    # Percentiles of recorded run and test durations when there is enough history
+    historical = (duration_store or TestDurationStore()).recommended_timeout(specific_test, test_mode)
+    if historical:
+        return historical
+
     # Much longer timeouts for reliability based on mode
     if test_mode == "unit":
         # Unit tests should be fast
@@ -2154,6 +2806,25 @@ Examples:
   python test_runner.py TestProductTemplate
   python test_runner.py TestProductTemplate.test_sku_validation
   
+  # Parallel (class-sharded) execution - defaults from [tool.odoo-test.parallel]
+  python test_runner.py --integration-only --workers 8
+  python test_runner.py --unit-only --no-parallel
+
+  # Unit, integration and tour phases side by side (caps from [tool.odoo-test.concurrent])
+  python test_runner.py --all --concurrent-phases
+
+  # Only the test classes affected by changes since a base ref (default: uncommitted changes)
+  python test_runner.py --affected
+  python test_runner.py --all --affected main
+
+  # Fast iteration through the warm in-container test daemon
+  python test_runner.py --daemon TestProductTemplate.test_sku_validation
+  python test_runner.py --stop-daemon
+
+  # Follow the events of the latest (or a given) run as they happen
+  python test_runner.py --follow
+  python test_runner.py --follow tmp/tests/odoo-tests-20250101_120000 --json
+
   # Cleanup old test folders
   python test_runner.py --cleanup
   python test_runner.py --cleanup --keep-recent 5
@@ -2188,6 +2859,52 @@ Examples:
     parser.add_argument("--days-old", type=int, help="Remove test folders older than N days")
 
     # Other options
+    # Parallel execution options (defaults come from [tool.odoo-test.parallel])
+    parser.add_argument("--workers", type=int, default=None, help="Number of parallel shard workers for unit/integration runs")
+    parser.add_argument(
+        "--tour-workers", type=int, default=None, help="Number of parallel tour shards, each with its own HTTP port, DB clone and browser"
+    )
+    parser.add_argument("--no-parallel", action="store_true", help="Disable class-sharded parallel execution")
+    parser.add_argument(
+        "--trace-tours",
+        action="store_true",
+        help="Record CDP traces of tour runs (step timings, network, long tasks, JS heap) into tour_trace.json",
+    )
+    parser.add_argument(
+        "--concurrent-phases",
+        action="store_true",
+        help="Run unit, integration and tour phases at the same time (implies --all; caps from [tool.odoo-test.concurrent])",
+    )
+
+    parser.add_argument(
+        "--affected",
+        nargs="?",
+        const="HEAD",
+        default=None,
+        metavar="BASE_REF",
+        help="Only run test classes affected by files changed since BASE_REF (default: HEAD, i.e. uncommitted changes); "
+        "implies --unit-only unless another test mode is given",
+    )
+
+    parser.add_argument(
+        "--reuse-db",
+        action="store_true",
+        help="Keep integration/tour clones between runs while tests commit nothing to them ([tool.odoo-test.clone] reuse)",
+    )
+
+    # Persistent in-container test daemon (warm registry between runs)
+    parser.add_argument("--daemon", action="store_true", help="Run tests through the warm in-container test daemon")
+    parser.add_argument("--stop-daemon", action="store_true", help="Stop the in-container test daemon and exit")
+
+    parser.add_argument(
+        "--follow",
+        nargs="?",
+        const="latest",
+        default=None,
+        metavar="RUN_DIR",
+        help="Tail the events.jsonl of a run (default: the latest odoo-tests-* dir) until it finishes; with --json, raw events",
+    )
+
     parser.add_argument("-v", "--verbose", action="store_true", help="Show detailed output")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("-t", "--timeout", type=int, default=None, help="Timeout in seconds")
@@ -2200,6 +2917,20 @@ Examples:
 
     args = parser.parse_args()
 
+    if args.follow:
+        run_dir = latest_run_dir() if args.follow == "latest" else Path(args.follow)
+        if run_dir is None or not run_dir.is_dir():
+            print(f"No test run to follow: {args.follow}")
+            sys.exit(1)
+        if not args.json:
+            print(f"Following {run_dir / EVENTS_FILE_NAME}")
+        try:
+            for event in follow_events(run_dir):
+                print(json.dumps(event, separators=(",", ":")) if args.json else format_event(event), flush=True)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
     # Handle shortcut mode names in targets
     # If first target is a mode name, treat it as mode selection
     if args.targets and len(args.targets) > 0:
@@ -2228,6 +2959,19 @@ Examples:
                 args.summary = True
                 args.targets = args.targets[1:]
 
+    if args.concurrent_phases:
+        if args.unit_only or args.integration_only or args.tour_only or args.mixed:
+            parser.error("--concurrent-phases runs all three phases; use it with --all or without a test mode")
+        args.all = True
+
+    if args.affected is not None:
+        if any(target.startswith(("Test", "test_")) or any(char in target for char in ".:/") for target in args.targets):
+            parser.error("--affected selects the tests itself; only module names may be given as targets")
+        if args.mixed or args.python or args.tour:
+            parser.error("--affected works with --unit-only, --integration-only, --tour-only or --all")
+        if not (args.all or args.integration_only or args.tour_only):
+            args.unit_only = True
+
     # Determine test mode
     if args.all:
         test_mode = "all"  # Progressive execution
@@ -2251,6 +2995,33 @@ Examples:
         test_mode=test_mode,
     )
 
+    if args.workers is not None:
+        runner.parallel_workers = max(1, args.workers)
+        runner.parallel_enabled = runner.parallel_workers > 1
+    if args.tour_workers is not None:
+        runner.tour_workers = max(1, args.tour_workers)
+    if args.no_parallel:
+        runner.parallel_enabled = False
+    if args.trace_tours:
+        runner.tour_trace = True
+    if args.concurrent_phases:
+        runner.concurrent_phases = True
+    if args.reuse_db and isinstance(runner.clone_backend, SnapshotCloneBackend):
+        parser.error('--reuse-db needs the template clone backend; snapshot clones are removed with their run (backend = "snapshot")')
+    if args.reuse_db and runner.db_reuse is None:
+        runner.db_reuse = DatabaseReuse(get_db_admin(), runner.database)
+    if args.daemon and isinstance(runner.clone_backend, SnapshotCloneBackend):
+        parser.error('--daemon needs the template clone backend; its registry connects to the main server only (backend = "snapshot")')
+    if args.daemon:
+        runner.use_daemon = True
+        # The daemon serves one job at a time
+        runner.parallel_enabled = False
+        runner.concurrent_phases = False
+    if args.stop_daemon:
+        runner.stop_test_daemon()
+        print("Test daemon stopped")
+        sys.exit(0)
+
     # Handle cleanup mode
     if args.cleanup:
         print("Cleaning up old test folders...")
@@ -2260,6 +3031,23 @@ Examples:
         print(f"Freed {cleanup_results['space_saved_mb']} MB of disk space")
         sys.exit(0)
 
+    if args.affected is not None:
+        try:
+            impact = runner.select_affected_tests(args.affected)
+        except (ValueError, subprocess.CalledProcessError) as e:
+            print(f"Error: Could not determine changed files: {e}")
+            sys.exit(1)
+        if not args.json:
+            print(f"🎯 {len(impact.changed_files)} changed files → {len(impact.affected_classes)} affected test classes")
+            for class_key in sorted(impact.affected_classes):
+                print(f"   {class_key} ← {', '.join(impact.reasons[class_key][:3])}")
+            for unmapped_file in impact.unmapped_files:
+                print(f"   ⚠️  No test depends on {unmapped_file} directly - running its whole module")
+        if not impact.affected_classes:
+            if not args.json:
+                print("No test classes affected by these changes")
+            sys.exit(0)
+
     # Determine test type for legacy modes
     if args.python:
         test_type = "python"
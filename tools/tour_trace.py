@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Chrome DevTools Protocol traces of tour tests: step timings, network waterfall, long tasks, JS heap.
+
+With tracing enabled ([tool.odoo-test.tour_trace] or --trace-tours), tour runs
+start odoo-bin with ODOO_TOUR_TRACE_DIR set and the browser_pool shims first on
+PATH. The shim puts a TourTracer next to Odoo on every browser it hands out.
+The tracer is a separate browser-level DevTools session attached to the pages
+of Odoo's browser context, so Odoo's own session is left alone. It records:
+
+- tour steps: the "Tour <name> on step: '<step>'" console lines of automatic
+  tours; a step lasts until the next one (or the tour's success/failure line);
+- the network waterfall: every request with type, status, start, duration and
+  transferred bytes;
+- long tasks (over 50 ms on the main thread) through a PerformanceObserver that
+  reports through a Runtime binding;
+- the JS heap, sampled from Performance.getMetrics every HEAP_SAMPLE_SECONDS.
+
+Each browser session is written as one JSON file under the trace directory in
+the container. After the run the runner collects them with a single docker
+exec (`collect`, which also removes them), attributes every session to the
+test that was running when it started, and writes the compact tour_trace.json
+into the odoo-tests-* output dir. Times are milliseconds from the start of the
+session.
+
+The container side uses the standard library only; it is installed next to
+browser_pool.py.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    from tools.browser_pool import POOL_DIR, DevToolsError, DevToolsSocket
+except ImportError:  # In the container, next to browser_pool.py
+    from browser_pool import POOL_DIR, DevToolsError, DevToolsSocket
+
+TRACE_DIR_ENV = "ODOO_TOUR_TRACE_DIR"
+TRACE_ROOT = f"{POOL_DIR}/traces"
+SCRIPT_PATH = f"{POOL_DIR}/tour_trace.py"
+TRACE_FILE_NAME = "tour_trace.json"
+BINDING_NAME = "__odooTestTrace"
+HEAP_SAMPLE_SECONDS = 1.0
+MAX_URL_LENGTH = 200
+STEP_PATTERN = re.compile(r"[Tt]our (\S+) on step: '?(.*?)'?$")
+TOUR_END_PATTERN = re.compile(r"test successful|test failed|tour (?:succeeded|failed)", re.IGNORECASE)
+LONG_TASK_OBSERVER = f"""
+(() => {{
+    try {{
+        new PerformanceObserver((list) => {{
+            for (const entry of list.getEntries()) {{
+                window.{BINDING_NAME}(JSON.stringify({{start: performance.timeOrigin + entry.startTime, duration: entry.duration}}));
+            }}
+        }}).observe({{type: "longtask", buffered: true}});
+    }} catch (error) {{}}
+}})();
+"""
+
+
+# Container side
+
+
+class TourTracer:
+    """Follow the pages of one browser context and record what a tour costs the browser."""
+
+    def __init__(self, port: int, browser_path: str, context_id: str, trace_dir: str) -> None:
+        self.devtools = DevToolsSocket(f"ws://127.0.0.1:{port}{browser_path}")
+        self.context_id = context_id
+        self.trace_dir = trace_dir
+        self.started = time.time()
+        self.sessions: set[str] = set()
+        self.heap_requests: set[int] = set()
+        self.requests: dict[str, dict] = {}
+        self.steps: list[dict] = []
+        self.long_tasks: list[list[int]] = []
+        self.heap: list[list[int]] = []
+        self.attached = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _ms(self, epoch_seconds: float) -> int:
+        return round((epoch_seconds - self.started) * 1000)
+
+    def start(self, attach_timeout: float = 2.0) -> None:
+        """Start following the context; returns once its existing page is attached (before Odoo gets it)."""
+        # Discovery reports the existing targets too, each is attached as it is reported
+        self.devtools.send("Target.setDiscoverTargets", {"discover": True})
+        self.thread.start()
+        self.attached.wait(attach_timeout)
+
+    def _attach(self, session_id: str) -> None:
+        self.sessions.add(session_id)
+        self.attached.set()
+        self.devtools.send("Runtime.addBinding", {"name": BINDING_NAME}, session_id)
+        self.devtools.send("Page.addScriptToEvaluateOnNewDocument", {"source": LONG_TASK_OBSERVER}, session_id)
+        for domain in ("Runtime", "Network", "Performance"):
+            self.devtools.send(f"{domain}.enable", {}, session_id)
+
+    def _run(self) -> None:
+        next_sample = time.monotonic() + HEAP_SAMPLE_SECONDS
+        while not self.stopping.is_set():
+            try:
+                message = self.devtools.receive(timeout=max(0.0, next_sample - time.monotonic()))
+                if message:
+                    self._handle(message)
+                if time.monotonic() >= next_sample:
+                    next_sample = time.monotonic() + HEAP_SAMPLE_SECONDS
+                    for session_id in self.sessions:
+                        self.heap_requests.add(self.devtools.send("Performance.getMetrics", {}, session_id))
+            except (DevToolsError, OSError, ValueError):
+                return  # The browser is gone
+
+    def _handle(self, message: dict) -> None:
+        if message.get("id") in self.heap_requests:
+            self.heap_requests.discard(message["id"])
+            metrics = {metric["name"]: metric["value"] for metric in message.get("result", {}).get("metrics", [])}
+            if "JSHeapUsedSize" in metrics:
+                self.heap.append([self._ms(time.time()), round(metrics["JSHeapUsedSize"] / 1024)])
+            return
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Target.targetCreated":
+            info = params["targetInfo"]
+            if info.get("type") == "page" and info.get("browserContextId") == self.context_id:
+                self.devtools.send("Target.attachToTarget", {"targetId": info["targetId"], "flatten": True})
+        elif method == "Target.attachedToTarget":
+            self._attach(params["sessionId"])
+        elif method == "Target.detachedFromTarget":
+            self.sessions.discard(params.get("sessionId"))
+        elif method == "Network.requestWillBeSent":
+            self._request_started(params)
+        elif method == "Network.responseReceived":
+            request = self.requests.get(params["requestId"])
+            if request:
+                request["status"] = params["response"].get("status")
+        elif method == "Network.loadingFinished":
+            self._request_ended(params, bytes_received=params.get("encodedDataLength"))
+        elif method == "Network.loadingFailed":
+            self._request_ended(params, error=params.get("errorText") or "failed")
+        elif method == "Runtime.consoleAPICalled":
+            self._console(params)
+        elif method == "Runtime.bindingCalled" and params.get("name") == BINDING_NAME:
+            task = json.loads(params["payload"])
+            self.long_tasks.append([self._ms(task["start"] / 1000), round(task["duration"])])
+
+    def _request_started(self, params: dict) -> None:
+        request_id = params["requestId"]
+        if request_id in self.requests and "redirectResponse" in params:
+            # A redirect reuses the request id: the hop ends where the next one starts
+            self._request_ended(params, status=params["redirectResponse"].get("status"))
+            self.requests[f"{request_id}:{params['timestamp']}"] = self.requests.pop(request_id)
+        self.requests[request_id] = {
+            "url": params["request"]["url"][:MAX_URL_LENGTH],
+            "method": params["request"].get("method", "GET"),
+            "type": params.get("type", ""),
+            "at": self._ms(params.get("wallTime", time.time())),
+            "monotonic": params["timestamp"],
+        }
+
+    def _request_ended(
+        self, params: dict, bytes_received: float | None = None, error: str | None = None, status: int | None = None
+    ) -> None:
+        request = self.requests.get(params["requestId"])
+        if not request or "ms" in request:
+            return
+        request["ms"] = round((params["timestamp"] - request.pop("monotonic")) * 1000)
+        if bytes_received is not None:
+            request["bytes"] = round(bytes_received)
+        if error:
+            request["error"] = error
+        if status is not None:
+            request["status"] = status
+
+    def _console(self, params: dict) -> None:
+        text = " ".join(str(argument.get("value", "")) for argument in params.get("args", []) if "value" in argument)
+        at = self._ms(params.get("timestamp", time.time() * 1000) / 1000)
+        if self.steps and "ms" not in self.steps[-1] and (STEP_PATTERN.search(text) or TOUR_END_PATTERN.search(text)):
+            self.steps[-1]["ms"] = at - self.steps[-1]["at"]
+        step_match = STEP_PATTERN.search(text)
+        if step_match:
+            self.steps.append({"tour": step_match.group(1), "step": step_match.group(2)[:MAX_URL_LENGTH], "at": at})
+
+    def stop(self) -> None:
+        """Stop following the browser and write this session's trace file."""
+        self.stopping.set()
+        self.thread.join(timeout=5)
+        self.devtools.close()
+        requests = []
+        for request in self.requests.values():
+            request.pop("monotonic", None)
+            requests.append(request)
+        trace = {
+            "started": round(self.started, 3),
+            "ms": self._ms(time.time()),
+            "tours": sorted({step["tour"] for step in self.steps}),
+            "steps": self.steps,
+            "requests": sorted(requests, key=lambda request: request["at"]),
+            "long_tasks": self.long_tasks,
+            "heap_kb": self.heap,
+        }
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            temporary = f"{self.trace_dir}/.{os.getpid()}-{time.time_ns()}.tmp"
+            with open(temporary, "w") as trace_file:
+                json.dump(trace, trace_file, separators=(",", ":"))
+            os.replace(temporary, temporary.replace("/.", "/", 1).removesuffix(".tmp") + ".json")
+        except OSError as e:
+            print(f"tour trace not written: {e}", file=sys.stderr)
+
+
+def collect(trace_dir: str) -> dict:
+    """Every session trace in `trace_dir`, oldest first; the directory is removed."""
+    sessions = []
+    try:
+        names = sorted(name for name in os.listdir(trace_dir) if name.endswith(".json"))
+    except OSError:
+        names = []
+    for name in names:
+        try:
+            with open(f"{trace_dir}/{name}") as trace_file:
+                sessions.append(json.load(trace_file))
+        except (OSError, ValueError):
+            continue
+    shutil.rmtree(trace_dir, ignore_errors=True)
+    return {"sessions": sorted(sessions, key=lambda session: session["started"])}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Collect the tour traces written by the browser shim")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("collect").add_argument("--dir", required=True)
+    args = parser.parse_args()
+    json.dump(collect(args.dir), sys.stdout, separators=(",", ":"))
+
+
+# Host side
+
+
+def collect_tour_traces(container_name: str, trace_dir: str, timeout: float = 60) -> dict:
+    """Fetch (and remove) the traces of one run from `container_name`.
+
+    Failures are reported under "error" instead of raised.
+    """
+    command = ["docker", "exec", container_name, "python3", SCRIPT_PATH, "collect", "--dir", trace_dir]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        return {"error": str(e)}
+    if result.returncode != 0:
+        return {"error": result.stderr.strip() or f"trace collection exited with {result.returncode}"}
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return {"error": f"unreadable tour trace: {result.stdout[:200]}"}
+
+
+def attribute_sessions(trace: dict, test_windows: list[tuple[str, float, float]]) -> dict:
+    """Name the test each browser session belongs to: the one running when the session started."""
+    for session in trace.get("sessions", []):
+        session["test"] = next((test_id for test_id, started, ended in test_windows if started <= session["started"] <= ended), None)
+    return trace
+
+
+def summarize_tour_trace(trace: dict) -> str:
+    if "error" in trace:
+        return f"tour trace unavailable: {trace['error']}"
+    sessions = trace.get("sessions", [])
+    steps = [step for session in sessions for step in session["steps"] if "ms" in step]
+    parts = [f"{len(sessions)} browser session(s)", f"{sum(len(session['requests']) for session in sessions)} requests"]
+    if steps:
+        slowest = max(steps, key=lambda step: step["ms"])
+        parts.append(f"{len(steps)} tour steps (slowest {slowest['ms']} ms: {slowest['tour']} {slowest['step'][:60]})")
+    parts.append(f"{sum(len(session['long_tasks']) for session in sessions)} long tasks")
+    peak_kb = max((sample[1] for session in sessions for sample in session["heap_kb"]), default=0)
+    if peak_kb:
+        parts.append(f"peak JS heap {peak_kb / 1024:.0f} MB")
+    return ", ".join(parts)
+
+
+if __name__ == "__main__":
+    main()